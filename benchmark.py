@@ -0,0 +1,245 @@
+"""
+Benchmarks the headless simulation in late game stress scenarios and compares the
+results against a stored baseline, so that slowdowns in the collision or cannonball
+code are caught before they show up as dropped frames.
+
+Usage:
+    python benchmark.py                   Runs every scenario and compares it with the baseline
+    python benchmark.py --save-baseline   Runs every scenario and stores the results as the baseline
+"""
+import argparse
+import json
+import math
+import os
+import time
+import tracemalloc
+from random import Random
+import simulation
+from profiler import FrameProfiler
+
+
+BASELINE_FILE = "./benchmark_baseline.json"
+# How much slower than the baseline a result can be before it counts as a slowdown
+DEFAULT_TOLERANCE = 0.2
+# Handlers this many milliseconds slower or less are treated as noise
+MIN_SLOWDOWN_MS = 0.005
+DEFAULT_TICKS = 500
+
+
+class Scenario:
+    def __init__(self, name: str, level: int, cannonballs: int, seed: int):
+        """
+        Describes a synthetic world to benchmark
+
+        Args:
+            name (str): The name shown in the results
+            level (int): The level the world starts at, which sets how many moles and ammo there are
+            cannonballs (int): How many cannonballs are on the screen at the start
+            seed (int): The seed for the world's random numbers and the bot's key presses
+        """
+        self.name = name
+        self.level = level
+        self.cannonballs = cannonballs
+        self.seed = seed
+
+
+SCENARIOS = [
+    Scenario("level 1", 1, 100, 1),
+    Scenario("level 10", 10, 200, 10),
+    Scenario("level 50", 50, 400, 50),
+    Scenario("level 200", 200, 800, 200),
+]
+
+
+def create_scenario_world(scenario: Scenario) -> simulation.World:
+    """
+    Builds a world that is already deep into a run: full of moles, ammo and cannonballs
+
+    Args:
+        scenario (Scenario): The scenario to build
+
+    Returns:
+        simulation.World: The synthetic world
+    """
+    world = simulation.create_world(scenario.seed)
+    world.level = scenario.level
+    # Enough lives that the benchmark never reaches game over
+    world.lives_count = 10 ** 9
+    world.player.ammo_count = simulation.MAX_AMMO
+    restock(world, scenario, Random(scenario.seed))
+    return world
+
+
+def restock(world: simulation.World, scenario: Scenario, rng: Random):
+    """
+    Tops the world back up to the scenario's number of moles, ammo and cannonballs,
+    so the load stays the same for the whole run instead of the bot clearing it
+
+    Args:
+        world (simulation.World): The world to fill
+        scenario (Scenario): The scenario being run
+        rng (Random): The random numbers used to place everything
+    """
+    while len(world.moles) <= scenario.level:
+        is_mini, is_rabbit = simulation.roll_mole_type(rng)
+        x = rng.randint(1, simulation.WINDOW_WIDTH)
+        y = rng.randint(1, simulation.TOP_OF_GROUND_Y - simulation.CANNON_HEIGHT)
+        simulation.add_mole(world, simulation.Mole(x, y, 0, simulation.mole_flags(is_mini, is_rabbit)))
+    while len(world.ammo) <= scenario.level:
+        simulation.add_ammo(world, simulation.Ammo(rng.randint(1, simulation.WINDOW_WIDTH), simulation.TOP_OF_GROUND_Y))
+    while len(world.cannonballs) < scenario.cannonballs:
+        x = rng.uniform(0, simulation.WINDOW_WIDTH)
+        y = rng.uniform(0, simulation.WINDOW_HEIGHT)
+        is_from_player = rng.random() < 0.5
+        simulation.add_cannonball(world, simulation.create_cannonball(x, y, is_from_player, rng.uniform(0, 360)))
+
+
+def bot_inputs(rng: Random) -> simulation.Inputs:
+    """
+    Presses and releases random keys like a player mashing the keyboard would
+
+    Args:
+        rng (Random): The bot's random numbers
+
+    Returns:
+        simulation.Inputs: The keys for one tick
+    """
+    inputs = simulation.Inputs()
+    key = rng.choice(["a", "d", "left", "right", "space"])
+    if rng.random() < 0.6:
+        inputs.pressed.append(key)
+    else:
+        inputs.released.append(key)
+    return inputs
+
+
+def run_ticks(world: simulation.World, scenario: Scenario, ticks: int, handlers: list = None):
+    """
+    Steps a world with the bot playing it, keeping the player stocked up on ammo
+    and the world restocked to the scenario's load
+
+    Args:
+        world (simulation.World): The world to step
+        scenario (Scenario): The scenario being run
+        ticks (int): How many ticks to run
+        handlers (list): The rules to run each tick, or None for the normal ones
+    """
+    rng = Random(scenario.seed)
+    for tick in range(ticks):
+        world.player.ammo_count = simulation.MAX_AMMO
+        restock(world, scenario, rng)
+        simulation.step(world, bot_inputs(rng), handlers)
+
+
+def run_scenario(scenario: Scenario, ticks: int) -> dict:
+    """
+    Measures ticks per second, the cost of each handler and the peak memory of a scenario.
+    Each is measured in its own run so the timers and tracemalloc don't slow the others down
+
+    Args:
+        scenario (Scenario): The scenario to run
+        ticks (int): How many ticks to run
+
+    Returns:
+        dict: The results
+    """
+    world = create_scenario_world(scenario)
+    started = time.perf_counter()
+    run_ticks(world, scenario, ticks)
+    elapsed = time.perf_counter() - started
+
+    profiler = FrameProfiler(ticks)
+    handlers = [profiler.wrap(handler.__name__, handler) for handler in simulation.TICK_HANDLERS]
+    run_ticks(create_scenario_world(scenario), scenario, ticks, handlers)
+    handler_costs = {name: values["p50_ms"] for name, values in profiler.summary().items() if name != "tick"}
+    handler_totals = {name: math.fsum(buffer.recent()) * 1000 / ticks for name, buffer in profiler.timings.items()}
+
+    tracemalloc.start()
+    run_ticks(create_scenario_world(scenario), scenario, ticks)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "ticks_per_second": ticks / elapsed,
+        "handler_p50_ms": handler_costs,
+        "handler_mean_ms": handler_totals,
+        "peak_memory_kb": peak_memory / 1024,
+        "final_moles": len(world.moles),
+        "final_cannonballs": len(world.cannonballs),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Finds every result that got slower than the baseline by more than the tolerance
+
+    Args:
+        results (dict): The results of this run, by scenario name
+        baseline (dict): The stored results, by scenario name
+        tolerance (float): How much slower a result can be, like 0.2 for 20%
+
+    Returns:
+        list: A message for each slowdown
+    """
+    slowdowns = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]
+        if result["ticks_per_second"] < old["ticks_per_second"] * (1 - tolerance):
+            slowdowns.append(f"{name}: {result['ticks_per_second']:.0f} ticks/s, "
+                             f"baseline was {old['ticks_per_second']:.0f}")
+        for handler, cost in result["handler_mean_ms"].items():
+            old_cost = old["handler_mean_ms"].get(handler)
+            if old_cost and cost > old_cost * (1 + tolerance) and cost - old_cost > MIN_SLOWDOWN_MS:
+                slowdowns.append(f"{name}: {handler} takes {cost:.4f} ms per tick, baseline was {old_cost:.4f}")
+    return slowdowns
+
+
+def print_results(results: dict):
+    """
+    Prints a short table of the results
+
+    Args:
+        results (dict): The results, by scenario name
+    """
+    for name, result in results.items():
+        print(f"{name}: {result['ticks_per_second']:.0f} ticks/s, peak memory {result['peak_memory_kb']:.0f} KB, "
+              f"{result['final_moles']} moles and {result['final_cannonballs']} cannonballs at the end")
+        slowest = sorted(result["handler_mean_ms"].items(), key=lambda item: item[1], reverse=True)
+        for handler, cost in slowest:
+            print(f"    {handler}: {cost:.4f} ms per tick")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the headless Moleaga simulation")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS, help="ticks to run in each scenario")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="the file the baseline is stored in")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="how much slower than the baseline counts as a slowdown, like 0.2 for 20%%")
+    args = parser.parse_args()
+
+    results = {scenario.name: run_scenario(scenario, args.ticks) for scenario in SCENARIOS}
+    print_results(results)
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print("Saved the baseline to " + args.baseline)
+        return 0
+    if not os.path.exists(args.baseline):
+        print("There is no baseline to compare with yet, run with --save-baseline to store one")
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    slowdowns = compare(results, baseline, args.tolerance)
+    for slowdown in slowdowns:
+        print("SLOWER " + slowdown)
+    if slowdowns:
+        return 1
+    print("No slowdowns compared with the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,131 @@
+"""
+A scripted player for the headless simulation. It picks up ammo when it runs out,
+lines the cannon up with the closest mole that isn't a rabbit and shoots it, which
+is close enough to how a person plays to compare how hard different settings are.
+"""
+import math
+import simulation
+
+
+class Bot:
+    def __init__(self):
+        """
+        Creates a bot which remembers which moles it already has a cannonball on the way to
+        """
+        # When the cannonball shot at each mole should have arrived, by the id of the mole
+        self.shot_at = {}
+
+    def choose_target(self, world: simulation.World):
+        """
+        Finds the closest mole that isn't a rabbit and isn't about to be hit already
+
+        Args:
+            world (simulation.World): The world being played
+
+        Returns:
+            simulation.Mole: The mole to shoot at, or None if there isn't one
+        """
+        player = world.player
+        best = None
+        best_distance = None
+        for mole in world.moles:
+            if mole.is_rabbit or self.shot_at.get(mole.id, -1) >= world.tick:
+                continue
+            distance = abs(mole.x - player.x) + abs(mole.y - player.y)
+            if best is None or distance < best_distance:
+                best = mole
+                best_distance = distance
+        return best
+
+    def closest_ammo(self, world: simulation.World):
+        """
+        Finds the ammo pickup closest to the player
+
+        Args:
+            world (simulation.World): The world being played
+
+        Returns:
+            simulation.Ammo: The closest ammo, or None if there isn't any
+        """
+        player = world.player
+        best = None
+        for ammo in world.ammo:
+            if best is None or abs(ammo.x - player.x) < abs(best.x - player.x):
+                best = ammo
+        return best
+
+    def inputs(self, world: simulation.World) -> simulation.Inputs:
+        """
+        Decides which keys to press and release this tick
+
+        Args:
+            world (simulation.World): The world being played
+
+        Returns:
+            simulation.Inputs: The keys for this tick
+        """
+        player = world.player
+        inputs = simulation.Inputs()
+        target = self.choose_target(world)
+        if player.ammo_count == 0 or target is None:
+            ammo = self.closest_ammo(world)
+            inputs.released += ["left", "right"]
+            if ammo is None or player.ammo_count >= simulation.MAX_AMMO:
+                inputs.released += ["a", "d"]
+            else:
+                walk_towards(player, ammo.x, inputs)
+            return inputs
+
+        # The barrel is at the cannon's middle, which is where cannonballs start
+        start_y = player.y + simulation.CANNON_HEIGHT // 2
+        rise = target.y - start_y
+        run = target.x - player.x
+        wanted_angle = -math.degrees(math.atan2(rise, run)) - 90
+        wanted_angle = (wanted_angle + 180) % 360 - 180
+        # The cannon only turns in steps, so aim with the closest angle it can actually reach
+        step = simulation.ROTATION_SPEED
+        reachable_angle = round(wanted_angle / step) * step
+        reachable_angle = max(-simulation.MAX_CANNON_ANGLE, min(simulation.MAX_CANNON_ANGLE, reachable_angle))
+        distance = math.hypot(rise, run)
+        # How far off the shot can be and still clip the mole
+        leeway = math.degrees(math.atan2(simulation.MINI_MOLE_SIZE / 2 + simulation.CANNONBALL_RADIUS, distance))
+        if abs(reachable_angle - wanted_angle) > leeway:
+            # No angle lines up from here, so walk underneath the mole where straight up does
+            walk_towards(player, target.x, inputs)
+            reachable_angle = 0
+        else:
+            inputs.released += ["a", "d"]
+
+        if player.angle < reachable_angle:
+            inputs.pressed.append("left")
+            inputs.released.append("right")
+        elif player.angle > reachable_angle:
+            inputs.pressed.append("right")
+            inputs.released.append("left")
+        else:
+            inputs.released += ["left", "right"]
+            if abs(reachable_angle - wanted_angle) <= leeway:
+                inputs.pressed.append("space")
+                self.shot_at[target.id] = world.tick + math.ceil(distance / simulation.CANNONBALL_SPEED)
+                if len(self.shot_at) > 100:
+                    self.shot_at = {key: tick for key, tick in self.shot_at.items() if tick >= world.tick}
+        return inputs
+
+
+def walk_towards(player: simulation.Player, x: float, inputs: simulation.Inputs):
+    """
+    Adds the keys that move the player towards an x position, or stop them once they are there
+
+    Args:
+        player (simulation.Player): The player
+        x (float): Where to walk to
+        inputs (simulation.Inputs): The keys for this tick, which are added to
+    """
+    if x < player.x - simulation.PLAYER_SPEED:
+        inputs.pressed.append("a")
+        inputs.released.append("d")
+    elif x > player.x + simulation.PLAYER_SPEED:
+        inputs.pressed.append("d")
+        inputs.released.append("a")
+    else:
+        inputs.released += ["a", "d"]
@@ -0,0 +1,134 @@
+"""
+Everything the game does with Designer's private attributes, kept in one place.
+
+Designer has no public way to give a sprite an image that is already rotated, to reuse
+text it drew before, or to draw many sprites at once, so these helpers reach into
+DesignerObject and the current scene. They were written against TESTED_DESIGNER_VERSION,
+which requirements.txt pins. With any other version SUPPORTED is False, and the game
+uses Designer's public API instead, which is slower but still correct.
+"""
+import designer
+import pygame
+from designer import DesignerObject, get_director
+from designer.colors import _process_color
+from designer.core.internal_image import InternalImage
+from designer.utilities.vector import Vec2D
+
+TESTED_DESIGNER_VERSION = "0.6.6"
+SUPPORTED = getattr(designer, "__version__", None) == TESTED_DESIGNER_VERSION
+
+
+def image_surface(image: InternalImage) -> pygame.Surface:
+    """
+    Finds the pygame surface a Designer image is drawn from
+
+    Args:
+        image (InternalImage): The image, like a sprite's image or a preloaded asset
+
+    Returns:
+        pygame.Surface: The surface
+    """
+    return image._surf
+
+
+def set_rotated_image(sprite: DesignerObject, angle: float, rotated: pygame.Surface):
+    """
+    Gives a sprite an angle and an image that is already rotated to it, so Designer
+    does not rotate the original image again. Only works for sprites that are not
+    scaled or flipped
+
+    Args:
+        sprite (DesignerObject): The sprite to turn
+        angle (float): The new angle of the sprite, which it keeps exactly
+        rotated (pygame.Surface): The sprite's image rotated to about that angle
+    """
+    # Keeps the center of the rotated image where the center of the original was, like Designer does
+    old_center = Vec2D(image_surface(sprite.image).get_rect().center)
+    sprite._angle = angle
+    sprite._transform_offset = old_center - rotated.get_rect().center
+    sprite._transform_image = rotated
+    sprite._recalculate_offset()
+    sprite._expire_static()
+
+
+def render_text(label: DesignerObject, words: str) -> InternalImage:
+    """
+    Draws some words in a text object's font and color, without changing the text object
+
+    Args:
+        label (DesignerObject): The text object
+        words (str): The words to draw
+
+    Returns:
+        InternalImage: The drawn words
+    """
+    text_surface = label._font.render(words, True, _process_color(label.color))
+    drawn = InternalImage(size=text_surface.get_size())
+    drawn._surf.blit(text_surface, (0, 0))
+    return drawn
+
+
+def show_rendered_text(label: DesignerObject, words: str, drawn: InternalImage):
+    """
+    Does the same as setting a text object's text, but shows words that render_text already drew
+
+    Args:
+        label (DesignerObject): The text object
+        words (str): The words
+        drawn (InternalImage): The words drawn by render_text in the same font and color
+    """
+    label._text = words
+    label._update_size()
+    label._default_redraw_transforms(drawn)
+
+
+def drawn_image(sprite: DesignerObject) -> pygame.Surface:
+    """
+    Finds the image Designer draws for a sprite, after it is rotated and scaled
+
+    Args:
+        sprite (DesignerObject): The sprite
+
+    Returns:
+        pygame.Surface: The image
+    """
+    return sprite._transform_image
+
+
+def draw_offset(sprite: DesignerObject) -> tuple:
+    """
+    Finds how far the top left of a sprite's drawn image is up and left of its position
+
+    Args:
+        sprite (DesignerObject): The sprite
+
+    Returns:
+        tuple: The (x, y) offset
+    """
+    return sprite._offset.x, sprite._offset.y
+
+
+def draw_position(sprite: DesignerObject) -> tuple:
+    """
+    Finds where Designer draws the top left of a sprite's image
+
+    Args:
+        sprite (DesignerObject): The sprite
+
+    Returns:
+        tuple: The (left, top) of the image on the screen
+    """
+    position = sprite._pos
+    offset = sprite._offset
+    return position.x - offset.x, position.y - offset.y
+
+
+def areas_to_clear() -> list:
+    """
+    Finds the list of places on the screen Designer puts the background back on
+    before it draws the next frame. Anything added to it is cleared too
+
+    Returns:
+        list: The pygame.Rects to clear
+    """
+    return get_director().current_scene._clear_this_frame
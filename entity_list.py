@@ -0,0 +1,83 @@
+"""
+A list of game objects which can be safely removed from while it is being looped over.
+Removals are queued during a tick and only carried out when flush() is called.
+"""
+
+
+class EntityList:
+    def __init__(self, items: list = None):
+        """
+        Creates a new entity list
+
+        Args:
+            items (list): The objects to start with
+        """
+        self.items = []
+        # The index of each object in items, and the objects waiting to be removed,
+        # both keyed by id() so that unhashable dataclasses can be stored
+        self.rows = {}
+        self.pending = {}
+        for item in items or []:
+            self.append(item)
+
+    def __len__(self) -> int:
+        return len(self.items) - len(self.pending)
+
+    def __iter__(self):
+        # Loops by index so that objects appended during the loop are still visited,
+        # and skips anything that is waiting to be removed
+        index = 0
+        while index < len(self.items):
+            item = self.items[index]
+            if id(item) not in self.pending:
+                yield item
+            index += 1
+
+    def __contains__(self, item) -> bool:
+        return id(item) in self.rows and id(item) not in self.pending
+
+    def __repr__(self) -> str:
+        return "EntityList(" + repr(list(self)) + ")"
+
+    def append(self, item):
+        """
+        Adds an object to the end of the list. Adding back an object that is waiting to be
+        removed cancels the removal instead, so it stays where it was and is not listed twice
+
+        Args:
+            item: The object to add
+        """
+        if id(item) in self.pending:
+            del self.pending[id(item)]
+            return
+        self.rows[id(item)] = len(self.items)
+        self.items.append(item)
+
+    def remove(self, item) -> bool:
+        """
+        Queues an object to be removed at the next flush(). Removing
+        the same object twice in one tick does nothing the second time
+
+        Args:
+            item: The object to remove
+
+        Returns:
+            bool: Whether the object was in the list and is now queued for removal
+        """
+        if item not in self:
+            return False
+        self.pending[id(item)] = item
+        return True
+
+    def flush(self):
+        """
+        Carries out every queued removal. Each one swaps the last object into the
+        removed object's place, so the order of the list is not kept
+        """
+        for key in self.pending:
+            row = self.rows.pop(key)
+            last = self.items.pop()
+            if row < len(self.items):
+                self.items[row] = last
+                self.rows[id(last)] = row
+        self.pending.clear()
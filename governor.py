@@ -0,0 +1,106 @@
+"""
+Keeps the game playable when there is too much going on. It times every tick against
+a budget, and when the average tick over the last second takes too long it slows the
+game down a step: the systems that only change what the player sees, like aiming and
+the HUD, run half as often, and fewer enemy cannonballs may be in the air at once.
+Once ticks are fast again it speeds back up a step at a time.
+
+Only those systems and the number of enemy shots are ever changed, so scoring and
+passing levels work exactly the same however slow the game gets.
+"""
+import time
+from pipeline import Pipeline
+
+# Speeds back up once the average tick takes less than this share of the budget,
+# so the game does not keep slowing down and speeding up around the budget
+RECOVER_SHARE = 0.5
+
+
+class FrameGovernor:
+    def __init__(self, budget: float, pipeline: Pipeline, systems: list, max_enemy_cannonballs: int,
+                 max_level: int = 3, window: int = 30):
+        """
+        Creates a governor which is not slowing anything down yet
+
+        Args:
+            budget (float): How many seconds one tick should take at most
+            pipeline (Pipeline): The pipeline the systems are in
+            systems (list): The names of the systems that can run less often
+            max_enemy_cannonballs (int): How many enemy cannonballs can be in the air after the first step
+            max_level (int): How many steps the game can be slowed down by
+            window (int): How many ticks are averaged before deciding to change the level
+        """
+        self.budget = budget
+        self.pipeline = pipeline
+        # How often each system ran before the governor changed anything
+        self.normal_every = {name: pipeline.get(name).every for name in systems}
+        self.max_enemy_cannonballs = max_enemy_cannonballs
+        self.max_level = max_level
+        self.window = window
+        # How many steps the game is slowed down by, 0 when it is running normally
+        self.level = 0
+        self.started_at = None
+        self.total = 0.0
+        self.ticks = 0
+
+    def start_tick(self):
+        """
+        Starts timing a tick
+        """
+        self.started_at = time.perf_counter()
+
+    def end_tick(self) -> bool:
+        """
+        Finishes timing a tick, and changes the level at the end of every window if needed
+
+        Returns:
+            bool: Whether the level changed
+        """
+        self.total += time.perf_counter() - self.started_at
+        self.ticks += 1
+        if self.ticks < self.window:
+            return False
+        average = self.total / self.ticks
+        self.total = 0.0
+        self.ticks = 0
+        if average > self.budget and self.level < self.max_level:
+            self.set_level(self.level + 1)
+            return True
+        if average < self.budget * RECOVER_SHARE and self.level > 0:
+            self.set_level(self.level - 1)
+            return True
+        return False
+
+    def set_level(self, level: int):
+        """
+        Slows the game down by some number of steps, or speeds it back up
+
+        Args:
+            level (int): How many steps to slow the game down by, 0 to run it normally
+        """
+        self.level = level
+        for name, every in self.normal_every.items():
+            self.pipeline.run_every(name, every * 2 ** level)
+
+    @property
+    def enemy_cannonball_cap(self) -> int:
+        """
+        Returns:
+            int: How many enemy cannonballs can be in the air at once, or None for no limit
+        """
+        if self.level == 0:
+            return None
+        return max(1, self.max_enemy_cannonballs // 2 ** (self.level - 1))
+
+    def describe(self) -> str:
+        """
+        Describes how much the game is slowed down, for reporting it
+
+        Returns:
+            str: What the governor is doing
+        """
+        if self.level == 0:
+            return "Running normally again"
+        systems = ", ".join(f"{name} every {self.pipeline.get(name).every} ticks" for name in self.normal_every)
+        return (f"Slowed down {self.level} of {self.max_level} steps to keep ticks under "
+                f"{self.budget * 1000:.0f} ms: {systems}, at most {self.enemy_cannonball_cap} enemy cannonballs")
@@ -0,0 +1,82 @@
+"""
+An index of things lying on the ground, kept sorted by their x position. Everything on
+the ground is at the same height and the cannon only moves along x, so finding what the
+cannon is touching is a binary search for the range of x it covers instead of a scan.
+"""
+from bisect import bisect_left, bisect_right
+
+
+class GroundIndex:
+    def __init__(self):
+        """
+        Creates an empty index
+        """
+        self.xs = []
+        self.items = []
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, item, x: float):
+        """
+        Adds an item, keeping the index sorted
+
+        Args:
+            item: The item to add
+            x (float): Where the item is along the ground
+        """
+        index = bisect_right(self.xs, x)
+        self.xs.insert(index, x)
+        self.items.insert(index, item)
+
+    def remove(self, item, x: float) -> bool:
+        """
+        Removes an item
+
+        Args:
+            item: The item to remove
+            x (float): The x the item was added at
+
+        Returns:
+            bool: Whether the item was in the index
+        """
+        for index in range(bisect_left(self.xs, x), bisect_right(self.xs, x)):
+            if self.items[index] is item:
+                del self.xs[index]
+                del self.items[index]
+                return True
+        return False
+
+    def between(self, left: float, right: float) -> list:
+        """
+        Finds the items strictly between two x positions, from left to right
+
+        Args:
+            left (float): The left edge of the range
+            right (float): The right edge of the range
+
+        Returns:
+            list: The items in the range
+        """
+        return self.items[bisect_right(self.xs, left):bisect_left(self.xs, right)]
+
+    def take_between(self, left: float, right: float) -> list:
+        """
+        Removes and returns the items strictly between two x positions
+
+        Args:
+            left (float): The left edge of the range
+            right (float): The right edge of the range
+
+        Returns:
+            list: The items that were in the range, from left to right
+        """
+        start = bisect_right(self.xs, left)
+        end = bisect_left(self.xs, right)
+        taken = self.items[start:end]
+        del self.xs[start:end]
+        del self.items[start:end]
+        return taken
@@ -0,0 +1,67 @@
+"""
+Labels for the heads up display which only redraw their text when the value they
+show actually changes, and keep the most recently drawn labels so that switching
+back to one (like going from "Ammo: 1" to "Ammo: 0" and back) doesn't draw it again.
+Without a supported Designer version the text is set normally, and only the check for
+an unchanged value is kept.
+"""
+from collections import OrderedDict
+from designer import DesignerObject
+from designer.core.internal_image import InternalImage
+import designer_internals
+
+
+class HudLabel:
+    def __init__(self, label: DesignerObject, prefix: str, cache_size: int = 8):
+        """
+        Wraps a Designer text object that shows a value after a prefix, like "Lives: 3"
+
+        Args:
+            label (DesignerObject): The text object to update
+            prefix (str): The text shown before the value
+            cache_size (int): How many drawn labels to keep
+        """
+        self.label = label
+        self.prefix = prefix
+        self.cache_size = cache_size
+        self.value = None
+        self.drawn = OrderedDict()
+
+    def draw(self, words: str) -> InternalImage:
+        """
+        Draws the text in the label's font and color, or reuses it if it was drawn recently
+
+        Args:
+            words (str): The text to draw
+
+        Returns:
+            InternalImage: The drawn text
+        """
+        if words in self.drawn:
+            self.drawn.move_to_end(words)
+            return self.drawn[words]
+        drawn = designer_internals.render_text(self.label, words)
+        self.drawn[words] = drawn
+        if len(self.drawn) > self.cache_size:
+            self.drawn.popitem(last=False)
+        return drawn
+
+    def show(self, value) -> bool:
+        """
+        Shows a new value, doing nothing if it is the same as the value already shown
+
+        Args:
+            value: The value to show after the prefix
+
+        Returns:
+            bool: Whether the label had to change
+        """
+        if value == self.value:
+            return False
+        self.value = value
+        words = self.prefix + str(value)
+        if designer_internals.SUPPORTED:
+            designer_internals.show_rendered_text(self.label, words, self.draw(words))
+        else:
+            self.label.text = words
+        return True
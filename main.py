@@ -1,60 +1,93 @@
-import math
+import time
+# When the game started loading, before the slow imports below, for the startup report
+STARTED_AT = time.perf_counter()
+import atexit
 from dataclasses import dataclass
 from designer import *
-from random import randint
+from designer.core.event import register
+import pygame
+import replay
+import score_store
+import simulation
+import snapshot
+from pipeline import Pipeline
+from profiler import FrameProfiler
+from governor import FrameGovernor
+from timestep import FixedTimestep
+import sprites
+import designer_internals
+from hud import HudLabel
+from sprite_batch import SpriteBatch, SpriteSheet, draw_batches, sprite_blit
+from simulation import HEIGHT_OF_GROUND, MAX_AMMO, FROM_PLAYER
+IMPORTED_AT = time.perf_counter()
 
 
 # Constants which represent the ground height and position
-HEIGHT_OF_GROUND = 100
 TOP_OF_GROUND_Y = get_height() - HEIGHT_OF_GROUND
-# Represents the highest number of degrees the cannon can rotate before stopping
-MAX_CANNON_ANGLE = 85
-# How fast cannonballs move
-CANNONBALL_SPEED = 5
-# The max amount of ammo the player can hold
-MAX_AMMO = 10
-
-
-@dataclass
-class Player:
-    cannon: DesignerObject
-    wheel: DesignerObject
-    left: bool
-    right: bool
-    rotating_left: bool
-    rotating_right: bool
-    points: int
-    moles_hit_in_current_level: int
-    ammo_count: int
-
-
-@dataclass
-class Mole:
-    mole_img: DesignerObject
-    is_mini: bool
-    is_rabbit: bool
-
-
-@dataclass
-class Cannonball:
-    ball: DesignerObject
-    angle: int
-    is_from_player: bool
-
-
-@dataclass
+# Draws each kind of entity with one big blit instead of a Designer sprite each. This is
+# only faster with lots of entities, so it is off by default
+BATCH_SPRITES = False
+# The batches need Designer's private attributes, so they are only used with the tested version
+DRAW_IN_BATCHES = BATCH_SPRITES and designer_internals.SUPPORTED
+# Times every handler each frame, shows the slowest on screen and saves the timings when the game ends
+PROFILE_FRAMES = False
+PROFILE_JSON_FILE = "./profile.json"
+PROFILE_CSV_FILE = "./profile.csv"
+# The seed for every random number in the game, or None to pick a new one each game
+RANDOM_SEED = None
+# Records every key pressed and released into this file when the game closes, if it is set
+RECORD_FILE = None
+# Plays a recorded game back instead of reading the keyboard, if it is set
+REPLAY_FILE = None
+# How many times a second the game rules run. Every speed and chance in the game is per tick
+TICK_RATE = 30
+# How many times a second the screen is drawn, which doesn't change how the game plays
+RENDER_FPS = 30
+# The most ticks to run in one frame when catching up after a slow frame
+MAX_CATCH_UP_TICKS = 5
+# How many seconds back backspace rewinds the game to.
+# Rewinding and retrying a level with r are off while recording or replaying a game
+REWIND_SECONDS = 3
+# How many ticks apart the snapshots kept for rewinding are taken
+SNAPSHOT_EVERY = 5
+# Prints how long the game took to import, build the world and draw the first frame
+REPORT_STARTUP = False
+# Prints whenever the governor slows the game down or speeds it back up
+REPORT_GOVERNOR = False
+# Saves the score and what happened on each level of every game into this SQLite file, like
+# "./scores.db", and shows the high score when the game is over. Off when it is None
+SCORES_FILE = None
+# How many milliseconds a tick of the game rules should take at most before the game is
+# slowed down to keep up, or None to never slow it down. It is off while recording or replaying
+GOVERN_TICK_MS = 10
+# How many enemy cannonballs can be in the air at once when the game is first slowed down
+MAX_ENEMY_CANNONBALLS = 40
+
+
+@dataclass(slots=True)
 class World:
+    # The game itself, which simulation.step moves on by a tick. Everything else is for drawing it
+    game: simulation.World
     ground: DesignerObject
-    player: Player
-    moles: list[Mole]
-    lives_count: int
+    cannon: DesignerObject
+    wheel: DesignerObject
     lives_text: DesignerObject
-    ammo: list[DesignerObject]
-    cannonballs: list[Cannonball]
     ammo_count_text: DesignerObject
-    level: int
     level_text: DesignerObject
     score_text: DesignerObject
+    profiler_text: DesignerObject
+    hud: dict
+    # All the text on the screen, which is kept on top of the batches if DRAW_IN_BATCHES is on
+    texts: list
+    recorder: replay.InputRecorder
+    # The (entity, sprite) of every mole, ammo and cannonball in the game, by the entity's id
+    mole_sprites: dict
+    ammo_sprites: dict
+    cannonball_sprites: dict
+    # Where the player was before the last tick, for drawing them between ticks
+    previous_player_x: float
+    # Both colours of cannonball on one surface, for drawing them in a batch if DRAW_IN_BATCHES is on
+    cannonball_sheet: SpriteSheet
 
 
 def create_world() -> World:
@@ -64,163 +97,183 @@ def create_world() -> World:
     Returns:
         World: A new designer world instance
     """
+    started_at = time.perf_counter()
+    # The images load in the background while everything that doesn't need them is made
+    sprites.start_preloading()
     ground = Rectangle('green', get_width(), HEIGHT_OF_GROUND, 0,
                        TOP_OF_GROUND_Y, anchor='topleft')
-    player = create_player()
     lives = create_lives()
     cannon_balls = count_ammo()
     levels = count_level()
     scores = create_score()
-    return World(ground, player, [], 3, lives, [], [], cannon_balls, 1, levels, scores )
-
-
-def create_player() -> Player:
-    """
-    Creates a new player object which consists of a cannon and a wheel
-    and sets it on top of the ground.
+    profiler_text = None
+    if PROFILE_FRAMES:
+        profiler_text = create_profiler_text()
+    hud = create_hud(lives, cannon_balls, levels, scores)
+    texts = [lives, cannon_balls, levels, scores]
+    if profiler_text is not None:
+        texts.append(profiler_text)
+    waited_at = time.perf_counter()
+    sprites.preload_assets()
+    STARTUP_TIMES["waiting for images"] = time.perf_counter() - waited_at
+    cannon, wheel = create_player()
+    cannonball_sheet = None
+    if DRAW_IN_BATCHES:
+        cannonball_sheet = create_cannonball_sheet()
+    seed = RANDOM_SEED
+    if REPLAY_FILE is not None:
+        seed = REPLAY_SEED
+    elif seed is None:
+        seed = simulation.new_seed()
+    recorder = None
+    if RECORD_FILE is not None:
+        recorder = replay.InputRecorder(seed)
+        # Saved when the game closes, so closing the window before the game is over keeps the recording
+        atexit.register(recorder.save, RECORD_FILE)
+    game = simulation.create_world(seed)
+    world = World(game, ground, cannon, wheel, lives, cannon_balls, levels, scores, profiler_text, hud, texts,
+                  recorder, {}, {}, {}, game.player.x, cannonball_sheet)
+    STARTUP_TIMES["building the world"] = time.perf_counter() - started_at
+    return world
+
+
+def create_cannonball_sheet() -> SpriteSheet:
+    """
+    Hides the pooled sprites so they are only drawn in batches, and puts both colours
+    of cannonball onto one sheet to draw them from
 
     Returns:
-        Player: A player object representing the user
+        SpriteSheet: The player's cannonball first, then the moles'
     """
-    cannon = image("./cannon.png", anchor="midtop")
-    wheel = image("./wheel.png", anchor="midbottom")
-    wheel.y = TOP_OF_GROUND_Y
-    cannon.y = wheel.y - cannon.height
-    return Player(cannon, wheel, False, False, False, False, 0, 0, 0)
+    sprites.hide_pooled_sprites()
+    pool_names = [sprites.cannonball_pool_name(True), sprites.cannonball_pool_name(False)]
+    balls = [sprites.take_sprite(pool_name) for pool_name in pool_names]
+    cannonball_sheet = SpriteSheet(balls)
+    for pool_name, ball in zip(pool_names, balls):
+        sprites.give_back_sprite(pool_name, ball)
+    return cannonball_sheet
 
 
-def get_half_cannon_width(world: World) -> int:
+def create_hud(lives: DesignerObject, cannon_balls: DesignerObject, levels: DesignerObject,
+               scores: DesignerObject) -> dict:
     """
-    Returns half the width of the cannon to set its screen bounds
+    Wraps the text at the top of the screen so each one is only redrawn when its value changes
 
     Args:
-        world (World): The world instance
+        lives (DesignerObject): The lives text
+        cannon_balls (DesignerObject): The ammo count text
+        levels (DesignerObject): The level text
+        scores (DesignerObject): The score text
 
     Returns:
-        int: Half the width of the cannon for boundary purposes
+        dict: The HUD labels by name
     """
-    return world.player.cannon.width // 2
+    return {
+        "lives": HudLabel(lives, "Lives: ", 4),
+        "ammo": HudLabel(cannon_balls, "Ammo: ", MAX_AMMO + 1),
+        "level": HudLabel(levels, "Level: ", 4),
+        "score": HudLabel(scores, "Score: ", 16),
+    }
 
 
-def move_player(player: Player, pixels: int):
+def create_player() -> tuple:
     """
-    Moves the player the specified number of pixels
+    Creates the player's cannon and wheel and sets them on top of the ground.
 
-    Args:
-        player (Player): The player object
-        pixels (int): The number of pixels to move the player
-    """
-    player.cannon.x += pixels
-    player.wheel.x += pixels
-
-
-def update_player_position(world: World):
-    """
-    If the player is moving, move the player position and
-    rotate the player wheel towards the corresponding direction
-
-    Args:
-        world (World): The world instance
+    Returns:
+        tuple: The (cannon, wheel) sprites that show the player
     """
-    player = world.player
-    if player.left:
-        move_player(player, -5)
-        turn_left(player.wheel, 5)
-    elif world.player.right:
-        move_player(player, 5)
-        turn_right(player.wheel, 5)
+    cannon = sprites.image_from_asset("cannon", anchor="midtop")
+    wheel = sprites.image_from_asset("wheel", anchor="midbottom")
+    wheel.y = TOP_OF_GROUND_Y
+    cannon.y = wheel.y - cannon.height
+    sprites.build_rotation_atlases(cannon, wheel)
+    return cannon, wheel
 
 
-def on_key_press_move_player(world: World, key: str):
+def pool_name(entity) -> str:
     """
-    Moves the player left when holding a, moves them right when holding d
-    Stops the player from moving left or right when reaching the end of the screen
+    Finds the sprite pool that the sprite of a mole, ammo or cannonball comes from
 
     Args:
-        world (World): The world instance
-        key (str): The key the user presses
-    """
-    if key == "a" and world.player.cannon.x > get_half_cannon_width(world):
-        world.player.left = True
-    elif key == "d" and world.player.cannon.x < get_width() - get_half_cannon_width(world):
-        world.player.right = True
-
+        entity: A simulation.Mole, simulation.Ammo or simulation.Cannonball
 
-def on_key_release_stop_player(world: World, key: str):
-    """
-    Stops moving the player left when letting go of a,
-    and the same when letting go of d
-
-    Args:
-        world (World): The world instance
-        key (str): The key the user presses
+    Returns:
+        str: The name of the pool
     """
-    if key == "a":
-        world.player.left = False
-    elif key == "d":
-        world.player.right = False
+    if isinstance(entity, simulation.Mole):
+        return sprites.mole_pool_name(entity.is_mini, entity.is_rabbit)
+    if isinstance(entity, simulation.Cannonball):
+        return sprites.cannonball_pool_name(entity.is_from_player)
+    return "ammo"
 
 
-def create_mole(world: World, is_mini: bool, is_rabbit: bool) -> DesignerObject:
+def update_entity_sprites(shown: dict, entities, moves: bool) -> list:
     """
-    Makes the moles that the player is trying to shoot appear randomly
-    Changes the size or image if the mole is a rabbit or mini
+    Gives every new entity a sprite from its pool, gives back the sprites of the entities
+    that are gone, and puts the sprites where their entities are
 
     Args:
-        world (World): The world instance
-        is_mini (bool): Whether the mole is mini or not
-        is_rabbit (bool): Whether the mole is a good rabbit or not
+        shown (dict): The (entity, sprite) of each entity with a sprite, by the entity's id
+        entities (EntityList): The moles, ammo or cannonballs of the game
+        moves (bool): Whether the entities move, so every sprite has to be put in place and not just the new ones
 
     Returns:
-        DesignerObject: A picture (emoji) of a mole that is the players target
-    """
-    if is_rabbit:
-        new_mole = image("./rabbit.png")
-    else:
-        new_mole = image("./mouse.png")
-    new_mole.x = randint(1, get_width())
-    new_mole.y = randint(1, TOP_OF_GROUND_Y - world.player.cannon.height)
-    if is_mini:
-        new_mole.scale_x = 0.5
-        new_mole.scale_y = 0.5
-    return new_mole
-
-
-def make_moles(world: World):
-    """
-    This determines when a new mole should appear on screen, so they aren't constantly appearing
-    More moles spawn as the level count increases
-    Sets a 10% chance for the mole to be mini or a rabbit
+        list: The (entity, sprite) of the entities that just got a sprite
+    """
+    alive = set()
+    added = []
+    for entity in entities:
+        alive.add(entity.id)
+        entry = shown.get(entity.id)
+        if entry is None:
+            entry = shown[entity.id] = (entity, sprites.take_sprite(pool_name(entity)))
+            added.append(entry)
+        elif not moves:
+            continue
+        sprite = entry[1]
+        sprite.x = entity.x
+        sprite.y = entity.y
+    # Every entity left in the game has a sprite, so any extra sprites belong to entities that are gone
+    if len(shown) > len(alive):
+        for entity_id in [entity_id for entity_id in shown if entity_id not in alive]:
+            entity, sprite = shown.pop(entity_id)
+            sprites.give_back_sprite(pool_name(entity), sprite)
+    return added
+
+
+def update_sprites(world: World):
+    """
+    Puts the sprites where the game rules left the player, moles, ammo and cannonballs.
+    This runs once per frame, so catching up several ticks only moves the sprites once
 
     Args:
         world (World): The world instance
     """
-    not_too_many_moles = len(world.moles) <= world.level
-    random_spawn_chance = randint(1, 100) == 2
-    if not_too_many_moles and random_spawn_chance:
-        # Adds a 10% chance for the mole to be small, or 10% for it to be a rabbit
-        random_type_chance = randint(0, 10)
-        is_mini = False
-        is_rabbit = False
-        if random_type_chance == 1:
-            is_mini = True
-        elif random_type_chance == 2:
-            is_rabbit = True
-        mole_img = create_mole(world, is_mini, is_rabbit)
-        new_mole = Mole(mole_img, is_mini, is_rabbit)
-        world.moles.append(new_mole)
+    player = world.game.player
+    world.cannon.x = player.x
+    world.cannon.y = player.y
+    world.wheel.x = player.x
+    sprites.rotate_sprite(world.cannon, "cannon", player.angle)
+    sprites.rotate_sprite(world.wheel, "wheel", player.wheel_angle)
+    for mole, mole_img in update_entity_sprites(world.mole_sprites, world.game.moles, False):
+        # The sprite may come from the pool still turned the way its last mole was
+        sprites.rotate_sprite(mole_img, pool_name(mole), mole.angle)
+    update_entity_sprites(world.ammo_sprites, world.game.ammo, False)
+    update_entity_sprites(world.cannonball_sprites, world.game.cannonballs, True)
 
 
-def destroy_good_moles(world: World):
+def give_back_sprites(world: World):
     """
-    Deletes all the good or rabbit moles
+    Gives back the sprites of every mole, ammo and cannonball, like when the game is replaced by a snapshot
 
     Args:
         world (World): The world instance
     """
-    for mole in world.moles:
-        if mole.is_rabbit:
-            delete_mole(world, mole)
+    for shown in [world.mole_sprites, world.ammo_sprites, world.cannonball_sprites]:
+        for entity, sprite in shown.values():
+            sprites.give_back_sprite(pool_name(entity), sprite)
+        shown.clear()
 
 
 def create_lives() -> DesignerObject:
@@ -236,437 +289,490 @@ def create_lives() -> DesignerObject:
     return lives
 
 
-def set_player_screen_bounds(world: World):
+def update_lives(world: World):
     """
-    Stops the player from going beyond the bounds of the screen
+    Sets the lives text equal to the user's number of lives, only redrawing it when it changes
 
     Args:
         world (World): The world instance
     """
-    if world.player.cannon.x > get_width() - get_half_cannon_width(world):
-        world.player.right = False
-    elif world.player.cannon.x < get_half_cannon_width(world):
-        world.player.left = False
+    world.hud["lives"].show(world.game.lives_count)
 
 
-def update_lives(world: World):
+def count_ammo() -> DesignerObject:
     """
-    Constantly sets the lives text equal to the user's number of lives
+    Creates the ammo count text at the top of the screen with an initial state of 0 ammo
 
-    Args:
-        world (World): The world instance
+    Returns:
+        DesignerObject: Text which displays how much ammo the user has
     """
-    world.lives_text.text = "Lives: " + str(world.lives_count)
+    cannon_balls = text("black", "Ammo: ", 30, anchor="topright")
+    cannon_balls.x = 750  # Some margin so that the text doesn't hug the corner
+    cannon_balls.y = 5
+    return cannon_balls
 
 
-def create_ammo() -> DesignerObject:
+def update_ammo_text(world: World):
     """
-    Makes the ammo that the player is shooting appear randomly on the ground
+    Sets the ammo text equal to the user's amount of ammo, only redrawing it when it changes
 
-    Returns:
-        DesignerObject: A picture (emoji) of ammo that the player picks up
+    Args:
+        world (World): The world instance
     """
-    new_ammo = image("./ammo.png", anchor="midbottom")
-    new_ammo.scale_x = .1
-    new_ammo.scale_y = .1
-    new_ammo.x = randint(1, get_width())
-    new_ammo.y = TOP_OF_GROUND_Y
-    return new_ammo
+    world.hud["ammo"].show(world.game.player.ammo_count)
 
 
-def make_ammo(world: World):
+def step_game(world: World):
     """
-    This determines when more ammo should appear on screen, so they aren't constantly appearing
-    Allows more ammo to spawn on the ground as the level count increases
+    Runs the game rules for one tick. When the game is slowed down, moles
+    stop firing once there are too many enemy cannonballs
 
     Args:
         world (World): The world instance
     """
-    not_too_much_ammo = len(world.ammo) <= world.level
-    random_chance = randint(1, 100) == 2
-    if not_too_much_ammo and random_chance:
-        world.ammo.append(create_ammo())
+    if GOVERNOR is not None:
+        world.game.max_enemy_cannonballs = GOVERNOR.enemy_cannonball_cap
+    simulation.step(world.game, handlers=RULES)
 
 
-def on_key_press_rotate_player(world: World, key: str):
+def mole_faces_player(world: World):
     """
-    Rotate the cannon in the respective direction when pressing the left or right arrow keys
+    This function points the moles in the direction of the player
+    so it can shoot them with its own cannonballs
 
     Args:
         world (World): The world instance
-        key (str): The key the player pressed
     """
-    player = world.player
-    if key == "left" and player.cannon.angle < MAX_CANNON_ANGLE:
-        player.rotating_left = True
-    elif key == "right" and player.cannon.angle > -MAX_CANNON_ANGLE:
-        player.rotating_right = True
+    for mole, mole_img in world.mole_sprites.values():
+        sprites.rotate_sprite(mole_img, pool_name(mole), mole.angle)
 
 
-def on_key_release_stop_rotate(world: World, key: str):
+def count_level() -> DesignerObject:
     """
-    Stops rotating the cannon when the user lets go of the respective left or right arrow keys
+    States which level the user's on  at the top of the screen
 
-    Args:
-        world (World): The world instance
-        key (str): The key the player pressed
+    Returns:
+        DesignerObject: Text which displays which level the user's on
     """
-    if key == "left":
-        world.player.rotating_left = False
-    elif key == "right":
-        world.player.rotating_right = False
+    levels = text("black", "Level: ", 30, anchor="midtop")
+    levels.x = 300  # Some margin so that the text doesn't hug the corner
+    levels.y = 5
+    return levels
 
 
-def update_player_rotation(world: World):
+def update_level(world: World):
     """
-    While the player is holding the left or right arrow keys, rotate the cannon in the respective direction
-    If the cannon is rotated too far right or left, stop it so that it doesn't face the ground
+    Sets the level text equal to the user's level, only redrawing it when it changes
 
     Args:
         world (World): The world instance
     """
-    player = world.player
-    cannon = player.cannon
-    if player.rotating_left:
-        if cannon.angle >= MAX_CANNON_ANGLE:  # Stop cannon from turning towards the ground
-            player.rotating_left = False
-        turn_left(cannon, 5)
-    elif player.rotating_right:
-        if cannon.angle <= -MAX_CANNON_ANGLE:
-            player.rotating_right = False
-        turn_right(cannon, 5)
+    world.hud["level"].show(world.game.level)
 
 
-def count_ammo() -> DesignerObject:
+def show_game_over_screen(world: World):
     """
-    Creates the ammo count text at the top of the screen with an initial state of 0 ammo
+    Displays the game over screen with the current level count if they lose all of their lives
 
-    Returns:
-        DesignerObject: Text which displays how much ammo the user has
+    Args:
+        world (World): The world instance
     """
-    cannon_balls = text("black", "Ammo: ", 30, anchor="topright")
-    cannon_balls.x = 750  # Some margin so that the text doesn't hug the corner
-    cannon_balls.y = 5
-    return cannon_balls
+    update_lives(world)
+    points = world.game.player.points
+    world.texts.append(text("red", "Game over! Your score is " + str(points) + ".", 40))
+    if SCORE_STORE is not None:
+        # This game may not be written yet, so it is counted too
+        best = SCORE_STORE.best_score("game")
+        if best is None or points > best:
+            best = points
+        high_score = text("black", "High score: " + str(best), 30)
+        high_score.y += 40
+        world.texts.append(high_score)
 
 
-def update_ammo(world: World):
+def end_game_if_over(world: World):
     """
-    Constantly sets the ammo text equal to the user's amount of ammo
-    If a user runs into ammo and has not reached the ammo limit, increase their ammo by one
+    Shows the game over screen and pauses the game once the player has no lives left
 
     Args:
         world (World): The world instance
     """
-    player = world.player
-    for ball in world.ammo:
-        if colliding(ball, player.cannon) and player.ammo_count < MAX_AMMO:
-            player.ammo_count += 1
-    world.ammo_count_text.text = "Ammo: " + str(player.ammo_count)
+    game = world.game
+    if simulation.game_over(game):
+        if SCORE_STORE is not None:
+            SCORE_STORE.record(score_store.game_record(game, "game", game.tick))
+        show_game_over_screen(world)
+        if PROFILER is not None:
+            PROFILER.dump_json(PROFILE_JSON_FILE)
+            PROFILER.dump_csv(PROFILE_CSV_FILE)
+        pause()
 
 
-def update_cannonball_position(world: World):
+def create_score() -> DesignerObject:
     """
-    Constantly updates the cannonball position to move in the direction
-    that the player cannon initially shot in
-    https://stackoverflow.com/a/46697552
+    States what the user's score is at the top of the screen
 
-    Args:
-        world (World): The world instance to get the cannonballs from
+    Returns:
+        DesignerObject: Text which displays the users score
     """
-    for cannonball in world.cannonballs:
-        corrected_angle = -cannonball.angle - 90
-        new_x = cannonball.ball.x + (CANNONBALL_SPEED * math.cos(math.radians(corrected_angle)))
-        new_y = cannonball.ball.y + (CANNONBALL_SPEED * math.sin(math.radians(corrected_angle)))
-        cannonball.ball.x = new_x
-        cannonball.ball.y = new_y
+    scores = text("black", "Score: ", 30, anchor="midtop")
+    scores.x = 500  # Some margin so that the text doesn't hug the corner
+    scores.y = 5
+    return scores
 
 
-def create_cannonball(x: int, y: int, is_from_player: bool, angle: int) -> Cannonball:
+def update_score(world: World):
     """
-    Spawns a cannonball at the player cannon's location and sets its initial position and angle
+    Sets the score text equal to the user's score, only redrawing it when it changes
 
     Args:
-        x (int): The x initial position of the cannonball
-        y (int): The y initial position of the cannonball
-        is_from_player (bool): If the player shot the cannonball
-        angle (int): The angle to move the cannonball
+        world (World): The world instance
     """
-    if is_from_player:
-        color = "black"
-    else:
-        color = "red"
-    ball = circle(color, 10, x, y)
-    new_cannonball = Cannonball(ball, angle, is_from_player)
-    return new_cannonball
+    world.hud["score"].show(world.game.player.points)
 
 
-def shoot_cannonball(world: World, key: str):
+def create_profiler_text() -> DesignerObject:
     """
-    Spawns a cannonball when the player presses space
-    Checks if they have ammo to shoot and removes one ammo if they do
+    Creates the profiler overlay text under the level and score at the top of the screen
 
-    Args:
-        world (World): The world instance to get the player
-        key (str): The key pressed by the user
+    Returns:
+        DesignerObject: Text which displays the slowest handlers
     """
-    player = world.player
-    if key == "space" and player.ammo_count >= 1:
-        cannon = player.cannon
-        # Spawns the cannonball in the center of the cannon
-        cannonball = create_cannonball(cannon.x, cannon.y + (cannon.height // 2), True, cannon.angle)
-        world.cannonballs.append(cannonball)
-        world.player.ammo_count -= 1
+    profiler_text = text("gray", "p95 ms:", 16, anchor="topleft")
+    profiler_text.x = 5
+    profiler_text.y = 40
+    return profiler_text
 
 
-def delete_cannonball(world: World, cannonball: Cannonball):
+def update_profiler_text(world: World):
     """
-    Removes a cannonball from the world
+    Sets the profiler overlay text to the slowest handlers
 
     Args:
         world (World): The world instance
-        cannonball (Cannonball): The cannonball to remove
     """
-    world.cannonballs.remove(cannonball)
-    destroy(cannonball.ball)
+    world.profiler_text.text = PROFILER.overlay_text()
 
 
-def delete_mole(world: World, mole: Mole):
+def record_key_press(world: World, key: str):
     """
-    Removes a mole from the world
+    Adds a pressed key to the recording
 
     Args:
         world (World): The world instance
-        mole (Mole): The mole to remove
+        key (str): The key the user pressed
     """
-    world.moles.remove(mole)
-    destroy(mole.mole_img)
+    if world.recorder is not None:
+        world.recorder.record(world.game.tick, replay.PRESSED, key)
 
 
-def destroy_cannonballs_outside_window(world: World):
+def record_key_release(world: World, key: str):
     """
-    Removes cannonballs which don't hit anything and go off the screen
+    Adds a released key to the recording
 
     Args:
-        world (World): The world instance to get the cannonballs
+        world (World): The world instance
+        key (str): The key the user let go of
     """
-    for cannonball in world.cannonballs:
-        x = cannonball.ball.x
-        y = cannonball.ball.y
-        if x < 0 or x > get_width() or y < 0 or y > get_height():
-            delete_cannonball(world, cannonball)
+    if world.recorder is not None:
+        world.recorder.record(world.game.tick, replay.RELEASED, key)
 
 
-def check_if_level_passed(world: World):
+def press_key(world: World, key: str):
     """
-    Checks if the player hit enough moles to move to the next level
-    If they passed the level, remove the good moles and increase the level by one
+    Moves the player while A or D is held, rotates the cannon while the
+    left or right arrow key is held, and shoots a cannonball on space
 
     Args:
-         world (World): The world instance
+        world (World): The world instance
+        key (str): The key that was pressed
     """
-    if world.player.moles_hit_in_current_level >= world.level:
-        world.player.moles_hit_in_current_level = 0
-        world.level += 1
-        destroy_good_moles(world)
+    simulation.handle_key_press(world.game, key)
 
 
-def cannonball_collides_with_mole(world: World):
+def release_key(world: World, key: str):
     """
-    Removes both the mole and the cannonball if they collide together
-    Increases the number of moles hit by one
-    Adds or removes respective points to player depending on what type of mole they hit
+    Stops moving or rotating the player when the key is let go of
 
     Args:
-        world (World): The world instance to get the cannonballs and the moles
-    """
-    for cannonball in world.cannonballs:
-        for mole in world.moles:
-            if colliding(cannonball.ball, mole.mole_img) and cannonball.is_from_player:
-                delete_cannonball(world, cannonball)
-                delete_mole(world, mole)
-                world.player.moles_hit_in_current_level += 1
-                check_if_level_passed(world)
-                if mole.is_mini:
-                    world.player.points += 3
-                elif mole.is_rabbit:
-                    world.player.points -= 3
-                else:
-                    world.player.points += 1
+        world (World): The world instance
+        key (str): The key that was let go of
+    """
+    simulation.handle_key_release(world.game, key)
 
 
-def mole_faces_player(world: World):
+def replay_inputs(world: World):
     """
-    This function points the moles in the direction of the player
-    so it can shoot them with its own cannonballs
+    Presses and releases the keys that were recorded for this tick
 
     Args:
         world (World): The world instance
     """
-    for mole in world.moles:
-        mole_img = mole.mole_img
-        cannon = world.player.cannon
-        rise = cannon.y - mole_img.y
-        run = cannon.x - mole_img.x
-        point_in_direction(mole_img, math.degrees(math.atan2(-rise, run)) % 360)
+    for kind, key in REPLAY_INPUTS.get(world.game.tick, []):
+        if kind == replay.PRESSED:
+            press_key(world, key)
+        else:
+            release_key(world, key)
 
 
-def mole_shoots_player(world: World):
+def restore_game(world: World, data: bytes):
     """
-    This function shoot has the mole shoot a cannonball that does damage to the player
+    Puts the game back to a snapshot, reusing the sprites already on the screen
 
     Args:
         world (World): The world instance
+        data (bytes): The packed snapshot
     """
-    for mole in world.moles:
-        if not mole.is_rabbit:
-            random_fire_chance = randint(1, 500) <= world.level
-            if random_fire_chance:
-                mole_img = mole.mole_img
-                cannonball = create_cannonball(mole_img.x, mole_img.y, False, mole_img.angle - 90)
-                world.cannonballs.append(cannonball)
+    level_stats = world.game.level_stats
+    game = world.game = snapshot.restore_snapshot(data)
+    # Levels rewound out of are played again, but what happened on the rewound ticks still counts
+    game.level_stats = {level: stats for level, stats in level_stats.items() if level <= game.level}
+    world.previous_player_x = game.player.x
+    # Ids are handed out again after a rewind, so no sprite can be kept for its id
+    give_back_sprites(world)
 
 
-def delete_ammo(world: World, ammo: DesignerObject):
+def save_snapshot(world: World):
     """
-    Removes ammo from the world
+    Snapshots the game every SNAPSHOT_EVERY ticks for rewinding
 
     Args:
         world (World): The world instance
-        ammo (DesignerObject): the ammo being picked up and removed
     """
-    world.ammo.remove(ammo)
-    destroy(ammo)
+    HISTORY.add(snapshot.take_snapshot(world.game))
 
 
-def delete_ammo_on_pickup(world: World):
+def save_level_start(world: World):
     """
-    Removes the ammo if it collides with the player.
+    Snapshots the game on the first tick of each level for retrying it
 
     Args:
-        world (World): The world instance to get the cannonballs and the moles
+        world (World): The world instance
     """
-    player = world.player
-    for ammo in world.ammo:
-        if colliding(ammo, player.cannon):
-            delete_ammo(world, ammo)
+    if world.game.level not in LEVEL_STARTS:
+        LEVEL_STARTS[world.game.level] = snapshot.take_snapshot(world.game)
 
 
-def count_level() -> DesignerObject:
+def rewind_or_retry(world: World, key: str):
     """
-    States which level the user's on  at the top of the screen
+    Rewinds the game REWIND_SECONDS when the player presses backspace,
+    and starts the level again when they press r
 
-    Returns:
-        DesignerObject: Text which displays which level the user's on
+    Args:
+        world (World): The world instance
+        key (str): The key the user pressed
     """
-    levels = text("black", "Level: ", 30, anchor="midtop")
-    levels.x = 300  # Some margin so that the text doesn't hug the corner
-    levels.y = 5
-    return levels
+    if key == "backspace":
+        data = HISTORY.rewind(len(HISTORY))
+    elif key == "r":
+        data = LEVEL_STARTS.get(world.game.level)
+        HISTORY.clear()
+    else:
+        return
+    if data is not None:
+        restore_game(world, data)
 
 
-def update_level(world: World):
+def create_pipeline() -> Pipeline:
     """
-    Constantly sets the level text equal to the user's level
+    Puts every updating handler into named systems, in the order they run each frame
+
+    Returns:
+        Pipeline: The systems that make up one frame of the game
+    """
+    pipeline = Pipeline()
+    pipeline.add("rules", step_game)
+    pipeline.add("aim", mole_faces_player)
+    pipeline.add("hud", update_lives, update_ammo_text, update_level, update_score)
+    pipeline.add("game over", end_game_if_over)
+    return pipeline
+
+
+PIPELINE = create_pipeline()
+# The game rules step_game runs, which are swapped for timed copies when profiling
+RULES = simulation.TICK_HANDLERS
+if REPLAY_FILE is not None:
+    REPLAY_SEED, replay_events = replay.load_recording(REPLAY_FILE)
+    REPLAY_INPUTS = replay.events_by_tick(replay_events)
+    PIPELINE.add("replay", replay_inputs)
+    PIPELINE.move("replay", 0)
+# Rewinding would change a game that is being recorded or replayed
+CAN_REWIND = REWIND_SECONDS > 0 and RECORD_FILE is None and REPLAY_FILE is None
+HISTORY = snapshot.SnapshotHistory(max(1, REWIND_SECONDS * TICK_RATE // SNAPSHOT_EVERY))
+# The snapshot from the start of each level the player has reached
+LEVEL_STARTS = {}
+if CAN_REWIND:
+    PIPELINE.add("snapshot", save_snapshot, every=SNAPSHOT_EVERY)
+    PIPELINE.move("snapshot", 0)
+    PIPELINE.add("level start", save_level_start)
+    PIPELINE.move("level start", 0)
+# Profiled last, so that every system added above is timed too
+PROFILER = None
+if PROFILE_FRAMES:
+    PROFILER = FrameProfiler()
+    # Each rule is timed on its own rather than the whole step
+    RULES = [PROFILER.wrap(rule.__name__, rule) for rule in RULES]
+    PROFILER.instrument(PIPELINE, skip=["rules"])
+    # The overlay is text, so it is only redrawn twice a second
+    PIPELINE.add("profiler overlay", update_profiler_text, every=15)
+    PIPELINE.move("profiler overlay", PIPELINE.systems.index(PIPELINE.get("game over")))
+GOVERNOR = None
+if GOVERN_TICK_MS is not None and RECORD_FILE is None and REPLAY_FILE is None:
+    # Only systems that change what the player sees are slowed down, never the scoring
+    GOVERNOR = FrameGovernor(GOVERN_TICK_MS / 1000, PIPELINE, ["aim", "hud"], MAX_ENEMY_CANNONBALLS)
+SCORE_STORE = None
+# A replayed game was already saved when it was recorded
+if SCORES_FILE is not None and REPLAY_FILE is None:
+    SCORE_STORE = score_store.ScoreStore(SCORES_FILE)
+    # Writes the games that are still queued before the game closes
+    atexit.register(SCORE_STORE.close)
+
+
+TIMESTEP = FixedTimestep(TICK_RATE, MAX_CATCH_UP_TICKS)
+# How long each part of starting the game took, in seconds
+STARTUP_TIMES = {}
+# The moles, ammo and cannonballs, drawn in this order if DRAW_IN_BATCHES is on
+SPRITE_BATCHES = {"moles": SpriteBatch(), "ammo": SpriteBatch(), "cannonballs": SpriteBatch()}
+# The text to draw over the batches this frame
+BATCH_OVERLAYS = []
+# The true positions of the sprites that were moved for drawing, put back once the frame is drawn
+DRAWN_POSITIONS = []
+
+
+def run_pipeline(world: World):
+    """
+    Runs the pipeline once for every tick that is due this frame, so the game runs
+    at TICK_RATE however often Designer updates
 
     Args:
         world (World): The world instance
     """
-    world.level_text.text = "Level: " + str(world.level)
+    for tick in range(TIMESTEP.advance(time.perf_counter())):
+        if simulation.game_over(world.game):
+            return
+        world.previous_player_x = world.game.player.x
+        if GOVERNOR is not None:
+            GOVERNOR.start_tick()
+        if PROFILER is None:
+            PIPELINE.run(world)
+        else:
+            PROFILER.start_tick()
+            PIPELINE.run(world)
+            PROFILER.end_tick(len(world.game.moles), len(world.game.cannonballs), len(world.game.ammo))
+        if GOVERNOR is not None and GOVERNOR.end_tick() and REPORT_GOVERNOR:
+            print(GOVERNOR.describe())
 
 
-def game_over(world: World) -> bool:
+def move_sprite_for_drawing(sprite: DesignerObject, x: float, y: float):
     """
-    Returns if the game is over if the player has no lives left
+    Draws a sprite somewhere else for this frame only
 
     Args:
-        world (World): The world instance
-
-    Returns:
-        bool: Whether the player has lives left
+        sprite (DesignerObject): The sprite to move
+        x (float): Where to draw it on the x axis
+        y (float): Where to draw it on the y axis
     """
-    return world.lives_count == 0
+    DRAWN_POSITIONS.append((sprite, sprite.x, sprite.y))
+    sprite.x = x
+    sprite.y = y
 
 
-def lose_lives(world: World):
+def interpolate_sprites(world: World):
     """
-    Decreases the number of lives that the player
-    has when they are hit by a cannonball from the moles
+    Draws the player and the cannonballs part way between where they were on the last two
+    ticks, so they move smoothly when the screen is drawn more often than the game ticks
 
     Args:
-        world (World): the world instance
+        world (World): The world instance
     """
-    for cannonball in world.cannonballs:
-        if not cannonball.is_from_player:
-            if colliding(cannonball.ball, world.player.cannon):
-                world.lives_count -= 1
-                delete_cannonball(world, cannonball)
+    behind = 1 - TIMESTEP.alpha
+    if behind <= 0:
+        return
+    shift = (world.game.player.x - world.previous_player_x) * behind
+    if shift:
+        move_sprite_for_drawing(world.cannon, world.cannon.x - shift, world.cannon.y)
+        move_sprite_for_drawing(world.wheel, world.wheel.x - shift, world.wheel.y)
+    for cannonball, ball in world.cannonball_sprites.values():
+        move_sprite_for_drawing(ball, ball.x - cannonball.dx * behind, ball.y - cannonball.dy * behind)
 
 
-def show_game_over_screen(world: World):
+def update_sprite_batches(world: World):
     """
-    Displays the game over screen with the current level count if they lose all of their lives
+    Gives the batches where the moles, ammo and cannonballs are this frame, wherever
+    interpolate_sprites left them, and has Designer clear anything that moved. The text
+    is drawn again over the batches, so it is looked up here too
 
     Args:
         world (World): The world instance
     """
-    update_lives(world)
-    text("red", "Game over! Your score is " + str(world.player.points) + ".", 40)
+    clear = designer_internals.areas_to_clear()
+    SPRITE_BATCHES["moles"].update([sprite_blit(mole_img) for mole, mole_img in world.mole_sprites.values()], clear)
+    SPRITE_BATCHES["ammo"].update([sprite_blit(ammo_img) for ammo, ammo_img in world.ammo_sprites.values()], clear)
+    sheet = world.cannonball_sheet
+    SPRITE_BATCHES["cannonballs"].update([sheet.blit(0 if cannonball.flags & FROM_PLAYER else 1, ball.x, ball.y)
+                                          for cannonball, ball in world.cannonball_sprites.values()], clear)
+    BATCH_OVERLAYS[:] = [sprite_blit(label) for label in world.texts]
 
 
-def create_score() -> DesignerObject:
+def draw_sprite_batches():
     """
-    States what the user's score is at the top of the screen
-
-    Returns:
-        DesignerObject: Text which displays the users score
+    Draws every batch on top of what Designer drew, keeping the text on top of them,
+    and shows them on the screen
     """
-    scores = text("black", "Score: ", 30, anchor="midtop")
-    scores.x = 500  # Some margin so that the text doesn't hug the corner
-    scores.y = 5
-    return scores
+    pygame.display.update(draw_batches(pygame.display.get_surface(), list(SPRITE_BATCHES.values()), BATCH_OVERLAYS))
 
 
-def update_score(world: World):
+def restore_sprites():
+    """
+    Puts every sprite moved by interpolate_sprites back where the game rules left it
     """
-    Constantly sets the score text equal to the user's score
+    for sprite, x, y in DRAWN_POSITIONS:
+        sprite.x = x
+        sprite.y = y
+    DRAWN_POSITIONS.clear()
 
-    Args:
-        world (World): The world instance
+
+def report_startup():
+    """
+    Prints how long the game took to start once the first frame has been drawn
     """
-    world.score_text.text = "Score: " + str(world.player.points)
+    if "first frame" in STARTUP_TIMES:
+        return
+    STARTUP_TIMES["importing"] = IMPORTED_AT - STARTED_AT
+    STARTUP_TIMES["first frame"] = time.perf_counter() - STARTED_AT
+    print(f"First frame after {STARTUP_TIMES['first frame'] * 1000:.0f} ms: "
+          f"{STARTUP_TIMES['importing'] * 1000:.0f} ms importing, "
+          f"{STARTUP_TIMES['building the world'] * 1000:.0f} ms building the world "
+          f"({STARTUP_TIMES['waiting for images'] * 1000:.1f} ms of it waiting for images)")
 
 
 # Creates the world
 when('starting', create_world)
-# Handles mole spawning
-when('updating', make_moles)
-when('updating', make_ammo)
-# Updates player position on holding A or D
-when('typing', on_key_press_move_player)
-when('done typing', on_key_release_stop_player)
-when('updating', update_player_position)
-when('updating', set_player_screen_bounds)
-# Updates the number of player lives
-when('updating', update_lives)
-# Allows player to rotate on arrow key hold
-when('typing', on_key_press_rotate_player)
-when('done typing', on_key_release_stop_rotate)
-when('updating', update_player_rotation)
-# Handle ammo and cannonball collisions and shooting
-when('typing', shoot_cannonball)
-when('updating', update_cannonball_position)
-when('updating', destroy_cannonballs_outside_window)
-when('updating', cannonball_collides_with_mole)
-when("updating", update_ammo)
-when("updating", delete_ammo_on_pickup)
-# Updates level, lives, and points when hitting a shot or getting shot at
-when("updating", update_level)
-when("updating", mole_faces_player)
-when("updating", mole_shoots_player)
-when("updating", lose_lives)
-when("updating", update_score)
-# Handles ending and showing the game over screen
-when(game_over, show_game_over_screen, pause)
+if REPLAY_FILE is None:
+    # Moves and rotates the player on holding A, D or the arrow keys, and shoots a cannonball on space
+    when('typing', press_key)
+    when('done typing', release_key)
+    # Records the keys so the game can be replayed
+    when('typing', record_key_press)
+    when('done typing', record_key_release)
+if CAN_REWIND:
+    # Rewinds on backspace and retries the level on r
+    when('typing', rewind_or_retry)
+# Runs every system in the pipeline each tick, which also handles the game over screen
+when('updating', run_pipeline)
+# Moves the sprites to where the game is before each frame is drawn
+when('drawing', update_sprites)
+if RENDER_FPS > TICK_RATE:
+    # Designer updates once per frame, and the timestep decides how many ticks that is
+    get_director().current_scene.clock.max_ups = RENDER_FPS
+    get_director().current_scene.clock.max_fps = RENDER_FPS
+    when('drawing', interpolate_sprites)
+    register('director.post_render', restore_sprites)
+if DRAW_IN_BATCHES:
+    # Runs after interpolate_sprites and before Designer draws, then draws the batches once it has
+    when('drawing', update_sprite_batches)
+    register('director.post_render', draw_sprite_batches)
+if REPORT_STARTUP:
+    register('director.post_render', report_startup)
 # Starts the game
 start()
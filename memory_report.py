@@ -0,0 +1,159 @@
+"""
+Reports how much memory the headless game's entities take, using tracemalloc.
+
+First each kind of record is measured on its own, including the numbers stored in it.
+Then one of benchmark.py's stress worlds is played at the given level, to show how much
+each kind of entity takes up there, how many new records are made every tick (counted
+as they are added, so ones removed on the same tick still count) and whether the traced
+memory keeps growing over a long session.
+
+Usage:
+    python memory_report.py --level 50 --ticks 2000
+"""
+import argparse
+import sys
+import tracemalloc
+from random import Random
+import simulation
+from benchmark import Scenario, create_scenario_world, restock, bot_inputs
+
+
+DEFAULT_LEVEL = 50
+DEFAULT_TICKS = 2000
+DEFAULT_CANNONBALLS = 200
+# How many records of each kind to make when measuring their size
+SAMPLE_SIZE = 10000
+# How to make a typical record of each kind from a number, and where the world keeps them
+RECORD_MAKERS = {
+    "Mole": lambda index: simulation.Mole(index + 0.5, index + 0.25, 0, simulation.MINI),
+    "Cannonball": lambda index: simulation.create_cannonball(index + 0.5, index + 0.25, True, index % 360),
+    "Ammo": lambda index: simulation.Ammo(index + 1000, simulation.TOP_OF_GROUND_Y),
+}
+WORLD_LISTS = {"Mole": "moles", "Cannonball": "cannonballs", "Ammo": "ammo"}
+# The function in simulation.py that adds each kind of record to the world
+ADD_FUNCTIONS = {"Mole": "add_mole", "Cannonball": "add_cannonball", "Ammo": "add_ammo"}
+
+
+def measure_record(make, count: int = SAMPLE_SIZE) -> float:
+    """
+    Measures how many bytes one record takes, counting the numbers it holds
+    but not the list it is kept in
+
+    Args:
+        make: Makes a new record from a number
+        count (int): How many records to make
+
+    Returns:
+        float: The bytes per record
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [make(index) for index in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - before - sys.getsizeof(records)
+    tracemalloc.stop()
+    return used / count
+
+
+def count_created(name: str, add, created: dict):
+    """
+    Wraps one of simulation.py's add functions so that it counts the ids it hands out
+
+    Args:
+        name (str): The kind of record it adds
+        add: The add function to wrap, which takes the world and the record
+        created (dict): The count of each kind of record made, which is added to
+
+    Returns:
+        The wrapped function
+    """
+    def counted_add(world: simulation.World, entity):
+        first_id = world.next_id
+        add(world, entity)
+        created[name] += world.next_id - first_id
+
+    return counted_add
+
+
+def measure_session(scenario: Scenario, ticks: int) -> dict:
+    """
+    Plays a stress world under tracemalloc, counting the records made each tick
+
+    Args:
+        scenario (Scenario): The world to play
+        ticks (int): How many ticks to play
+
+    Returns:
+        dict: The live entities at the end, the records made and the traced memory
+    """
+    tracemalloc.start()
+    world = create_scenario_world(scenario)
+    start_memory = tracemalloc.get_traced_memory()[0]
+    created = {name: 0 for name in WORLD_LISTS}
+    rng = Random(scenario.seed)
+    # Records that are removed on the tick they were made never show up in the world's lists,
+    # so the add functions count them instead, and are put back once the session is over
+    adds = {function: getattr(simulation, function) for function in ADD_FUNCTIONS.values()}
+    for name, function in ADD_FUNCTIONS.items():
+        setattr(simulation, function, count_created(name, adds[function], created))
+    try:
+        for tick in range(ticks):
+            world.player.ammo_count = simulation.MAX_AMMO
+            restock(world, scenario, rng)
+            simulation.step(world, bot_inputs(rng))
+    finally:
+        for function, add in adds.items():
+            setattr(simulation, function, add)
+    end_memory, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "live": {name: len(getattr(world, list_name)) for name, list_name in WORLD_LISTS.items()},
+        "created": created,
+        "ids_handed_out": world.next_id - 1,
+        "start_memory": start_memory,
+        "end_memory": end_memory,
+        "peak_memory": peak_memory,
+    }
+
+
+def print_report(record_sizes: dict, session: dict, scenario: Scenario, ticks: int):
+    """
+    Prints the sizes of the records and what they added up to in the session
+
+    Args:
+        record_sizes (dict): The bytes per record of each kind
+        session (dict): The results from measure_session
+        scenario (Scenario): The world that was played
+        ticks (int): How many ticks were played
+    """
+    print("Bytes per record, including the numbers it holds:")
+    for name, size in record_sizes.items():
+        print(f"    {name}: {size:.0f}")
+    print(f"{scenario.name} after {ticks} ticks:")
+    for name, size in record_sizes.items():
+        live = session["live"][name]
+        made = session["created"][name] / ticks
+        print(f"    {name}: {live} live taking {live * size / 1024:.1f} KB, "
+              f"{made:.2f} made per tick churning {made * size:.0f} bytes per tick")
+    print(f"    {session['ids_handed_out']} ids handed out in total")
+    print(f"    traced memory {session['start_memory'] / 1024:.0f} KB at the start, "
+          f"{session['end_memory'] / 1024:.0f} KB at the end, peak {session['peak_memory'] / 1024:.0f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reports the memory taken by Moleaga's entities")
+    parser.add_argument("--level", type=int, default=DEFAULT_LEVEL, help="the level to play at")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS, help="ticks to play")
+    parser.add_argument("--cannonballs", type=int, default=DEFAULT_CANNONBALLS,
+                        help="cannonballs to keep on the screen")
+    parser.add_argument("--seed", type=int, default=1, help="the seed for the world")
+    args = parser.parse_args()
+
+    record_sizes = {name: measure_record(make) for name, make in RECORD_MAKERS.items()}
+    scenario = Scenario(f"level {args.level}", args.level, args.cannonballs, args.seed)
+    session = measure_session(scenario, args.ticks)
+    print_report(record_sizes, session, scenario, args.ticks)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
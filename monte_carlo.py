@@ -0,0 +1,290 @@
+"""
+Plays thousands of headless games with the scripted bot for every combination of
+balancing settings, spread across a process pool, and reports how far the bot got
+with each one. This replaces tuning the constants by playing the game by hand.
+
+Every setting plays the same seeds, so differences between settings come from the
+settings and not from some of them getting luckier games.
+
+Usage:
+    python monte_carlo.py --games 1000 --speed 4 5 6 --max-ammo 5 10
+    python monte_carlo.py --games 1000 --scores scores.db
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import simulation
+from bot import Bot
+from score_store import ScoreStore, game_record
+
+
+REPORT_FILE = "./monte_carlo_report.json"
+DEFAULT_GAMES = 1000
+# How many games a worker plays before sending its results back
+DEFAULT_CHUNK_SIZE = 50
+# Games that go on longer than this are stopped, in case the bot gets stuck
+DEFAULT_MAX_TICKS = 20000
+# The constants in simulation.py that can be swept, and the command line option for each
+PARAMETERS = {
+    "CANNONBALL_SPEED": "speed",
+    "MAX_AMMO": "max_ammo",
+    "MAX_CANNON_ANGLE": "max_angle",
+    "MOLE_SPAWN_ODDS": "mole_spawn_odds",
+    "AMMO_SPAWN_ODDS": "ammo_spawn_odds",
+    "MOLE_FIRE_ODDS": "mole_fire_odds",
+}
+
+
+class Summary:
+    def __init__(self, settings: dict):
+        """
+        Running totals for all the games played with one setting, which can be added
+        to a game at a time and merged with the totals from other workers
+
+        Args:
+            settings (dict): The value of each constant, by name
+        """
+        self.settings = settings
+        self.games = 0
+        self.ticks = 0
+        self.level_total = 0
+        self.level_squares = 0
+        self.highest_level = 0
+        self.points_total = 0
+        self.points_squares = 0
+        # By level: how many games got to it, and how many lives were lost on it
+        self.games_reaching = {}
+        self.lives_lost = {}
+
+    def add(self, result: dict):
+        """
+        Adds the result of one game
+
+        Args:
+            result (dict): The result from play_game
+        """
+        self.games += 1
+        self.ticks += result["ticks"]
+        self.level_total += result["level"]
+        self.level_squares += result["level"] ** 2
+        self.highest_level = max(self.highest_level, result["level"])
+        self.points_total += result["points"]
+        self.points_squares += result["points"] ** 2
+        for level in range(1, result["level"] + 1):
+            self.games_reaching[level] = self.games_reaching.get(level, 0) + 1
+        for level, lost in result["lives_lost"].items():
+            self.lives_lost[level] = self.lives_lost.get(level, 0) + lost
+
+    def merge(self, other: "Summary"):
+        """
+        Adds the totals of another summary for the same setting into this one
+
+        Args:
+            other (Summary): The summary to merge in
+        """
+        self.games += other.games
+        self.ticks += other.ticks
+        self.level_total += other.level_total
+        self.level_squares += other.level_squares
+        self.highest_level = max(self.highest_level, other.highest_level)
+        self.points_total += other.points_total
+        self.points_squares += other.points_squares
+        for level, count in other.games_reaching.items():
+            self.games_reaching[level] = self.games_reaching.get(level, 0) + count
+        for level, lost in other.lives_lost.items():
+            self.lives_lost[level] = self.lives_lost.get(level, 0) + lost
+
+    def report(self) -> dict:
+        """
+        Works out the averages for the report
+
+        Returns:
+            dict: The settings and how the bot did with them
+        """
+        games = max(self.games, 1)
+        mean_level = self.level_total / games
+        mean_points = self.points_total / games
+        return {
+            "settings": self.settings,
+            "games": self.games,
+            "mean_ticks": self.ticks / games,
+            "mean_level": mean_level,
+            "level_stdev": math.sqrt(max(0.0, self.level_squares / games - mean_level ** 2)),
+            "highest_level": self.highest_level,
+            "mean_points": mean_points,
+            "points_stdev": math.sqrt(max(0.0, self.points_squares / games - mean_points ** 2)),
+            # The average number of lives lost on each level, out of the games that got there
+            "lives_lost_per_level": {level: self.lives_lost.get(level, 0) / count
+                                     for level, count in sorted(self.games_reaching.items())},
+        }
+
+
+def parameter_grid(values: dict) -> list:
+    """
+    Makes every combination of the values to try
+
+    Args:
+        values (dict): The list of values to try for each constant, by name
+
+    Returns:
+        list: A dict of the value of each constant for every combination
+    """
+    names = list(values)
+    return [dict(zip(names, combination)) for combination in itertools.product(*values.values())]
+
+
+def apply_parameters(settings: dict):
+    """
+    Changes the constants in simulation.py for every game played after this in the process
+
+    Args:
+        settings (dict): The value of each constant, by name
+    """
+    for name, value in settings.items():
+        setattr(simulation, name, value)
+
+
+def play_game(seed: int, max_ticks: int) -> dict:
+    """
+    Plays one headless game with the bot until it runs out of lives
+
+    Args:
+        seed (int): The seed for the world's random numbers
+        max_ticks (int): The most ticks to play before giving up on the game
+
+    Returns:
+        dict: The level reached, the points, how many ticks it lasted, the lives lost on each level
+            and the GameRecord for the score store
+    """
+    world = simulation.create_world(seed)
+    bot = Bot()
+    lives_lost = {}
+    while not simulation.game_over(world) and world.tick < max_ticks:
+        lives = world.lives_count
+        level = world.level
+        simulation.step(world, bot.inputs(world))
+        if world.lives_count < lives:
+            lives_lost[level] = lives_lost.get(level, 0) + lives - world.lives_count
+    return {"level": world.level, "points": world.player.points, "ticks": world.tick, "lives_lost": lives_lost,
+            "game": game_record(world, "monte carlo", world.tick)}
+
+
+def run_chunk(index: int, settings: dict, seeds: range, max_ticks: int, keep_games: bool = False) -> tuple:
+    """
+    Plays a chunk of games with one setting. This is what runs in the worker processes
+
+    Args:
+        index (int): Which setting in the grid this is
+        settings (dict): The value of each constant, by name
+        seeds (range): The seed of each game to play
+        max_ticks (int): The most ticks to play in each game
+        keep_games (bool): Whether to send back the GameRecord of every game, for the score store
+
+    Returns:
+        tuple: The index, the Summary of the games and the GameRecords that were kept
+    """
+    apply_parameters(settings)
+    summary = Summary(settings)
+    games = []
+    for seed in seeds:
+        result = play_game(seed, max_ticks)
+        summary.add(result)
+        if keep_games:
+            games.append(result["game"])
+    return index, summary, games
+
+
+def run_sweep(grid: list, games: int, chunk_size: int, max_ticks: int, workers: int = None,
+              first_seed: int = 0, store: ScoreStore = None) -> list:
+    """
+    Plays every setting in the grid across a process pool, merging each chunk of results
+    into its setting's summary as soon as it arrives
+
+    Args:
+        grid (list): The settings to try, from parameter_grid
+        games (int): How many games to play with each setting
+        chunk_size (int): How many games each worker plays at a time
+        max_ticks (int): The most ticks to play in each game
+        workers (int): How many processes to use, or None for one per core
+        first_seed (int): The seed of the first game, with the rest counting up from it
+        store (ScoreStore): Where to save every game as it comes back, or None to not save them
+
+    Returns:
+        list: The Summary of each setting, in the same order as the grid
+    """
+    summaries = [Summary(settings) for settings in grid]
+    total = games * len(grid)
+    done = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for index, settings in enumerate(grid):
+            for start in range(first_seed, first_seed + games, chunk_size):
+                seeds = range(start, min(start + chunk_size, first_seed + games))
+                futures.append(executor.submit(run_chunk, index, settings, seeds, max_ticks, store is not None))
+        for future in as_completed(futures):
+            index, summary, played = future.result()
+            summaries[index].merge(summary)
+            for game in played:
+                store.record(game)
+            done += summary.games
+            elapsed = time.perf_counter() - started
+            print(f"\r{done}/{total} games, {done / elapsed:.0f} games/s", end="", flush=True)
+    print()
+    return summaries
+
+
+def print_report(reports: list):
+    """
+    Prints how the bot did with each setting, best first
+
+    Args:
+        reports (list): The report of each setting
+    """
+    for report in sorted(reports, key=lambda item: item["mean_level"], reverse=True):
+        settings = ", ".join(f"{name}={value}" for name, value in report["settings"].items())
+        print(settings)
+        print(f"    level {report['mean_level']:.2f} +/- {report['level_stdev']:.2f} (best {report['highest_level']}), "
+              f"points {report['mean_points']:.1f} +/- {report['points_stdev']:.1f}, "
+              f"{report['mean_ticks']:.0f} ticks over {report['games']} games")
+        lives = ", ".join(f"{level}: {lost:.2f}" for level, lost in report["lives_lost_per_level"].items())
+        print("    lives lost per level " + lives)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweeps Moleaga's balancing constants with a bot player")
+    for name, option in PARAMETERS.items():
+        parser.add_argument("--" + option.replace("_", "-"), type=int, nargs="+", default=[getattr(simulation, name)],
+                            help=f"values of {name} to try")
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES, help="games to play with each setting")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="games per chunk of work")
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS, help="ticks before a game is stopped")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use, one per core by default")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the first game")
+    parser.add_argument("--output", default=REPORT_FILE, help="the file to write the report to")
+    parser.add_argument("--scores", default=None, help="a SQLite file to save every game into")
+    args = parser.parse_args()
+
+    grid = parameter_grid({name: getattr(args, option) for name, option in PARAMETERS.items()})
+    print(f"Playing {args.games} games with each of {len(grid)} settings on {args.workers or os.cpu_count()} processes")
+    store = None
+    if args.scores is not None:
+        store = ScoreStore(args.scores)
+    summaries = run_sweep(grid, args.games, args.chunk_size, args.max_ticks, args.workers, args.seed, store)
+    if store is not None:
+        store.close()
+        print(f"Saved every game to {args.scores}")
+    reports = [summary.report() for summary in summaries]
+    print_report(reports)
+    with open(args.output, "w") as file:
+        json.dump(reports, file, indent=2)
+    print("Saved the report to " + args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
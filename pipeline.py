@@ -0,0 +1,123 @@
+"""
+An ordered list of named systems that make up one tick of the game.
+
+Each system is a group of handlers which take the world, just like the functions
+given to Designer's when('updating', ...). Systems can be turned on or off, moved
+around, or set to run only every few ticks.
+"""
+
+
+class System:
+    def __init__(self, name: str, handlers: list, every: int = 1):
+        """
+        Creates a system
+
+        Args:
+            name (str): The name used to find the system in the pipeline
+            handlers (list): The functions to call with the world, in order
+            every (int): Only run once every this many ticks
+        """
+        self.name = name
+        self.handlers = handlers
+        self.every = every
+        self.enabled = True
+
+    def __repr__(self) -> str:
+        return f"System({self.name!r}, every={self.every}, enabled={self.enabled})"
+
+
+class Pipeline:
+    def __init__(self):
+        """
+        Creates an empty pipeline
+        """
+        self.systems = []
+        self.tick = 0
+
+    def add(self, name: str, *handlers, every: int = 1) -> System:
+        """
+        Adds a system to the end of the pipeline
+
+        Args:
+            name (str): The name of the system
+            *handlers: The functions to call with the world, in order
+            every (int): Only run once every this many ticks
+
+        Returns:
+            System: The new system
+        """
+        if any(system.name == name for system in self.systems):
+            raise ValueError(f"There is already a system called {name!r}")
+        system = System(name, list(handlers), every)
+        self.systems.append(system)
+        return system
+
+    def get(self, name: str) -> System:
+        """
+        Finds a system by its name
+
+        Args:
+            name (str): The name of the system
+
+        Returns:
+            System: The system with that name
+        """
+        for system in self.systems:
+            if system.name == name:
+                return system
+        raise KeyError(f"There is no system called {name!r}")
+
+    def enable(self, name: str):
+        """
+        Turns a system back on
+
+        Args:
+            name (str): The name of the system
+        """
+        self.get(name).enabled = True
+
+    def disable(self, name: str):
+        """
+        Turns a system off so it is skipped every tick
+
+        Args:
+            name (str): The name of the system
+        """
+        self.get(name).enabled = False
+
+    def run_every(self, name: str, every: int):
+        """
+        Makes a system only run once every few ticks
+
+        Args:
+            name (str): The name of the system
+            every (int): Only run once every this many ticks
+        """
+        if every < 1:
+            raise ValueError("A system has to run at least once every 1 tick")
+        self.get(name).every = every
+
+    def move(self, name: str, index: int):
+        """
+        Moves a system to a new position in the pipeline
+
+        Args:
+            name (str): The name of the system
+            index (int): Where the system should be run, starting at 0
+        """
+        system = self.get(name)
+        self.systems.remove(system)
+        self.systems.insert(index, system)
+
+    def run(self, world):
+        """
+        Runs every enabled system that is due this tick, in order
+
+        Args:
+            world: The world instance given to every handler
+        """
+        for system in self.systems:
+            if system.enabled and self.tick % system.every == 0:
+                for handler in system.handlers:
+                    handler(world)
+        self.tick += 1
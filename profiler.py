@@ -0,0 +1,206 @@
+"""
+An opt-in frame profiler. It wraps the handlers in a pipeline and records how long
+each one takes every tick, along with how many moles, cannonballs and ammo there were,
+into fixed size ring buffers so that recording stays cheap however long the game runs.
+"""
+import csv
+import json
+import time
+from array import array
+
+
+class RingBuffer:
+    def __init__(self, size: int):
+        """
+        Creates a ring buffer which keeps only the most recent values
+
+        Args:
+            size (int): How many values to keep
+        """
+        self.values = array("d", [0.0]) * size
+        self.next_index = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, value: float):
+        """
+        Adds a value, replacing the oldest one once the buffer is full
+
+        Args:
+            value (float): The value to add
+        """
+        self.values[self.next_index] = value
+        self.next_index = (self.next_index + 1) % len(self.values)
+        if self.count < len(self.values):
+            self.count += 1
+
+    def recent(self) -> list:
+        """
+        Returns the values that are kept, from oldest to newest
+
+        Returns:
+            list: The values
+        """
+        if self.count < len(self.values):
+            return self.values[:self.count].tolist()
+        return (self.values[self.next_index:] + self.values[:self.next_index]).tolist()
+
+
+def percentile(values: list, percent: float) -> float:
+    """
+    Finds the value that the given percent of values are less than or equal to
+
+    Args:
+        values (list): The values to look through
+        percent (float): A percent from 0 to 100
+
+    Returns:
+        float: The percentile, or 0 if there are no values
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class FrameProfiler:
+    def __init__(self, size: int = 600):
+        """
+        Creates a profiler which remembers the last few hundred ticks
+
+        Args:
+            size (int): How many ticks to remember
+        """
+        self.size = size
+        self.timings = {}
+        self.calls = {}
+        self.tick_times = RingBuffer(size)
+        self.entity_counts = {"moles": RingBuffer(size), "cannonballs": RingBuffer(size), "ammo": RingBuffer(size)}
+        self.tick_started = None
+
+    def wrap(self, name: str, handler):
+        """
+        Wraps a handler so that every call to it is timed
+
+        Args:
+            name (str): The name to record the timings under
+            handler: The function to wrap, which takes the world
+
+        Returns:
+            The wrapped function
+        """
+        if name not in self.timings:
+            self.timings[name] = RingBuffer(self.size)
+            self.calls[name] = 0
+        timings = self.timings[name]
+
+        def timed_handler(world):
+            started = time.perf_counter()
+            handler(world)
+            timings.add(time.perf_counter() - started)
+            self.calls[name] += 1
+
+        timed_handler.__name__ = handler.__name__
+        return timed_handler
+
+    def instrument(self, pipeline, skip: list = None):
+        """
+        Wraps every handler in every system of a pipeline
+
+        Args:
+            pipeline (Pipeline): The pipeline to profile
+            skip (list): The names of systems to leave alone, like ones that time their own handlers
+        """
+        for system in pipeline.systems:
+            if skip is not None and system.name in skip:
+                continue
+            system.handlers = [self.wrap(handler.__name__, handler) for handler in system.handlers]
+
+    def start_tick(self):
+        """
+        Marks the start of a tick, so the whole tick can be timed too
+        """
+        self.tick_started = time.perf_counter()
+
+    def end_tick(self, moles: int, cannonballs: int, ammo: int):
+        """
+        Marks the end of a tick and records how many entities there were
+
+        Args:
+            moles (int): The number of moles
+            cannonballs (int): The number of cannonballs
+            ammo (int): The number of ammo pickups
+        """
+        if self.tick_started is not None:
+            self.tick_times.add(time.perf_counter() - self.tick_started)
+        self.entity_counts["moles"].add(moles)
+        self.entity_counts["cannonballs"].add(cannonballs)
+        self.entity_counts["ammo"].add(ammo)
+
+    def summary(self) -> dict:
+        """
+        Works out the p50, p95 and p99 time of every handler in milliseconds, and their call counts
+
+        Returns:
+            dict: The summary of each handler, plus "tick" for whole ticks
+        """
+        result = {}
+        buffers = dict(self.timings)
+        buffers["tick"] = self.tick_times
+        for name, buffer in buffers.items():
+            values = buffer.recent()
+            result[name] = {
+                "calls": self.calls.get(name, len(values)),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+            }
+        return result
+
+    def overlay_text(self, count: int = 3) -> str:
+        """
+        Makes a short line of text naming the slowest handlers, to show on screen
+
+        Args:
+            count (int): How many handlers to name
+
+        Returns:
+            str: The text for the overlay
+        """
+        summary = self.summary()
+        tick = summary.pop("tick")
+        slowest = sorted(summary.items(), key=lambda item: item[1]["p95_ms"], reverse=True)[:count]
+        parts = [name + " " + format(stats["p95_ms"], ".2f") for name, stats in slowest]
+        return "p95 ms: tick " + format(tick["p95_ms"], ".2f") + ", " + ", ".join(parts)
+
+    def dump_json(self, path: str):
+        """
+        Writes the summary and the recorded ticks to a JSON file
+
+        Args:
+            path (str): The file to write
+        """
+        data = {
+            "summary": self.summary(),
+            "ticks": self.tick_times.recent(),
+            "handlers": {name: buffer.recent() for name, buffer in self.timings.items()},
+            "entities": {name: buffer.recent() for name, buffer in self.entity_counts.items()},
+        }
+        with open(path, "w") as file:
+            json.dump(data, file, indent=2)
+
+    def dump_csv(self, path: str):
+        """
+        Writes one row per handler with its call count and percentiles to a CSV file
+
+        Args:
+            path (str): The file to write
+        """
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["handler", "calls", "p50_ms", "p95_ms", "p99_ms"])
+            for name, stats in self.summary().items():
+                writer.writerow([name, stats["calls"], stats["p50_ms"], stats["p95_ms"], stats["p99_ms"]])
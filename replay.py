@@ -0,0 +1,166 @@
+"""
+Records the keys pressed and released each tick into a compact binary log, and plays
+them back through the headless simulation as fast as possible. Together with the seed
+of the world's random numbers, a log replays the exact same game every time.
+
+The log starts with a header of b"MOLE", a version byte and the seed as 8 bytes.
+Every event after that is the number of ticks since the previous event, as a varint,
+followed by one byte holding whether the key was pressed or released and which key it was.
+"""
+import struct
+import simulation
+
+
+MAGIC = b"MOLE"
+# Version 2 games pick spawn and fire ticks from a schedule, so version 1 seeds play out differently
+VERSION = 2
+# The only keys the game reacts to. Others are not recorded
+KEYS = ["a", "d", "left", "right", "space"]
+PRESSED = 0
+RELEASED = 1
+
+
+class InputRecorder:
+    def __init__(self, seed: int):
+        """
+        Creates an empty recording for a game that was started with the given seed
+
+        Args:
+            seed (int): The seed of the world's random numbers
+        """
+        self.seed = seed
+        self.data = bytearray(MAGIC)
+        self.data += struct.pack("<BQ", VERSION, seed)
+        self.last_tick = 0
+        self.count = 0
+
+    def record(self, tick: int, kind: int, key: str):
+        """
+        Adds an event to the recording. Events have to be recorded in tick order
+
+        Args:
+            tick (int): The tick the key was pressed or released on
+            kind (int): PRESSED or RELEASED
+            key (str): The key, using Designer's names for them
+        """
+        if key not in KEYS:
+            return
+        delta = tick - self.last_tick
+        if delta < 0:
+            raise ValueError("Events have to be recorded in the order they happened")
+        # Varint: 7 bits at a time, with the top bit set while there are more bytes to come
+        while delta >= 0x80:
+            self.data.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        self.data.append(delta)
+        self.data.append(kind << 7 | KEYS.index(key))
+        self.last_tick = tick
+        self.count += 1
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns:
+            bytes: The recording
+        """
+        return bytes(self.data)
+
+    def save(self, path: str):
+        """
+        Writes the recording to a file
+
+        Args:
+            path (str): The file to write
+        """
+        with open(path, "wb") as file:
+            file.write(self.data)
+
+
+def read_recording(data: bytes) -> tuple:
+    """
+    Decodes a recording
+
+    Args:
+        data (bytes): The recording made by an InputRecorder
+
+    Returns:
+        tuple: The seed, and a list of (tick, kind, key) events in order
+    """
+    if data[:4] != MAGIC:
+        raise ValueError("This is not a Moleaga recording")
+    version, seed = struct.unpack_from("<BQ", data, 4)
+    if version != VERSION:
+        raise ValueError(f"Unsupported recording version {version}")
+    events = []
+    tick = 0
+    index = 4 + struct.calcsize("<BQ")
+    while index < len(data):
+        delta = 0
+        shift = 0
+        while data[index] & 0x80:
+            delta |= (data[index] & 0x7F) << shift
+            shift += 7
+            index += 1
+        delta |= data[index] << shift
+        code = data[index + 1]
+        index += 2
+        tick += delta
+        events.append((tick, code >> 7, KEYS[code & 0x7F]))
+    return seed, events
+
+
+def load_recording(path: str) -> tuple:
+    """
+    Reads and decodes a recording from a file
+
+    Args:
+        path (str): The file to read
+
+    Returns:
+        tuple: The seed, and a list of (tick, kind, key) events in order
+    """
+    with open(path, "rb") as file:
+        return read_recording(file.read())
+
+
+def events_by_tick(events: list) -> dict:
+    """
+    Groups events by the tick they happened on. Several frames can be drawn between two ticks,
+    so a key can go down and up again before a tick, which is why the events stay in order
+
+    Args:
+        events (list): The (tick, kind, key) events
+
+    Returns:
+        dict: The list of (kind, key) events for each tick that had events, in the order they happened
+    """
+    inputs = {}
+    for tick, kind, key in events:
+        if tick not in inputs:
+            inputs[tick] = []
+        inputs[tick].append((kind, key))
+    return inputs
+
+
+def play_back(data: bytes, extra_ticks: int = 0) -> simulation.World:
+    """
+    Replays a recording through the headless simulation as fast as possible
+
+    Args:
+        data (bytes): The recording
+        extra_ticks (int): How many ticks to keep going after the last event
+
+    Returns:
+        simulation.World: The world at the end of the replay
+    """
+    seed, events = read_recording(data)
+    inputs = events_by_tick(events)
+    last_tick = events[-1][0] if events else 0
+    world = simulation.create_world(seed)
+    while world.tick <= last_tick + extra_ticks and not simulation.game_over(world):
+        for kind, key in inputs.get(world.tick, []):
+            if kind == PRESSED:
+                simulation.handle_key_press(world, key)
+            else:
+                simulation.handle_key_release(world, key)
+        simulation.step(world)
+    return world
@@ -0,0 +1,72 @@
+"""
+Schedules random events by the tick they happen on. Rolling a 1 in 500 chance every tick
+wastes 499 rolls out of 500, so instead the number of ticks until the next success is
+sampled once from the geometric distribution, which gives the exact same odds, and the
+event waits in a heap until its tick comes around.
+"""
+import heapq
+import math
+from random import Random
+
+
+def ticks_until(rng: Random, chance: float) -> int:
+    """
+    Samples how many ticks it takes until an event with the given chance each tick happens,
+    counting the tick it happens on
+
+    Args:
+        rng (Random): The random numbers to use
+        chance (float): The chance of the event happening each tick, from 0 to 1
+
+    Returns:
+        int: The number of ticks, at least 1, or None if the event can never happen
+    """
+    if chance >= 1:
+        return 1
+    if chance <= 0:
+        return None
+    return int(math.log(1.0 - rng.random()) / math.log(1.0 - chance)) + 1
+
+
+class Scheduler:
+    def __init__(self):
+        """
+        Creates an empty schedule
+        """
+        self.queue = []
+        self.count = 0
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def schedule(self, tick: int, item) -> int:
+        """
+        Schedules an item for a tick. Items due on the same tick come out in the order they were scheduled
+
+        Args:
+            tick (int): The tick the item is due on
+            item: Anything
+
+        Returns:
+            int: A number for this event, which can be kept to tell if a later event replaced it
+        """
+        self.count += 1
+        heapq.heappush(self.queue, (tick, self.count, item))
+        return self.count
+
+    def pop_due(self, tick: int) -> list:
+        """
+        Takes every item that is due on or before a tick out of the schedule
+
+        Args:
+            tick (int): The current tick
+
+        Returns:
+            list: The (event number, item) of each due item, in the order they are due
+        """
+        due = []
+        queue = self.queue
+        while queue and queue[0][0] <= tick:
+            due_tick, event, item = heapq.heappop(queue)
+            due.append((event, item))
+        return due
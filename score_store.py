@@ -0,0 +1,288 @@
+"""
+A local SQLite database of every finished game: the score, and the moles hit, rabbits
+shot, lives lost and ticks spent on each level.
+
+The database is in WAL mode, so the scores can be read while games are being written.
+Games are written by a background thread, which commits everything that is waiting in
+one transaction, so the game loop only ever puts a record on a queue and the Monte Carlo
+runs can add thousands of games a second. Running totals for each level are kept as the
+games are written, so the averages and the top scores are quick to look up however many
+games have been played. The writer thread also keeps the best score from each source in
+memory, read when the store is opened, so the game can show the high score without
+touching the disk.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    -- Seeds can be bigger than SQLite's integers, so they are kept as text
+    seed TEXT,
+    points INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_points ON games (points DESC);
+CREATE INDEX IF NOT EXISTS games_by_source_points ON games (source, points DESC);
+CREATE TABLE IF NOT EXISTS levels (
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    level INTEGER NOT NULL,
+    moles_hit INTEGER NOT NULL,
+    rabbits_shot INTEGER NOT NULL,
+    lives_lost INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    PRIMARY KEY (game_id, level)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS level_totals (
+    source TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    moles_hit INTEGER NOT NULL,
+    rabbits_shot INTEGER NOT NULL,
+    lives_lost INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    PRIMARY KEY (source, level)
+) WITHOUT ROWID;
+"""
+ADD_TOTALS = """
+INSERT INTO level_totals VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (source, level) DO UPDATE SET
+    games = games + excluded.games,
+    moles_hit = moles_hit + excluded.moles_hit,
+    rabbits_shot = rabbits_shot + excluded.rabbits_shot,
+    lives_lost = lives_lost + excluded.lives_lost,
+    ticks = ticks + excluded.ticks
+"""
+# The most games written in one transaction
+DEFAULT_BATCH_SIZE = 1000
+
+
+@dataclass(slots=True)
+class GameRecord:
+    # Where the game was played, like "game" or "monte carlo"
+    source: str
+    seed: int
+    points: int
+    level: int
+    ticks: int
+    # (level, moles_hit, rabbits_shot, lives_lost, ticks) for every level played, in order
+    levels: list
+    finished_at: float
+
+
+def game_record(world, source: str, tick: int) -> GameRecord:
+    """
+    Gathers what happened in a finished game
+
+    Args:
+        world (simulation.World): The world instance
+        source (str): Where the game was played
+        tick (int): The tick the game ended on
+
+    Returns:
+        GameRecord: The game, ready to be saved
+    """
+    levels = []
+    played = sorted(world.level_stats.items())
+    for index, (level, stats) in enumerate(played):
+        ends_at = played[index + 1][1].reached_at if index + 1 < len(played) else tick
+        levels.append((level, stats.moles_hit, stats.rabbits_shot, stats.lives_lost, ends_at - stats.reached_at))
+    return GameRecord(source, world.seed, world.player.points, world.level, tick, levels, time.time())
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Opens the database in WAL mode, making the tables if they are not there yet
+
+    Args:
+        path (str): The database file
+
+    Returns:
+        sqlite3.Connection: The connection
+    """
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode = WAL")
+    # In WAL mode this can only lose the last few commits if the computer crashes, never corrupt the file
+    connection.execute("PRAGMA synchronous = NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class ScoreStore:
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Opens the database and starts the thread that writes to it
+
+        Args:
+            path (str): The database file
+            batch_size (int): The most games to write in one transaction
+        """
+        self.path = path
+        self.batch_size = batch_size
+        connection = connect(path)
+        # The most points scored by a game from each source, by source, kept up to date by the writer thread
+        self.best_points = dict(connection.execute("SELECT source, MAX(points) FROM games GROUP BY source"))
+        connection.close()
+        self.reader = None
+        self.closed = False
+        self.waiting = queue.Queue()
+        self.writer = threading.Thread(target=self.write_games, name="score store", daemon=True)
+        self.writer.start()
+
+    def record(self, game: GameRecord):
+        """
+        Queues a game to be written, without waiting for the disk. Once the store is closed,
+        or its writer thread has stopped, nothing would write the game, so this raises a RuntimeError
+
+        Args:
+            game (GameRecord): The game to save
+        """
+        if self.closed or not self.writer.is_alive():
+            raise RuntimeError(f"The score store for {self.path} is closed, so the game can't be saved")
+        self.waiting.put(game)
+
+    def write_games(self):
+        """
+        Writes the queued games until the store is closed. This runs on the writer thread
+        """
+        connection = connect(self.path)
+        closing = False
+        while not closing:
+            batch = [self.waiting.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.waiting.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                closing = True
+            games = [game for game in batch if game is not None]
+            try:
+                with connection:
+                    write_batch(connection, games)
+                for game in games:
+                    self.best_points[game.source] = max(game.points, self.best_points.get(game.source, game.points))
+            except sqlite3.Error as error:
+                print(f"Could not save {len(games)} games to {self.path}: {error}")
+            finally:
+                # Marked done whatever happened, so flush never waits for this batch forever
+                for game in batch:
+                    self.waiting.task_done()
+        connection.close()
+
+    def flush(self):
+        """
+        Waits until every queued game has been written
+        """
+        self.waiting.join()
+
+    def close(self):
+        """
+        Writes the games still queued and stops the writer thread. Safe to call more than once
+        """
+        self.closed = True
+        if self.writer.is_alive():
+            self.waiting.put(None)
+            self.writer.join()
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def read(self, query: str, parameters: tuple) -> list:
+        """
+        Runs a query on the reading connection, which is kept open between queries
+
+        Args:
+            query (str): The SQL query
+            parameters (tuple): The values for the query's placeholders
+
+        Returns:
+            list: The rows
+        """
+        if self.reader is None:
+            self.reader = connect(self.path)
+        return self.reader.execute(query, parameters).fetchall()
+
+    def best_score(self, source: str = None) -> int:
+        """
+        Looks up the best score saved so far without reading the database, so it is safe
+        to call from the game loop. Games still waiting to be written are not counted
+
+        Args:
+            source (str): Only look at games from here, or None for all of them
+
+        Returns:
+            int: The most points scored, or None if no games have been saved
+        """
+        if source is None:
+            return max(self.best_points.values(), default=None)
+        return self.best_points.get(source)
+
+    def top_scores(self, count: int = 10, source: str = None) -> list:
+        """
+        Finds the best games, using the points index so only those games are read
+
+        Args:
+            count (int): How many games to find
+            source (str): Only look at games from here, or None for all of them
+
+        Returns:
+            list: The (points, level, source, finished_at) of each game, best first
+        """
+        if source is None:
+            return self.read("SELECT points, level, source, finished_at FROM games "
+                             "ORDER BY points DESC LIMIT ?", (count,))
+        return self.read("SELECT points, level, source, finished_at FROM games WHERE source = ? "
+                         "ORDER BY points DESC LIMIT ?", (source, count))
+
+    def level_averages(self, source: str = None) -> dict:
+        """
+        Works out the average stats of each level from the running totals
+
+        Args:
+            source (str): Only look at games from here, or None for all of them
+
+        Returns:
+            dict: By level, how many games got to it and the average moles_hit, rabbits_shot,
+                lives_lost and ticks on it
+        """
+        where = "" if source is None else "WHERE source = ? "
+        rows = self.read("SELECT level, SUM(games), SUM(moles_hit), SUM(rabbits_shot), SUM(lives_lost), SUM(ticks) "
+                         "FROM level_totals " + where + "GROUP BY level ORDER BY level",
+                         () if source is None else (source,))
+        return {level: {"games": games, "moles_hit": moles_hit / games, "rabbits_shot": rabbits_shot / games,
+                        "lives_lost": lives_lost / games, "ticks": ticks / games}
+                for level, games, moles_hit, rabbits_shot, lives_lost, ticks in rows}
+
+
+def write_batch(connection: sqlite3.Connection, games: list):
+    """
+    Adds some games, their levels and their level totals in the current transaction
+
+    Args:
+        connection (sqlite3.Connection): The writer's connection
+        games (list): The GameRecords to add
+    """
+    levels = []
+    totals = {}
+    for game in games:
+        cursor = connection.execute("INSERT INTO games (source, seed, points, level, ticks, finished_at) "
+                                    "VALUES (?, ?, ?, ?, ?, ?)",
+                                    (game.source, str(game.seed), game.points, game.level, game.ticks,
+                                     game.finished_at))
+        for level, moles_hit, rabbits_shot, lives_lost, ticks in game.levels:
+            levels.append((cursor.lastrowid, level, moles_hit, rabbits_shot, lives_lost, ticks))
+            total = totals.setdefault((game.source, level), [0, 0, 0, 0, 0])
+            total[0] += 1
+            total[1] += moles_hit
+            total[2] += rabbits_shot
+            total[3] += lives_lost
+            total[4] += ticks
+    connection.executemany("INSERT INTO levels VALUES (?, ?, ?, ?, ?, ?)", levels)
+    connection.executemany(ADD_TOTALS, [key + tuple(total) for key, total in totals.items()])
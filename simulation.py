@@ -0,0 +1,856 @@
+"""
+A headless version of the Moleaga rules.
+
+Everything in here works on plain positions, angles and bounding boxes instead of
+Designer objects, so a world can be stepped thousands of times a second without
+opening a window. The Designer game in main.py steps one of these worlds every tick
+and only draws it.
+"""
+import math
+from dataclasses import dataclass, field
+from random import Random, randrange
+from entity_list import EntityList
+from ground_index import GroundIndex
+from scheduler import Scheduler, ticks_until
+from spatial_hash import SpatialHash
+from swept import swept_box, time_of_impact
+
+
+# The size of the Designer window
+WINDOW_WIDTH = 800
+WINDOW_HEIGHT = 600
+# Constants which represent the ground height and position
+HEIGHT_OF_GROUND = 100
+TOP_OF_GROUND_Y = WINDOW_HEIGHT - HEIGHT_OF_GROUND
+# Represents the highest number of degrees the cannon can rotate before stopping
+MAX_CANNON_ANGLE = 85
+# How fast cannonballs move
+CANNONBALL_SPEED = 5
+# The max amount of ammo the player can hold
+MAX_AMMO = 10
+# Each tick there is a 1 in this many chance for a mole or ammo to spawn
+MOLE_SPAWN_ODDS = 100
+AMMO_SPAWN_ODDS = 100
+# Each tick a bad mole fires with a chance of the level out of this many
+MOLE_FIRE_ODDS = 500
+# How many pixels the player moves, and degrees the cannon turns, each tick
+PLAYER_SPEED = 5
+ROTATION_SPEED = 5
+# The number of lives the player starts with
+STARTING_LIVES = 3
+# Sprite sizes in pixels, taken from the png files and the scales used in main.py
+CANNON_WIDTH = 28
+CANNON_HEIGHT = 64
+WHEEL_SIZE = 30
+MOLE_SIZE = 32
+MINI_MOLE_SIZE = 16
+AMMO_WIDTH = 60
+AMMO_HEIGHT = 51
+CANNONBALL_RADIUS = 10
+# The bits of the flags field of moles and cannonballs
+MINI = 1
+RABBIT = 2
+FROM_PLAYER = 4
+
+
+@dataclass(slots=True)
+class Player:
+    x: float
+    y: float
+    angle: int
+    wheel_angle: int
+    left: bool
+    right: bool
+    rotating_left: bool
+    rotating_right: bool
+    points: int
+    moles_hit_in_current_level: int
+    ammo_count: int
+
+
+@dataclass(slots=True)
+class Mole:
+    x: float
+    y: float
+    angle: float
+    # MINI and RABBIT, packed together
+    flags: int
+    # The player position this mole last aimed at, so it only re-aims when the player moves
+    aimed_at: tuple = None
+    # The number of this mole's next shot in the fire schedule
+    fire_event: int = None
+    # Handed out by the world when the mole is added, and never reused
+    id: int = None
+
+    @property
+    def is_mini(self) -> bool:
+        return bool(self.flags & MINI)
+
+    @property
+    def is_rabbit(self) -> bool:
+        return bool(self.flags & RABBIT)
+
+
+@dataclass(slots=True)
+class Cannonball:
+    x: float
+    y: float
+    angle: float
+    # FROM_PLAYER, or 0 for the moles' cannonballs
+    flags: int
+    # How far the cannonball moves each tick, worked out once from the angle
+    dx: float
+    dy: float
+    # Handed out by the world when the cannonball is added, and never reused
+    id: int = None
+
+    @property
+    def is_from_player(self) -> bool:
+        return bool(self.flags & FROM_PLAYER)
+
+
+@dataclass(slots=True)
+class Ammo:
+    x: float
+    y: float
+    # Handed out by the world when the ammo is added, and never reused
+    id: int = None
+
+
+@dataclass(slots=True)
+class LevelStats:
+    # The tick the level was reached on
+    reached_at: int
+    # Bad moles and rabbits hit, and lives lost while on the level
+    moles_hit: int = 0
+    rabbits_shot: int = 0
+    lives_lost: int = 0
+
+
+@dataclass(slots=True)
+class World:
+    player: Player
+    moles: EntityList
+    lives_count: int
+    ammo: EntityList
+    cannonballs: EntityList
+    level: int
+    tick: int
+    collision_grid: SpatialHash = field(default_factory=SpatialHash)
+    # Every random number in the game comes from here, so a seed replays the same game
+    seed: int = 0
+    rng: Random = field(default_factory=Random)
+    # The ticks the next mole and ammo spawn on, and when each bad mole fires next
+    next_mole_spawn: int = 0
+    next_ammo_spawn: int = 0
+    fire_schedule: Scheduler = field(default_factory=Scheduler)
+    # The level the fire schedule was worked out for
+    fire_level: int = 1
+    # The ammo again, sorted by x so pickups are a range query
+    ammo_index: GroundIndex = field(default_factory=GroundIndex)
+    # How many times the cannonballs have moved, and the move each cannonball leaves the window on
+    cannonball_moves: int = 0
+    cannonball_exits: Scheduler = field(default_factory=Scheduler)
+    # The id the next mole, ammo or cannonball added to the world gets
+    next_id: int = 1
+    # The LevelStats of every level played, by level
+    level_stats: dict = field(default_factory=dict)
+    # The most mole cannonballs that can be in the air at once, or None for no limit.
+    # The Designer game lowers it when ticks take too long
+    max_enemy_cannonballs: int = None
+
+
+@dataclass(slots=True)
+class Inputs:
+    """
+    The keys that were pressed and released since the last tick, using
+    the same key names that Designer passes to the typing handlers
+    """
+    pressed: list[str] = field(default_factory=list)
+    released: list[str] = field(default_factory=list)
+
+
+def new_seed() -> int:
+    """
+    Picks a random seed for a new game
+
+    Returns:
+        int: A seed that fits in 8 bytes
+    """
+    return randrange(2 ** 64)
+
+
+def create_world(seed: int = None) -> World:
+    """
+    Creates a new world at the start of a game
+
+    Args:
+        seed (int): The seed for the world's random numbers, or None to pick one
+
+    Returns:
+        World: A new headless world
+    """
+    if seed is None:
+        seed = new_seed()
+    player = Player(WINDOW_WIDTH / 2, TOP_OF_GROUND_Y - CANNON_HEIGHT, 0, 0,
+                    False, False, False, False, 0, 0, 0)
+    world = World(player, EntityList(), STARTING_LIVES, EntityList(), EntityList(), 1, 0,
+                  seed=seed, rng=Random(seed))
+    world.level_stats[world.level] = LevelStats(world.tick)
+    start_spawn_schedule(world)
+    return world
+
+
+def new_id(world: World) -> int:
+    """
+    Hands out the next entity id
+
+    Args:
+        world (World): The world instance
+
+    Returns:
+        int: An id that no other entity in the world has had
+    """
+    entity_id = world.next_id
+    world.next_id += 1
+    return entity_id
+
+
+def current_level_stats(world: World, tick: int) -> LevelStats:
+    """
+    Finds the stats of the level the world is on, starting them if the level has none yet,
+    like after a snapshot is restored
+
+    Args:
+        world (World): The world instance
+        tick (int): The current tick
+
+    Returns:
+        LevelStats: The stats of the current level
+    """
+    stats = world.level_stats.get(world.level)
+    if stats is None:
+        stats = world.level_stats[world.level] = LevelStats(tick)
+    return stats
+
+
+def count_mole_hit(world: World, mole: Mole, tick: int):
+    """
+    Adds a hit mole to the stats of the current level
+
+    Args:
+        world (World): The world instance
+        mole (Mole): The mole that was hit
+        tick (int): The current tick
+    """
+    stats = current_level_stats(world, tick)
+    if mole.is_rabbit:
+        stats.rabbits_shot += 1
+    else:
+        stats.moles_hit += 1
+
+
+def start_spawn_schedule(world: World):
+    """
+    Picks the ticks the first mole and ammo spawn on
+
+    Args:
+        world (World): The world instance
+    """
+    world.next_mole_spawn = ticks_until(world.rng, 1 / MOLE_SPAWN_ODDS) - 1
+    world.next_ammo_spawn = ticks_until(world.rng, 1 / AMMO_SPAWN_ODDS) - 1
+
+
+def fire_chance(level: int) -> float:
+    """
+    Args:
+        level (int): The current level
+
+    Returns:
+        float: The chance of a bad mole firing each tick on that level
+    """
+    return min(level, MOLE_FIRE_ODDS) / MOLE_FIRE_ODDS
+
+
+def schedule_mole_fire(world: World, mole: Mole, tick: int):
+    """
+    Picks the tick a mole fires on next, replacing any shot it already had scheduled
+
+    Args:
+        world (World): The world instance
+        mole (Mole): The mole
+        tick (int): The first tick the mole could fire on
+    """
+    delay = ticks_until(world.rng, fire_chance(world.fire_level))
+    if delay is None:
+        mole.fire_event = None
+    else:
+        mole.fire_event = world.fire_schedule.schedule(tick + delay - 1, mole)
+
+
+def moles_firing(world: World, tick: int) -> list:
+    """
+    Finds the moles that fire this tick and schedules their next shot. When the level
+    changed since the last tick, every bad mole is scheduled again with the new odds first
+
+    Args:
+        world (World): The world instance
+        tick (int): The current tick
+
+    Returns:
+        list: The moles that fire, in the order their shots were scheduled
+    """
+    if world.fire_level != world.level:
+        world.fire_level = world.level
+        for mole in world.moles:
+            if not mole.is_rabbit:
+                schedule_mole_fire(world, mole, tick)
+    firing = []
+    for event, mole in world.fire_schedule.pop_due(tick):
+        # Moles that were hit, or were scheduled again, leave old shots behind which are skipped here
+        if mole.fire_event == event and mole in world.moles:
+            firing.append(mole)
+            schedule_mole_fire(world, mole, tick + 1)
+    return firing
+
+
+def cannon_box(player: Player) -> tuple:
+    """
+    Returns the bounding box of the cannon, which is anchored at its middle top
+
+    Args:
+        player (Player): The player
+
+    Returns:
+        tuple: The (left, top, right, bottom) edges of the cannon
+    """
+    half_width = CANNON_WIDTH / 2
+    return player.x - half_width, player.y, player.x + half_width, player.y + CANNON_HEIGHT
+
+
+def mole_box(mole: Mole) -> tuple:
+    """
+    Returns the bounding box of a mole, which is anchored at its center
+
+    Args:
+        mole (Mole): The mole
+
+    Returns:
+        tuple: The (left, top, right, bottom) edges of the mole
+    """
+    if mole.is_mini:
+        half_size = MINI_MOLE_SIZE / 2
+    else:
+        half_size = MOLE_SIZE / 2
+    return mole.x - half_size, mole.y - half_size, mole.x + half_size, mole.y + half_size
+
+
+def cannonball_path_box(cannonball: Cannonball) -> tuple:
+    """
+    Returns the bounding box of everywhere a cannonball passed through on its last move
+
+    Args:
+        cannonball (Cannonball): The cannonball
+
+    Returns:
+        tuple: The (left, top, right, bottom) edges of the box
+    """
+    return swept_box(cannonball.x - cannonball.dx, cannonball.y - cannonball.dy, cannonball.dx, cannonball.dy,
+                     CANNONBALL_RADIUS)
+
+
+def cannonball_time_of_impact(cannonball: Cannonball, box: tuple) -> float:
+    """
+    Finds when a cannonball first overlapped a box during its last move, so fast
+    cannonballs can't pass straight through something between two ticks
+
+    Args:
+        cannonball (Cannonball): The cannonball
+        box (tuple): The (left, top, right, bottom) edges of the box
+
+    Returns:
+        float: How far through the move it hit, from 0 to 1, or None if it missed
+    """
+    return time_of_impact(cannonball.x - cannonball.dx, cannonball.y - cannonball.dy, cannonball.dx, cannonball.dy,
+                          CANNONBALL_RADIUS, box)
+
+
+def cannonball_velocity(angle: float) -> tuple:
+    """
+    Turns the angle a cannonball was shot at into how far it moves each tick
+    https://stackoverflow.com/a/46697552
+
+    Args:
+        angle (float): The Designer angle the cannonball was shot at
+
+    Returns:
+        tuple: The (dx, dy) distance moved each tick
+    """
+    corrected_angle = math.radians(-angle - 90)
+    return CANNONBALL_SPEED * math.cos(corrected_angle), CANNONBALL_SPEED * math.sin(corrected_angle)
+
+
+def angle_towards(from_x: float, from_y: float, to_x: float, to_y: float) -> float:
+    """
+    Finds the Designer angle which points from one position towards another
+
+    Args:
+        from_x (float): The x position to point from
+        from_y (float): The y position to point from
+        to_x (float): The x position to point towards
+        to_y (float): The y position to point towards
+
+    Returns:
+        float: The angle in degrees, between 0 and 360
+    """
+    rise = to_y - from_y
+    run = to_x - from_x
+    return math.degrees(math.atan2(-rise, run)) % 360
+
+
+def create_cannonball(x: float, y: float, is_from_player: bool, angle: float) -> Cannonball:
+    """
+    Creates a cannonball, working out its velocity once since its direction never changes
+
+    Args:
+        x (float): The x initial position of the cannonball
+        y (float): The y initial position of the cannonball
+        is_from_player (bool): If the player shot the cannonball
+        angle (float): The angle to move the cannonball
+
+    Returns:
+        Cannonball: The new cannonball
+    """
+    dx, dy = cannonball_velocity(angle)
+    return Cannonball(x, y, angle, FROM_PLAYER if is_from_player else 0, dx, dy)
+
+
+def moves_until_outside(x: float, y: float, dx: float, dy: float, width: float = WINDOW_WIDTH,
+                        height: float = WINDOW_HEIGHT) -> int:
+    """
+    Works out how many moves it takes a cannonball to leave the window, since it moves in a straight line
+
+    Args:
+        x (float): The x position of the cannonball
+        y (float): The y position of the cannonball
+        dx (float): How far it moves along x each tick
+        dy (float): How far it moves along y each tick
+        width (float): The width of the window
+        height (float): The height of the window
+
+    Returns:
+        int: The number of moves until it is outside, or None if it never leaves
+    """
+    if not (0 <= x <= width and 0 <= y <= height):
+        return 1
+    moves = None
+    for position, speed, size in [(x, dx, width), (y, dy, height)]:
+        if speed > 0:
+            axis_moves = math.floor((size - position) / speed) + 1
+        elif speed < 0:
+            axis_moves = math.floor(position / -speed) + 1
+        else:
+            continue
+        if moves is None or axis_moves < moves:
+            moves = axis_moves
+    return moves
+
+
+def add_cannonball(world: World, cannonball: Cannonball):
+    """
+    Adds a cannonball to the world and schedules when it leaves the window
+
+    Args:
+        world (World): The world instance
+        cannonball (Cannonball): The cannonball to add
+    """
+    cannonball.id = new_id(world)
+    world.cannonballs.append(cannonball)
+    moves = moves_until_outside(cannonball.x, cannonball.y, cannonball.dx, cannonball.dy)
+    if moves is not None:
+        world.cannonball_exits.schedule(world.cannonball_moves + moves, cannonball)
+
+
+def roll_mole_type(rng: Random) -> tuple:
+    """
+    Gives a new mole a 10% chance to be mini, or 10% for it to be a rabbit
+
+    Args:
+        rng (Random): The world's random numbers
+
+    Returns:
+        tuple: Whether the mole (is_mini, is_rabbit)
+    """
+    random_type_chance = rng.randint(0, 10)
+    return random_type_chance == 1, random_type_chance == 2
+
+
+def mole_flags(is_mini: bool, is_rabbit: bool) -> int:
+    """
+    Packs the type of a mole into its flags
+
+    Args:
+        is_mini (bool): Whether the mole is mini
+        is_rabbit (bool): Whether the mole is a good rabbit
+
+    Returns:
+        int: The flags for the mole
+    """
+    flags = 0
+    if is_mini:
+        flags |= MINI
+    if is_rabbit:
+        flags |= RABBIT
+    return flags
+
+
+def add_mole(world: World, mole: Mole):
+    """
+    Adds a mole to the world, and schedules its first shot if it is a bad mole
+
+    Args:
+        world (World): The world instance
+        mole (Mole): The mole to add
+    """
+    mole.id = new_id(world)
+    world.moles.append(mole)
+    if not mole.is_rabbit:
+        schedule_mole_fire(world, mole, world.tick)
+
+
+def handle_key_press(world: World, key: str):
+    """
+    Moves the player while A or D is held, rotates the cannon while the
+    left or right arrow key is held, and shoots a cannonball on space
+
+    Args:
+        world (World): The world instance
+        key (str): The key the user pressed
+    """
+    player = world.player
+    half_width = CANNON_WIDTH // 2
+    if key == "a" and player.x > half_width:
+        player.left = True
+    elif key == "d" and player.x < WINDOW_WIDTH - half_width:
+        player.right = True
+    if key == "left" and player.angle < MAX_CANNON_ANGLE:
+        player.rotating_left = True
+    elif key == "right" and player.angle > -MAX_CANNON_ANGLE:
+        player.rotating_right = True
+    if key == "space" and player.ammo_count >= 1:
+        add_cannonball(world, create_cannonball(player.x, player.y + CANNON_HEIGHT // 2, True, player.angle))
+        player.ammo_count -= 1
+
+
+def handle_key_release(world: World, key: str):
+    """
+    Stops moving or rotating the player when the key is let go of
+
+    Args:
+        world (World): The world instance
+        key (str): The key the user let go of
+    """
+    player = world.player
+    if key == "a":
+        player.left = False
+    elif key == "d":
+        player.right = False
+    if key == "left":
+        player.rotating_left = False
+    elif key == "right":
+        player.rotating_right = False
+
+
+def spawn(world: World):
+    """
+    Randomly spawns moles in the sky and ammo on the ground, with more allowed as the level increases
+
+    Args:
+        world (World): The world instance
+    """
+    rng = world.rng
+    tick = world.tick
+    # The next spawn is picked before checking the limit, so a full sky still uses up the same random numbers
+    if tick >= world.next_mole_spawn:
+        world.next_mole_spawn = tick + ticks_until(rng, 1 / MOLE_SPAWN_ODDS)
+        if len(world.moles) <= world.level:
+            is_mini, is_rabbit = roll_mole_type(rng)
+            x = rng.randint(1, WINDOW_WIDTH)
+            y = rng.randint(1, TOP_OF_GROUND_Y - CANNON_HEIGHT)
+            add_mole(world, Mole(x, y, 0, mole_flags(is_mini, is_rabbit)))
+    if tick >= world.next_ammo_spawn:
+        world.next_ammo_spawn = tick + ticks_until(rng, 1 / AMMO_SPAWN_ODDS)
+        if len(world.ammo) <= world.level:
+            add_ammo(world, Ammo(rng.randint(1, WINDOW_WIDTH), TOP_OF_GROUND_Y))
+
+
+def move_player(world: World):
+    """
+    Moves and rotates the player while keys are held, stopping at the edges of the screen
+    and before the cannon faces the ground
+
+    Args:
+        world (World): The world instance
+    """
+    player = world.player
+    if player.left:
+        player.x -= PLAYER_SPEED
+        player.wheel_angle += PLAYER_SPEED
+    elif player.right:
+        player.x += PLAYER_SPEED
+        player.wheel_angle -= PLAYER_SPEED
+    half_width = CANNON_WIDTH // 2
+    if player.x > WINDOW_WIDTH - half_width:
+        player.right = False
+    elif player.x < half_width:
+        player.left = False
+    if player.rotating_left:
+        if player.angle >= MAX_CANNON_ANGLE:
+            player.rotating_left = False
+        player.angle += ROTATION_SPEED
+    elif player.rotating_right:
+        if player.angle <= -MAX_CANNON_ANGLE:
+            player.rotating_right = False
+        player.angle -= ROTATION_SPEED
+
+
+def move_cannonballs(world: World):
+    """
+    Moves every cannonball along its angle
+
+    Args:
+        world (World): The world instance
+    """
+    for cannonball in world.cannonballs:
+        cannonball.x += cannonball.dx
+        cannonball.y += cannonball.dy
+    world.cannonball_moves += 1
+
+
+def remove_cannonballs_outside(world: World):
+    """
+    Removes the cannonballs that left the window. Only the cannonballs scheduled to leave
+    on this move are checked, and only after the collisions so that a cannonball which
+    passed through something on its way out still hits it
+
+    Args:
+        world (World): The world instance
+    """
+    exits = world.cannonball_exits
+    for event, cannonball in exits.pop_due(world.cannonball_moves):
+        # Cannonballs that hit something are already gone
+        if cannonball not in world.cannonballs:
+            continue
+        if 0 <= cannonball.x <= WINDOW_WIDTH and 0 <= cannonball.y <= WINDOW_HEIGHT:
+            # Adding up the moves can round differently to working them out at once, so check again next move
+            exits.schedule(world.cannonball_moves + 1, cannonball)
+        else:
+            world.cannonballs.remove(cannonball)
+
+
+def score_mole_hit(world: World, mole: Mole):
+    """
+    Adds or removes points depending on the type of mole that was hit,
+    and moves to the next level once enough moles were hit
+
+    Args:
+        world (World): The world instance
+        mole (Mole): The mole that was hit
+    """
+    player = world.player
+    count_mole_hit(world, mole, world.tick)
+    player.moles_hit_in_current_level += 1
+    if player.moles_hit_in_current_level >= world.level:
+        player.moles_hit_in_current_level = 0
+        world.level += 1
+        world.level_stats[world.level] = LevelStats(world.tick)
+        for other in world.moles:
+            if other.is_rabbit:
+                world.moles.remove(other)
+                world.collision_grid.remove(other)
+    if mole.is_mini:
+        player.points += 3
+    elif mole.is_rabbit:
+        player.points -= 3
+    else:
+        player.points += 1
+
+
+def build_collision_grid(world: World):
+    """
+    Puts the moles and the player into the collision grid, which is shared
+    by the mole-hit and player-hit checks for the rest of the tick
+
+    Args:
+        world (World): The world instance
+    """
+    grid = world.collision_grid
+    grid.clear()
+    for mole in world.moles:
+        grid.insert(mole, mole_box(mole))
+    grid.insert(world.player, cannon_box(world.player))
+
+
+def hit_moles(world: World):
+    """
+    Removes both the mole and the player's cannonball when they collide. The whole line
+    each cannonball moved along this tick is checked, and the hits are taken in the order
+    they happened, so each cannonball only hits the first mole it reaches
+
+    Args:
+        world (World): The world instance
+    """
+    hits = []
+    for cannonball in world.cannonballs:
+        if not cannonball.is_from_player:
+            continue
+        for mole in world.collision_grid.query(cannonball_path_box(cannonball)):
+            if mole is not world.player:
+                when = cannonball_time_of_impact(cannonball, mole_box(mole))
+                if when is not None:
+                    hits.append((when, cannonball, mole))
+    # Sorting is stable, so hits at the same time stay in the order they were found
+    hits.sort(key=lambda hit: hit[0])
+    for when, cannonball, mole in hits:
+        # Each cannonball and mole can only be part of one hit, and rabbits go when the level is passed
+        if cannonball in world.cannonballs and mole in world.moles:
+            world.cannonballs.remove(cannonball)
+            world.moles.remove(mole)
+            world.collision_grid.remove(mole)
+            score_mole_hit(world, mole)
+
+
+def add_ammo(world: World, ammo: Ammo):
+    """
+    Puts an ammo pickup on the ground
+
+    Args:
+        world (World): The world instance
+        ammo (Ammo): The ammo to add
+    """
+    ammo.id = new_id(world)
+    world.ammo.append(ammo)
+    world.ammo_index.add(ammo, ammo.x)
+
+
+def pick_up_ammo(world: World):
+    """
+    Removes the ammo the cannon runs into, giving the player one ammo for each
+    as long as they have not reached the ammo limit
+
+    Args:
+        world (World): The world instance
+    """
+    player = world.player
+    # Ammo and the cannon always overlap vertically, so the boxes overlap when the x positions are close enough
+    reach = CANNON_WIDTH / 2 + AMMO_WIDTH / 2
+    for ammo in world.ammo_index.take_between(player.x - reach, player.x + reach):
+        world.ammo.remove(ammo)
+        if player.ammo_count < MAX_AMMO:
+            player.ammo_count += 1
+
+
+def moles_fire(world: World):
+    """
+    Points every mole at the player, then lets the bad moles randomly shoot at them.
+    The higher the level, the more often they shoot. Once max_enemy_cannonballs are
+    in the air, the moles that were due to fire skip their shot
+
+    Args:
+        world (World): The world instance
+    """
+    player = world.player
+    target = (player.x, player.y)
+    for mole in world.moles:
+        if mole.aimed_at != target:
+            mole.angle = angle_towards(mole.x, mole.y, player.x, player.y)
+            mole.aimed_at = target
+    cap = world.max_enemy_cannonballs
+    if cap is not None:
+        enemy_cannonballs = sum(1 for cannonball in world.cannonballs if not cannonball.is_from_player)
+    for mole in moles_firing(world, world.tick):
+        if cap is not None:
+            # The mole still used up its shot, so its next one comes at the same time as usual
+            if enemy_cannonballs >= cap:
+                continue
+            enemy_cannonballs += 1
+        add_cannonball(world, create_cannonball(mole.x, mole.y, False, mole.angle - 90))
+
+
+def lose_lives(world: World):
+    """
+    Takes away a life for every mole cannonball that hit the player at any point of its move this tick.
+    The player's cells in the collision grid are the broad phase, so only the cannonballs that
+    could share a cell with the player get the exact check
+
+    Args:
+        world (World): The world instance
+    """
+    player = world.player
+    player_box = cannon_box(player)
+    left, top, right, bottom = world.collision_grid.area_of(player)
+    # A cannonball's path reaches this far from where it ends up
+    reach = CANNONBALL_RADIUS + CANNONBALL_SPEED
+    left -= reach
+    top -= reach
+    right += reach
+    bottom += reach
+    for cannonball in world.cannonballs:
+        # Most cannonballs are nowhere near the ground, so the y check comes first
+        if not top <= cannonball.y <= bottom or not left <= cannonball.x <= right or cannonball.is_from_player:
+            continue
+        if cannonball_time_of_impact(cannonball, player_box) is not None:
+            world.lives_count -= 1
+            current_level_stats(world, world.tick).lives_lost += 1
+            world.cannonballs.remove(cannonball)
+
+
+def flush_removals(world: World):
+    """
+    Carries out every removal that was queued during the tick
+
+    Args:
+        world (World): The world instance
+    """
+    world.moles.flush()
+    world.cannonballs.flush()
+    world.ammo.flush()
+
+
+def game_over(world: World) -> bool:
+    """
+    Returns if the game is over if the player has no lives left
+
+    Args:
+        world (World): The world instance
+
+    Returns:
+        bool: Whether the player has lives left
+    """
+    return world.lives_count <= 0
+
+
+# The rules that run every tick, in order
+TICK_HANDLERS = [spawn, move_player, move_cannonballs, build_collision_grid, hit_moles, lose_lives,
+                 remove_cannonballs_outside, pick_up_ammo, moles_fire, flush_removals]
+
+
+def step(world: World, inputs: Inputs = None, handlers: list = None):
+    """
+    Advances the world by one tick. The Designer game runs its rules through this too
+
+    Args:
+        world (World): The world instance
+        inputs (Inputs): The keys pressed and released since the last tick
+        handlers (list): The rules to run instead of TICK_HANDLERS, like timed copies of them
+    """
+    if inputs is not None:
+        for key in inputs.pressed:
+            handle_key_press(world, key)
+        for key in inputs.released:
+            handle_key_release(world, key)
+    if handlers is None:
+        handlers = TICK_HANDLERS
+    for handler in handlers:
+        handler(world)
+    world.tick += 1
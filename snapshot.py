@@ -0,0 +1,333 @@
+"""
+Saves the whole state of a game into a compact binary snapshot and puts it back again,
+for rewinding, retrying a level and debugging. A snapshot is small and quick enough to
+take every tick and keep the last few seconds of them in a SnapshotHistory.
+
+A snapshot is made of fixed size records packed with struct: a header with the counters,
+the level and the lives, then the player, every mole, ammo and cannonball, the entries
+waiting in the fire and cannonball exit schedules, and the state of the random numbers.
+Moles and cannonballs are stored in the order they are in the world, since that order
+decides which hit is found first, so a restored game plays out exactly the same.
+"""
+import heapq
+import struct
+from dataclasses import dataclass
+from random import Random
+import simulation
+from entity_list import EntityList
+from scheduler import Scheduler
+
+
+MAGIC = b"SNAP"
+VERSION = 1
+# magic, version, seed, tick, level, lives, next mole spawn, next ammo spawn, fire level,
+# fire events so far, cannonball moves, exit events so far, next id, then how many
+# moles, ammo, cannonballs, fire entries and exit entries follow
+HEADER = struct.Struct("<4sBQqiiqqiqqqqIIIII")
+# x, y, cannon angle, wheel angle, held keys, points, moles hit in the level, ammo count
+PLAYER = struct.Struct("<ddddBiii")
+# x, y, angle, flags, id
+MOLE = struct.Struct("<dddBq")
+# x, y, id
+AMMO = struct.Struct("<ddq")
+# x, y, angle, flags, dx, dy, id
+CANNONBALL = struct.Struct("<dddBddq")
+# the tick or move it is due on, the event number, and which mole or cannonball it is for
+EVENT = struct.Struct("<qqI")
+# the Mersenne Twister's 624 words and position, then whether there is a spare gauss value and the value
+RNG = struct.Struct("<625I?d")
+# The bits of the player's held keys
+LEFT = 1
+RIGHT = 2
+ROTATING_LEFT = 4
+ROTATING_RIGHT = 8
+
+
+@dataclass(slots=True)
+class Snapshot:
+    """
+    The state of a game as plain numbers, which a world can be built from
+    """
+    seed: int
+    tick: int
+    level: int
+    lives_count: int
+    next_mole_spawn: int
+    next_ammo_spawn: int
+    fire_level: int
+    fire_count: int
+    cannonball_moves: int
+    exit_count: int
+    next_id: int
+    # A PLAYER record
+    player: tuple
+    # Lists of MOLE, AMMO, CANNONBALL and EVENT records
+    moles: list
+    ammo: list
+    cannonballs: list
+    fire_entries: list
+    exit_entries: list
+    rng_state: tuple
+
+
+def held_keys(player: simulation.Player) -> int:
+    """
+    Packs which keys the player is holding into one number
+
+    Args:
+        player (simulation.Player): The player
+
+    Returns:
+        int: The LEFT, RIGHT, ROTATING_LEFT and ROTATING_RIGHT bits
+    """
+    keys = 0
+    if player.left:
+        keys |= LEFT
+    if player.right:
+        keys |= RIGHT
+    if player.rotating_left:
+        keys |= ROTATING_LEFT
+    if player.rotating_right:
+        keys |= ROTATING_RIGHT
+    return keys
+
+
+def set_held_keys(player: simulation.Player, keys: int):
+    """
+    Unpacks the keys from held_keys back onto a player
+
+    Args:
+        player (simulation.Player): The player
+        keys (int): The LEFT, RIGHT, ROTATING_LEFT and ROTATING_RIGHT bits
+    """
+    player.left = bool(keys & LEFT)
+    player.right = bool(keys & RIGHT)
+    player.rotating_left = bool(keys & ROTATING_LEFT)
+    player.rotating_right = bool(keys & ROTATING_RIGHT)
+
+
+def schedule_entries(schedule: Scheduler, rows: dict, current=None) -> list:
+    """
+    Finds the entries of a schedule that still matter. Entries for things that are gone,
+    or that were replaced by a newer entry, are skipped when they come due anyway
+
+    Args:
+        schedule (Scheduler): The schedule
+        rows (dict): The position of each live item in its list, by id()
+        current: Says whether an entry is the latest one for its item, or None if every entry is
+
+    Returns:
+        list: The (tick, event number, row) of each entry, as EVENT records
+    """
+    return [(tick, event, rows[id(item)]) for tick, event, item in schedule.queue
+            if id(item) in rows and (current is None or current(event, item))]
+
+
+def rebuild_schedule(entries: list, count: int, items: list) -> Scheduler:
+    """
+    Makes a schedule from the entries that schedule_entries found
+
+    Args:
+        entries (list): The EVENT records
+        count (int): How many events the schedule had handed out
+        items (list): The items the rows refer to
+
+    Returns:
+        Scheduler: The schedule
+    """
+    schedule = Scheduler()
+    schedule.queue = [(tick, event, items[row]) for tick, event, row in entries]
+    heapq.heapify(schedule.queue)
+    schedule.count = count
+    return schedule
+
+
+def rng_state(rng: Random) -> tuple:
+    """
+    Flattens the state of the random numbers into an RNG record
+
+    Args:
+        rng (Random): The random numbers
+
+    Returns:
+        tuple: The RNG record
+    """
+    version, words, gauss = rng.getstate()
+    return words + (gauss is not None, gauss or 0.0)
+
+
+def set_rng_state(rng: Random, record: tuple):
+    """
+    Puts the random numbers back to the state from an RNG record
+
+    Args:
+        rng (Random): The random numbers
+        record (tuple): The RNG record from rng_state
+    """
+    rng.setstate((3, record[:625], record[626] if record[625] else None))
+
+
+def write_snapshot(state: Snapshot) -> bytes:
+    """
+    Packs a snapshot into bytes
+
+    Args:
+        state (Snapshot): The snapshot
+
+    Returns:
+        bytes: The packed snapshot
+    """
+    parts = [HEADER.pack(MAGIC, VERSION, state.seed, state.tick, state.level, state.lives_count,
+                         state.next_mole_spawn, state.next_ammo_spawn, state.fire_level, state.fire_count,
+                         state.cannonball_moves, state.exit_count, state.next_id, len(state.moles),
+                         len(state.ammo), len(state.cannonballs), len(state.fire_entries), len(state.exit_entries)),
+             PLAYER.pack(*state.player)]
+    for records, layout in [(state.moles, MOLE), (state.ammo, AMMO), (state.cannonballs, CANNONBALL),
+                            (state.fire_entries, EVENT), (state.exit_entries, EVENT)]:
+        pack = layout.pack
+        parts.extend([pack(*record) for record in records])
+    parts.append(RNG.pack(*state.rng_state))
+    return b"".join(parts)
+
+
+def read_snapshot(data: bytes) -> Snapshot:
+    """
+    Unpacks a snapshot from write_snapshot
+
+    Args:
+        data (bytes): The packed snapshot
+
+    Returns:
+        Snapshot: The snapshot
+    """
+    view = memoryview(data)
+    header = HEADER.unpack_from(view)
+    if header[0] != MAGIC:
+        raise ValueError("This is not a Moleaga snapshot")
+    if header[1] != VERSION:
+        raise ValueError(f"Snapshot version {header[1]} can't be restored by version {VERSION}")
+    offset = HEADER.size
+    player = PLAYER.unpack_from(view, offset)
+    offset += PLAYER.size
+    lists = []
+    for count, layout in zip(header[13:], [MOLE, AMMO, CANNONBALL, EVENT, EVENT]):
+        end = offset + count * layout.size
+        lists.append(list(layout.iter_unpack(view[offset:end])))
+        offset = end
+    moles, ammo, cannonballs, fire_entries, exit_entries = lists
+    return Snapshot(*header[2:13], player, moles, ammo, cannonballs, fire_entries, exit_entries,
+                    RNG.unpack_from(view, offset))
+
+
+def take_snapshot(world: simulation.World) -> bytes:
+    """
+    Snapshots a world
+
+    Args:
+        world (simulation.World): The world
+
+    Returns:
+        bytes: The packed snapshot
+    """
+    player = world.player
+    moles = list(world.moles)
+    cannonballs = list(world.cannonballs)
+    mole_rows = {id(mole): row for row, mole in enumerate(moles)}
+    cannonball_rows = {id(cannonball): row for row, cannonball in enumerate(cannonballs)}
+    return write_snapshot(Snapshot(
+        world.seed, world.tick, world.level, world.lives_count, world.next_mole_spawn, world.next_ammo_spawn,
+        world.fire_level, world.fire_schedule.count, world.cannonball_moves, world.cannonball_exits.count,
+        world.next_id,
+        (player.x, player.y, player.angle, player.wheel_angle, held_keys(player), player.points,
+         player.moles_hit_in_current_level, player.ammo_count),
+        [(mole.x, mole.y, mole.angle, mole.flags, mole.id) for mole in moles],
+        [(ammo.x, ammo.y, ammo.id) for ammo in world.ammo],
+        [(ball.x, ball.y, ball.angle, ball.flags, ball.dx, ball.dy, ball.id) for ball in cannonballs],
+        schedule_entries(world.fire_schedule, mole_rows, lambda event, mole: mole.fire_event == event),
+        schedule_entries(world.cannonball_exits, cannonball_rows),
+        rng_state(world.rng)))
+
+
+def restore_snapshot(data: bytes) -> simulation.World:
+    """
+    Builds a world from a snapshot
+
+    Args:
+        data (bytes): The packed snapshot
+
+    Returns:
+        simulation.World: The restored world
+    """
+    state = read_snapshot(data)
+    x, y, angle, wheel_angle, keys, points, moles_hit, ammo_count = state.player
+    player = simulation.Player(x, y, angle, wheel_angle, False, False, False, False, points, moles_hit, ammo_count)
+    set_held_keys(player, keys)
+    moles = [simulation.Mole(x, y, angle, flags, id=mole_id) for x, y, angle, flags, mole_id in state.moles]
+    cannonballs = [simulation.Cannonball(*record) for record in state.cannonballs]
+    world = simulation.World(player, EntityList(moles), state.lives_count, EntityList(), EntityList(cannonballs),
+                             state.level, state.tick, seed=state.seed, next_mole_spawn=state.next_mole_spawn,
+                             next_ammo_spawn=state.next_ammo_spawn, fire_level=state.fire_level,
+                             cannonball_moves=state.cannonball_moves, next_id=state.next_id)
+    set_rng_state(world.rng, state.rng_state)
+    for x, y, ammo_id in state.ammo:
+        ammo = simulation.Ammo(x, y, ammo_id)
+        world.ammo.append(ammo)
+        world.ammo_index.add(ammo, x)
+    world.fire_schedule = rebuild_schedule(state.fire_entries, state.fire_count, moles)
+    for tick, event, row in state.fire_entries:
+        moles[row].fire_event = event
+    world.cannonball_exits = rebuild_schedule(state.exit_entries, state.exit_count, cannonballs)
+    return world
+
+
+class SnapshotHistory:
+    def __init__(self, size: int):
+        """
+        Creates a ring buffer which keeps only the most recent snapshots
+
+        Args:
+            size (int): How many snapshots to keep
+        """
+        self.snapshots = [None] * size
+        self.next_index = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, data: bytes):
+        """
+        Adds a snapshot, replacing the oldest one once the buffer is full
+
+        Args:
+            data (bytes): The packed snapshot
+        """
+        self.snapshots[self.next_index] = data
+        self.next_index = (self.next_index + 1) % len(self.snapshots)
+        self.count = min(self.count + 1, len(self.snapshots))
+
+    def clear(self):
+        """
+        Forgets every snapshot
+        """
+        self.next_index = 0
+        self.count = 0
+
+    def rewind(self, steps: int) -> bytes:
+        """
+        Takes out an earlier snapshot, forgetting it and every snapshot after it
+        since the game will play out differently from there
+
+        Args:
+            steps (int): How many snapshots back to go, where 1 is the latest. Going
+                further back than the oldest snapshot stops at the oldest one
+
+        Returns:
+            bytes: The snapshot, or None if there are none
+        """
+        if self.count == 0:
+            return None
+        steps = min(steps, self.count)
+        self.next_index = (self.next_index - steps) % len(self.snapshots)
+        self.count -= steps
+        return self.snapshots[self.next_index]
@@ -0,0 +1,110 @@
+"""
+A uniform grid used as a broad phase for collisions. Objects are put into every
+cell their bounding box touches, so only objects sharing a cell need an exact check.
+"""
+
+
+class SpatialHash:
+    def __init__(self, cell_size: int = 64):
+        """
+        Creates an empty grid
+
+        Args:
+            cell_size (int): The width and height of each cell in pixels
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        # Remembers which cells each object was put into, keyed by id() so that
+        # unhashable dataclasses can be stored too
+        self.cells_of = {}
+
+    def cell_keys(self, box: tuple) -> list:
+        """
+        Finds every cell that a bounding box touches
+
+        Args:
+            box (tuple): The (left, top, right, bottom) edges of the box
+
+        Returns:
+            list: The (column, row) keys of the cells
+        """
+        left = int(box[0] // self.cell_size)
+        top = int(box[1] // self.cell_size)
+        right = int(box[2] // self.cell_size)
+        bottom = int(box[3] // self.cell_size)
+        return [(column, row) for column in range(left, right + 1) for row in range(top, bottom + 1)]
+
+    def clear(self):
+        """
+        Removes every object from the grid
+        """
+        self.cells.clear()
+        self.cells_of.clear()
+
+    def insert(self, item, box: tuple):
+        """
+        Adds an object to every cell its bounding box touches
+
+        Args:
+            item: The object to add
+            box (tuple): The (left, top, right, bottom) edges of the object
+        """
+        keys = self.cell_keys(box)
+        for key in keys:
+            if key in self.cells:
+                self.cells[key].append(item)
+            else:
+                self.cells[key] = [item]
+        self.cells_of[id(item)] = keys
+
+    def remove(self, item):
+        """
+        Takes an object out of the grid. Does nothing if it was never added
+
+        Args:
+            item: The object to remove
+        """
+        keys = self.cells_of.pop(id(item), [])
+        for key in keys:
+            cell = self.cells[key]
+            for index in range(len(cell)):
+                if cell[index] is item:
+                    cell.pop(index)
+                    break
+
+    def area_of(self, item) -> tuple:
+        """
+        Finds the part of the grid an object was put into, which is its bounding box
+        grown out to the edges of the cells it touches
+
+        Args:
+            item: The object to look up
+
+        Returns:
+            tuple: The (left, top, right, bottom) edges of its cells, or None if it was never added
+        """
+        keys = self.cells_of.get(id(item))
+        if keys is None:
+            return None
+        # cell_keys lists the cells from the top left one to the bottom right one
+        left, top = keys[0]
+        right, bottom = keys[-1]
+        size = self.cell_size
+        return left * size, top * size, (right + 1) * size, (bottom + 1) * size
+
+    def query(self, box: tuple) -> list:
+        """
+        Finds the objects that share a cell with a bounding box. These are only
+        candidates, so an exact collision check still has to be done on each one
+
+        Args:
+            box (tuple): The (left, top, right, bottom) edges of the box
+
+        Returns:
+            list: Each candidate object once, in the order they were added to the cells
+        """
+        found = {}
+        for key in self.cell_keys(box):
+            for item in self.cells.get(key, ()):
+                found[id(item)] = item
+        return list(found.values())
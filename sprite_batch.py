@@ -0,0 +1,148 @@
+"""
+Draws a whole kind of entity at once instead of one Designer sprite each.
+
+The sprites of the moles, ammo and cannonballs are kept hidden, so Designer only uses
+them for positions and collisions, and never makes, sorts or blits them one at a time.
+Once Designer has drawn the frame, each SpriteBatch draws all of its entities onto the
+screen with a single Surface.blits call. Before Designer draws, everywhere the batch
+was drawn last frame is handed to Designer to clear, so it puts back the background
+and anything under it like it does for its own sprites. Even entities that did not
+move are cleared, or their see-through edges would get darker every frame.
+
+Anything that has to stay on top of the batches, like the HUD, is drawn again after
+them wherever a batch went over it. The batches need designer_internals to find each
+sprite's image, so main.py only uses them when BATCH_SPRITES is on and
+designer_internals.SUPPORTED is True.
+"""
+import pygame
+from designer import DesignerObject
+import designer_internals
+
+
+def sprite_blit(sprite: DesignerObject) -> tuple:
+    """
+    Finds what a sprite would draw and where, the same way Designer does
+
+    Args:
+        sprite (DesignerObject): The sprite
+
+    Returns:
+        tuple: The (surface, (left, top), area) to blit, where area is None for the whole surface
+    """
+    return designer_internals.drawn_image(sprite), designer_internals.draw_position(sprite), None
+
+
+def blit_rect(blit: tuple) -> pygame.Rect:
+    """
+    Finds the part of the screen a blit covers
+
+    Args:
+        blit (tuple): The (surface, (left, top), area) to blit
+
+    Returns:
+        pygame.Rect: Where on the screen it is drawn
+    """
+    surface, (left, top), area = blit
+    if area is None:
+        return pygame.Rect((left, top), surface.get_size())
+    return pygame.Rect(left, top, area[2], area[3])
+
+
+def draw_batches(screen: pygame.Surface, batches: list, overlays: list) -> list:
+    """
+    Draws every batch in order, then draws the parts of the overlays that a batch went
+    over again, so the batches end up under them
+
+    Args:
+        screen (pygame.Surface): The surface to draw on
+        batches (list): The SpriteBatches, in the order to draw them
+        overlays (list): The (surface, (left, top), area) of everything that goes over the batches
+
+    Returns:
+        list: The places on the screen that were drawn on
+    """
+    drawn = []
+    for batch in batches:
+        drawn.extend(batch.draw(screen))
+    covered = []
+    for overlay in overlays:
+        surface, (left, top), area = overlay
+        source_left, source_top = (0, 0) if area is None else area[:2]
+        rect = blit_rect(overlay)
+        # Only the covered parts are drawn again, since drawing see-through edges twice makes them darker
+        for index in rect.collidelistall(drawn):
+            part = rect.clip(drawn[index])
+            covered.append(screen.blit(surface, part, part.move(source_left - left, source_top - top)))
+    return drawn + covered
+
+
+class SpriteSheet:
+    def __init__(self, sprites: list):
+        """
+        Copies the images of some sprites next to each other onto one surface
+
+        Args:
+            sprites (list): The sprites whose images go on the sheet, in order
+        """
+        surfaces = [designer_internals.drawn_image(sprite) for sprite in sprites]
+        width = sum(surface.get_width() for surface in surfaces)
+        height = max(surface.get_height() for surface in surfaces)
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+        self.surface.fill((0, 0, 0, 0))
+        # The part of the sheet each image is in, and where it is drawn from the sprite's position
+        self.areas = []
+        self.offsets = []
+        left = 0
+        for sprite, surface in zip(sprites, surfaces):
+            self.surface.blit(surface, (left, 0))
+            self.areas.append((left, 0, surface.get_width(), surface.get_height()))
+            self.offsets.append(designer_internals.draw_offset(sprite))
+            left += surface.get_width()
+
+    def blit(self, index: int, x: float, y: float) -> tuple:
+        """
+        Finds what to blit to draw one of the images at a sprite position
+
+        Args:
+            index (int): Which image on the sheet
+            x (float): The x position of the sprite
+            y (float): The y position of the sprite
+
+        Returns:
+            tuple: The (surface, (left, top), area) to blit
+        """
+        offset_x, offset_y = self.offsets[index]
+        return self.surface, (x - offset_x, y - offset_y), self.areas[index]
+
+
+class SpriteBatch:
+    def __init__(self):
+        """
+        Creates an empty batch
+        """
+        # The (surface, (left, top), area) of every entity, in the order they are drawn
+        self.blits = []
+
+    def update(self, blits: list, clear: list):
+        """
+        Sets what to draw this frame, and clears what was drawn last frame
+
+        Args:
+            blits (list): The (surface, (left, top), area) of every entity, in the order to draw them
+            clear (list): The places on the screen to put the background back, which
+                everything drawn last frame is added to
+        """
+        clear.extend(blit_rect(blit) for blit in self.blits)
+        self.blits = blits
+
+    def draw(self, screen: pygame.Surface) -> list:
+        """
+        Draws every entity in the batch
+
+        Args:
+            screen (pygame.Surface): The surface to draw on
+
+        Returns:
+            list: The places on the screen that were drawn on
+        """
+        return screen.blits(self.blits)
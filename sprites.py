@@ -0,0 +1,285 @@
+"""
+Preloaded images and recycled sprites for the Designer game.
+
+Every png is decoded (and scaled, for the mini moles and the ammo) once, in background
+threads while the rest of the world is being built, and the sprites for moles, ammo and
+cannonballs are hidden and reused instead of destroyed, so spawning a burst of them
+doesn't read from the disk or allocate new objects.
+Sprites that turn every frame use a rotation atlas of images rotated ahead of time.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+from designer import DesignerObject, circle, image
+from designer.core.internal_image import InternalImage
+import designer_internals
+
+
+# How the game refers to each image, and the png and scale it is made from
+ASSET_FILES = {
+    "cannon": ("./cannon.png", 1),
+    "wheel": ("./wheel.png", 1),
+    "mouse": ("./mouse.png", 1),
+    "mini mouse": ("./mouse.png", 0.5),
+    "rabbit": ("./rabbit.png", 1),
+    "mini rabbit": ("./rabbit.png", 0.5),
+    "ammo": ("./ammo.png", 0.1),
+}
+ASSETS = {}
+# How many threads decode the pngs at startup. pygame lets go of the GIL while it
+# decodes and scales an image, so they really do load at the same time
+PRELOAD_THREADS = 4
+# The images that are still being loaded in the background, by name
+LOADING = {}
+# Degrees between each pre-rotated copy of an image in the rotation atlas.
+# 5 matches how far the cannon and wheel turn each frame
+ROTATION_STEP = 5
+ROTATION_ATLAS = {}
+
+
+def load_asset(path: str, scale: float) -> InternalImage:
+    """
+    Decodes a png and scales it
+
+    Args:
+        path (str): The png file to load
+        scale (float): How much to scale the image by
+
+    Returns:
+        InternalImage: The decoded image, ready to be shared between sprites
+    """
+    asset = InternalImage(path)
+    if scale != 1:
+        width, height = asset.size
+        asset = asset.scale((int(width * scale), int(height * scale)))
+    return asset
+
+
+def start_preloading(threads: int = PRELOAD_THREADS):
+    """
+    Starts decoding and scaling every image in background threads, so the
+    world can be built while they load. preload_assets waits for them
+
+    Args:
+        threads (int): How many threads to load the images with
+    """
+    executor = ThreadPoolExecutor(threads, thread_name_prefix="preload")
+    for name, (path, scale) in ASSET_FILES.items():
+        if name not in ASSETS and name not in LOADING:
+            LOADING[name] = executor.submit(load_asset, path, scale)
+    # The threads finish the images already handed to them and then stop
+    executor.shutdown(wait=False)
+
+
+def preload_assets():
+    """
+    Decodes and scales every image the game uses, waiting for any that
+    start_preloading is still loading
+    """
+    for name, (path, scale) in ASSET_FILES.items():
+        if name in LOADING:
+            ASSETS[name] = LOADING.pop(name).result()
+        elif name not in ASSETS:
+            ASSETS[name] = load_asset(path, scale)
+
+
+def get_asset(name: str) -> InternalImage:
+    """
+    Returns a preloaded image, loading them all first if that hasn't happened yet
+
+    Args:
+        name (str): The name of the image in ASSET_FILES
+
+    Returns:
+        InternalImage: The decoded image
+    """
+    if name not in ASSETS:
+        preload_assets()
+    return ASSETS[name]
+
+
+def image_from_asset(name: str, **kwargs) -> DesignerObject:
+    """
+    Creates a new image sprite which shares a preloaded image instead of loading the png again
+
+    Args:
+        name (str): The name of the image in ASSET_FILES
+        **kwargs: Any other Designer settings, like the anchor
+
+    Returns:
+        DesignerObject: The new sprite
+    """
+    sprite = image([[(0, 0, 0, 0)]], **kwargs)
+    sprite.image = get_asset(name)
+    return sprite
+
+
+class SpritePool:
+    def __init__(self, make):
+        """
+        Creates an empty pool of sprites
+
+        Args:
+            make: A function with no arguments that creates a new sprite when the pool is empty
+        """
+        self.make = make
+        self.free = []
+        # Whether Designer draws the sprites, rather than a sprite_batch
+        self.shown = True
+
+    def take(self) -> DesignerObject:
+        """
+        Gives out a recycled sprite, or a new one if none are left
+
+        Returns:
+            DesignerObject: A sprite, visible unless the pools are drawn in batches
+        """
+        if self.free:
+            sprite = self.free.pop()
+        else:
+            sprite = self.make()
+        sprite.visible = self.shown
+        return sprite
+
+    def give_back(self, sprite: DesignerObject):
+        """
+        Hides a sprite and keeps it to be given out again later
+
+        Args:
+            sprite (DesignerObject): The sprite that is no longer used
+        """
+        sprite.visible = False
+        self.free.append(sprite)
+
+
+POOLS = {
+    "mouse": SpritePool(lambda: image_from_asset("mouse")),
+    "mini mouse": SpritePool(lambda: image_from_asset("mini mouse")),
+    "rabbit": SpritePool(lambda: image_from_asset("rabbit")),
+    "mini rabbit": SpritePool(lambda: image_from_asset("mini rabbit")),
+    "ammo": SpritePool(lambda: image_from_asset("ammo", anchor="midbottom")),
+    "black cannonball": SpritePool(lambda: circle("black", 10)),
+    "red cannonball": SpritePool(lambda: circle("red", 10)),
+}
+
+
+def mole_pool_name(is_mini: bool, is_rabbit: bool) -> str:
+    """
+    Finds which pool a mole's sprite belongs to
+
+    Args:
+        is_mini (bool): Whether the mole is mini or not
+        is_rabbit (bool): Whether the mole is a good rabbit or not
+
+    Returns:
+        str: The name of the pool
+    """
+    if is_rabbit:
+        name = "rabbit"
+    else:
+        name = "mouse"
+    if is_mini:
+        name = "mini " + name
+    return name
+
+
+def cannonball_pool_name(is_from_player: bool) -> str:
+    """
+    Finds which pool a cannonball's sprite belongs to
+
+    Args:
+        is_from_player (bool): If the player shot the cannonball
+
+    Returns:
+        str: The name of the pool
+    """
+    if is_from_player:
+        return "black cannonball"
+    return "red cannonball"
+
+
+def take_sprite(pool_name: str) -> DesignerObject:
+    """
+    Gives out a sprite from one of the pools
+
+    Args:
+        pool_name (str): The name of the pool
+
+    Returns:
+        DesignerObject: A sprite, visible unless the pools are drawn in batches
+    """
+    return POOLS[pool_name].take()
+
+
+def give_back_sprite(pool_name: str, sprite: DesignerObject):
+    """
+    Returns a sprite to one of the pools instead of destroying it
+
+    Args:
+        pool_name (str): The name of the pool
+        sprite (DesignerObject): The sprite that is no longer used
+    """
+    POOLS[pool_name].give_back(sprite)
+
+
+def hide_pooled_sprites():
+    """
+    Stops Designer drawing the sprites from the pools, for when they are drawn in batches
+    """
+    for pool in POOLS.values():
+        pool.shown = False
+        for sprite in pool.free:
+            sprite.visible = False
+
+
+def build_rotation_atlas(name: str, source: pygame.Surface, step: int = ROTATION_STEP):
+    """
+    Rotates an image to every multiple of the step ahead of time
+
+    Args:
+        name (str): The name to look the rotations up by
+        source (pygame.Surface): The unrotated, unscaled image
+        step (int): The number of degrees between each rotation
+    """
+    ROTATION_ATLAS[name] = [pygame.transform.rotate(source, angle).convert_alpha()
+                            for angle in range(0, 360, step)]
+
+
+def build_rotation_atlases(cannon: DesignerObject, wheel: DesignerObject, step: int = ROTATION_STEP):
+    """
+    Builds the rotation atlas for the cannon, the wheel and every kind of mole.
+    Without a supported Designer version there is no atlas, and Designer rotates the images
+
+    Args:
+        cannon (DesignerObject): The player's cannon sprite
+        wheel (DesignerObject): The player's wheel sprite
+        step (int): The number of degrees between each rotation
+    """
+    if not designer_internals.SUPPORTED:
+        return
+    build_rotation_atlas("cannon", designer_internals.image_surface(cannon.image), step)
+    build_rotation_atlas("wheel", designer_internals.image_surface(wheel.image), step)
+    for name in ["mouse", "mini mouse", "rabbit", "mini rabbit"]:
+        build_rotation_atlas(name, designer_internals.image_surface(get_asset(name)), step)
+
+
+def rotate_sprite(sprite: DesignerObject, name: str, angle: float):
+    """
+    Does the same as setting the sprite's angle, but uses the closest image from the
+    rotation atlas instead of having Designer rotate the image again. The sprite keeps
+    the exact angle, so anything aimed with it is not rounded. Falls back to setting the
+    angle when there is no atlas for the sprite or the Designer version is not supported.
+    Only works for sprites that are not scaled or flipped
+
+    Args:
+        sprite (DesignerObject): The sprite to turn
+        name (str): The name of the sprite's images in the rotation atlas
+        angle (float): The new angle of the sprite
+    """
+    if sprite.angle == angle:
+        return
+    if name not in ROTATION_ATLAS or not designer_internals.SUPPORTED:
+        sprite.angle = angle
+        return
+    rotations = ROTATION_ATLAS[name]
+    step = 360 / len(rotations)
+    designer_internals.set_rotated_image(sprite, angle, rotations[round((angle % 360) / step) % len(rotations)])
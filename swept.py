@@ -0,0 +1,123 @@
+"""
+Swept collision tests for cannonballs. Only checking where a cannonball ends up each
+tick lets a fast ball jump straight over a small mole, so instead the whole line it
+moved along during the tick is tested, and a hit is reported as how far along that
+line it happened. That way the hits can be taken in the order they really happened.
+
+A circle touches a box when its center is inside the box grown by the radius with
+rounded corners, which is the same as being inside one of two grown boxes (one wider,
+one taller) or one of the four circles around the corners.
+"""
+import math
+
+
+def swept_box(x: float, y: float, dx: float, dy: float, radius: float) -> tuple:
+    """
+    Returns the bounding box of everywhere a circle passes through during a move
+
+    Args:
+        x (float): The x position of the circle before the move
+        y (float): The y position of the circle before the move
+        dx (float): How far it moves along x
+        dy (float): How far it moves along y
+        radius (float): The radius of the circle
+
+    Returns:
+        tuple: The (left, top, right, bottom) edges of the box
+    """
+    return (min(x, x + dx) - radius, min(y, y + dy) - radius,
+            max(x, x + dx) + radius, max(y, y + dy) + radius)
+
+
+def line_hits_box(x: float, y: float, dx: float, dy: float, box: tuple) -> float:
+    """
+    Finds when a moving point first goes inside a box
+
+    Args:
+        x (float): The x position of the point before the move
+        y (float): The y position of the point before the move
+        dx (float): How far it moves along x
+        dy (float): How far it moves along y
+        box (tuple): The (left, top, right, bottom) edges of the box
+
+    Returns:
+        float: How far through the move it goes inside, from 0 to 1, or None if it never does
+    """
+    enter = 0.0
+    leave = 1.0
+    for position, move, low, high in [(x, dx, box[0], box[2]), (y, dy, box[1], box[3])]:
+        if move == 0:
+            if position <= low or position >= high:
+                return None
+            continue
+        first = (low - position) / move
+        second = (high - position) / move
+        if first > second:
+            first, second = second, first
+        enter = max(enter, first)
+        leave = min(leave, second)
+        if enter >= leave:
+            return None
+    return enter
+
+
+def line_hits_circle(x: float, y: float, dx: float, dy: float, center_x: float, center_y: float,
+                     radius: float) -> float:
+    """
+    Finds when a moving point first goes inside a circle
+
+    Args:
+        x (float): The x position of the point before the move
+        y (float): The y position of the point before the move
+        dx (float): How far it moves along x
+        dy (float): How far it moves along y
+        center_x (float): The x position of the center of the circle
+        center_y (float): The y position of the center of the circle
+        radius (float): The radius of the circle
+
+    Returns:
+        float: How far through the move it goes inside, from 0 to 1, or None if it never does
+    """
+    offset_x = x - center_x
+    offset_y = y - center_y
+    outside = offset_x * offset_x + offset_y * offset_y - radius * radius
+    if outside < 0:
+        return 0.0
+    length = dx * dx + dy * dy
+    if length == 0:
+        return None
+    half_b = offset_x * dx + offset_y * dy
+    discriminant = half_b * half_b - length * outside
+    if discriminant <= 0:
+        return None
+    when = (-half_b - math.sqrt(discriminant)) / length
+    if 0 <= when < 1:
+        return when
+    return None
+
+
+def time_of_impact(x: float, y: float, dx: float, dy: float, radius: float, box: tuple) -> float:
+    """
+    Finds when a moving circle first overlaps a box. Only touching the edge does
+    not count, the same as Designer's colliding()
+
+    Args:
+        x (float): The x position of the circle before the move
+        y (float): The y position of the circle before the move
+        dx (float): How far it moves along x
+        dy (float): How far it moves along y
+        radius (float): The radius of the circle
+        box (tuple): The (left, top, right, bottom) edges of the box
+
+    Returns:
+        float: How far through the move it first overlaps, from 0 to 1, or None if it never does
+    """
+    left, top, right, bottom = box
+    times = [line_hits_box(x, y, dx, dy, (left - radius, top, right + radius, bottom)),
+             line_hits_box(x, y, dx, dy, (left, top - radius, right, bottom + radius))]
+    for corner_x, corner_y in [(left, top), (right, top), (left, bottom), (right, bottom)]:
+        times.append(line_hits_circle(x, y, dx, dy, corner_x, corner_y, radius))
+    times = [when for when in times if when is not None]
+    if not times:
+        return None
+    return min(times)
@@ -0,0 +1,72 @@
+from entity_list import EntityList
+
+
+class Thing:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+def test_removals_wait_for_flush():
+    a, b, c = Thing("a"), Thing("b"), Thing("c")
+    things = EntityList([a, b, c])
+    assert things.remove(b)
+    assert list(things) == [a, c]
+    assert len(things) == 2
+    assert b not in things
+    assert things.items == [a, b, c]
+    things.flush()
+    assert sorted(things, key=lambda thing: thing.name) == [a, c]
+    assert things.items == [a, c]
+
+
+def test_removing_twice_does_nothing_the_second_time():
+    a, b = Thing("a"), Thing("b")
+    things = EntityList([a, b])
+    assert things.remove(a)
+    assert not things.remove(a)
+    assert not things.remove(Thing("elsewhere"))
+    things.flush()
+    assert list(things) == [b]
+
+
+def test_appending_while_looping_visits_the_new_item():
+    a, b = Thing("a"), Thing("b")
+    things = EntityList([a])
+    seen = []
+    for thing in things:
+        seen.append(thing)
+        if thing is a:
+            things.append(b)
+    assert seen == [a, b]
+
+
+def test_flush_keeps_rows_right_after_swapping():
+    items = [Thing(str(number)) for number in range(6)]
+    things = EntityList(items)
+    things.remove(items[0])
+    things.remove(items[5])
+    things.remove(items[2])
+    things.flush()
+    assert sorted(things, key=lambda thing: thing.name) == [items[1], items[3], items[4]]
+    for row, thing in enumerate(things.items):
+        assert things.rows[id(thing)] == row
+    things.remove(items[4])
+    things.flush()
+    assert sorted(things, key=lambda thing: thing.name) == [items[1], items[3]]
+
+
+def test_appending_a_removed_item_cancels_the_removal():
+    a, b, c = Thing("a"), Thing("b"), Thing("c")
+    things = EntityList([a, b, c])
+    things.remove(a)
+    things.append(a)
+    assert a in things
+    assert len(things) == 3
+    things.remove(c)
+    things.flush()
+    assert sorted(things, key=lambda thing: thing.name) == [a, b]
+    for row, thing in enumerate(things.items):
+        assert things.rows[id(thing)] == row
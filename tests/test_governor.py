@@ -0,0 +1,59 @@
+import governor
+from governor import FrameGovernor
+from pipeline import Pipeline
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_governor(monkeypatch) -> tuple:
+    clock = FakeClock()
+    monkeypatch.setattr(governor.time, "perf_counter", clock)
+    pipeline = Pipeline()
+    pipeline.add("rules", lambda world: None)
+    pipeline.add("aim", lambda world: None)
+    pipeline.add("hud", lambda world: None, every=2)
+    return FrameGovernor(0.010, pipeline, ["aim", "hud"], 40, max_level=2, window=3), pipeline, clock
+
+
+def run_ticks(frame_governor: FrameGovernor, clock: FakeClock, seconds: float, ticks: int) -> list:
+    changes = []
+    for _ in range(ticks):
+        frame_governor.start_tick()
+        clock.now += seconds
+        changes.append(frame_governor.end_tick())
+    return changes
+
+
+def test_slows_down_one_step_per_window_and_stops_at_the_last(monkeypatch):
+    frame_governor, pipeline, clock = make_governor(monkeypatch)
+    assert frame_governor.enemy_cannonball_cap is None
+    assert run_ticks(frame_governor, clock, 0.020, 3) == [False, False, True]
+    assert frame_governor.level == 1
+    assert pipeline.get("aim").every == 2
+    assert pipeline.get("hud").every == 4
+    assert pipeline.get("rules").every == 1
+    assert frame_governor.enemy_cannonball_cap == 40
+    run_ticks(frame_governor, clock, 0.020, 6)
+    assert frame_governor.level == 2
+    assert frame_governor.enemy_cannonball_cap == 20
+    assert run_ticks(frame_governor, clock, 0.020, 3) == [False, False, False]
+    assert frame_governor.level == 2
+
+
+def test_speeds_back_up_only_well_under_budget(monkeypatch):
+    frame_governor, pipeline, clock = make_governor(monkeypatch)
+    frame_governor.set_level(2)
+    # Between half the budget and the budget nothing changes
+    run_ticks(frame_governor, clock, 0.007, 3)
+    assert frame_governor.level == 2
+    run_ticks(frame_governor, clock, 0.001, 6)
+    assert frame_governor.level == 0
+    assert pipeline.get("aim").every == 1
+    assert pipeline.get("hud").every == 2
+    assert frame_governor.describe() == "Running normally again"
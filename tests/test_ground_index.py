@@ -0,0 +1,30 @@
+from ground_index import GroundIndex
+
+
+def test_items_stay_sorted_by_x():
+    ground = GroundIndex()
+    for name, x in [("c", 30), ("a", 10), ("b", 20)]:
+        ground.add(name, x)
+    assert list(ground) == ["a", "b", "c"]
+    assert ground.between(10, 30) == ["b"]
+    assert ground.between(5, 35) == ["a", "b", "c"]
+
+
+def test_remove_only_takes_that_item():
+    ground = GroundIndex()
+    first, second = ["first"], ["second"]
+    ground.add(first, 10)
+    ground.add(second, 10)
+    assert ground.remove(second, 10)
+    assert not ground.remove(second, 10)
+    assert not ground.remove(first, 11)
+    assert list(ground) == [first]
+
+
+def test_take_between_removes_the_range():
+    ground = GroundIndex()
+    for x in [5, 15, 25, 35]:
+        ground.add(x, x)
+    assert ground.take_between(10, 30) == [15, 25]
+    assert list(ground) == [5, 35]
+    assert ground.take_between(40, 50) == []
@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("designer")
+import designer_internals
+from hud import HudLabel
+
+
+class FakeLabel:
+    def __init__(self):
+        self.text = ""
+
+
+def test_unchanged_values_are_not_shown_again(monkeypatch):
+    monkeypatch.setattr(designer_internals, "SUPPORTED", False)
+    label = FakeLabel()
+    hud_label = HudLabel(label, "Lives: ")
+    assert hud_label.show(3)
+    assert label.text == "Lives: 3"
+    label.text = "changed"
+    assert not hud_label.show(3)
+    assert label.text == "changed"
+    assert hud_label.show(2)
+    assert label.text == "Lives: 2"
+
+
+def test_the_least_recently_drawn_text_is_dropped(monkeypatch):
+    drawn = []
+    monkeypatch.setattr(designer_internals, "render_text", lambda label, words: drawn.append(words) or words)
+    hud_label = HudLabel(FakeLabel(), "Ammo: ", cache_size=2)
+    assert hud_label.draw("Ammo: 1") == "Ammo: 1"
+    hud_label.draw("Ammo: 0")
+    hud_label.draw("Ammo: 1")
+    assert drawn == ["Ammo: 1", "Ammo: 0"]
+    hud_label.draw("Ammo: 2")
+    assert list(hud_label.drawn) == ["Ammo: 1", "Ammo: 2"]
+    hud_label.draw("Ammo: 1")
+    hud_label.draw("Ammo: 0")
+    assert drawn == ["Ammo: 1", "Ammo: 0", "Ammo: 2", "Ammo: 0"]
+    assert list(hud_label.drawn) == ["Ammo: 1", "Ammo: 0"]
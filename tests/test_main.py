@@ -0,0 +1,96 @@
+import os
+import pytest
+
+# The game is played without a window, and the images are loaded from the top of the repository
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+designer = pytest.importorskip("designer")
+import simulation
+import snapshot
+from bot import Bot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def main():
+    # main.py starts the game when it is imported, so start is swapped out while it loads
+    start = designer.start
+    folder = os.getcwd()
+    designer.start = lambda: None
+    os.chdir(ROOT)
+    try:
+        import main
+        yield main
+    finally:
+        designer.start = start
+        os.chdir(folder)
+
+
+def assert_sprites_match(world):
+    game = world.game
+    assert (world.cannon.x, world.cannon.y, world.cannon.angle) == (game.player.x, game.player.y, game.player.angle)
+    for shown, entities in [(world.mole_sprites, game.moles), (world.ammo_sprites, game.ammo),
+                            (world.cannonball_sprites, game.cannonballs)]:
+        assert sorted(shown) == sorted(entity.id for entity in entities)
+        for entity in entities:
+            sprite = shown[entity.id][1]
+            assert (sprite.x, sprite.y) == (entity.x, entity.y)
+
+
+def test_designer_game_plays_the_same_as_headless(main, monkeypatch):
+    monkeypatch.setattr(main, "RANDOM_SEED", 11)
+    world = main.create_world()
+    headless = simulation.create_world(11)
+    designer_bot = Bot()
+    headless_bot = Bot()
+    for tick in range(1500):
+        if simulation.game_over(headless):
+            break
+        inputs = designer_bot.inputs(world.game)
+        for key in inputs.pressed:
+            main.press_key(world, key)
+        for key in inputs.released:
+            main.release_key(world, key)
+        main.PIPELINE.run(world)
+        main.update_sprites(world)
+        simulation.step(headless, headless_bot.inputs(headless))
+        assert snapshot.take_snapshot(world.game) == snapshot.take_snapshot(headless)
+        assert_sprites_match(world)
+    assert headless.tick > 100
+    assert world.game.player.points == headless.player.points
+    assert world.game.level_stats == headless.level_stats
+
+
+def test_rewinding_swaps_every_sprite(main, monkeypatch):
+    monkeypatch.setattr(main, "RANDOM_SEED", 5)
+    world = main.create_world()
+    start = snapshot.take_snapshot(world.game)
+    world.game.player.ammo_count = simulation.MAX_AMMO
+    for tick in range(20):
+        main.press_key(world, "space")
+        main.step_game(world)
+        main.update_sprites(world)
+    assert world.cannonball_sprites
+    main.restore_game(world, start)
+    main.update_sprites(world)
+    assert world.game.tick == 0
+    assert not world.cannonball_sprites
+    assert_sprites_match(world)
+
+
+def test_interpolated_sprites_are_put_back_after_drawing(main, monkeypatch):
+    monkeypatch.setattr(main, "RANDOM_SEED", 5)
+    world = main.create_world()
+    world.game.player.ammo_count = simulation.MAX_AMMO
+    main.press_key(world, "space")
+    main.step_game(world)
+    main.update_sprites(world)
+    monkeypatch.setattr(main.TIMESTEP, "accumulator", main.TIMESTEP.tick_length / 4)
+    cannonball, ball = next(iter(world.cannonball_sprites.values()))
+    main.interpolate_sprites(world)
+    assert ball.x == pytest.approx(cannonball.x - cannonball.dx * 0.75)
+    assert ball.y == pytest.approx(cannonball.y - cannonball.dy * 0.75)
+    main.restore_sprites()
+    assert not main.DRAWN_POSITIONS
+    assert_sprites_match(world)
@@ -0,0 +1,22 @@
+import memory_report
+import simulation
+from benchmark import Scenario, create_scenario_world
+
+
+def test_records_removed_on_the_tick_they_were_made_still_count():
+    scenario = Scenario("small", 5, 20, 2)
+    first_id = create_scenario_world(scenario).next_id
+    session = memory_report.measure_session(scenario, 200)
+    created = session["created"]
+    assert sum(created.values()) == session["ids_handed_out"] + 1 - first_id
+    # The stress world keeps topping the cannonballs back up, so far more are made than are left
+    assert created["Cannonball"] > session["live"]["Cannonball"]
+    assert created["Mole"] > 0
+
+
+def test_the_add_functions_are_put_back():
+    add_mole = simulation.add_mole
+    memory_report.measure_session(Scenario("small", 1, 5, 2), 5)
+    assert simulation.add_mole is add_mole
+    assert simulation.add_cannonball.__name__ == "add_cannonball"
+    assert simulation.add_ammo.__name__ == "add_ammo"
@@ -0,0 +1,35 @@
+import monte_carlo
+import simulation
+
+
+def keep_constants(monkeypatch):
+    # run_chunk changes the constants for the whole process, so they are put back after each test
+    for name in monte_carlo.PARAMETERS:
+        monkeypatch.setattr(simulation, name, getattr(simulation, name))
+
+
+def test_a_seed_always_plays_the_same_game():
+    first = monte_carlo.play_game(7, 600)
+    second = monte_carlo.play_game(7, 600)
+    del first["game"], second["game"]
+    assert first == second
+    assert first["ticks"] > 0
+
+
+def test_chunks_add_up_to_the_same_summary(monkeypatch):
+    keep_constants(monkeypatch)
+    settings = {"MAX_AMMO": 5}
+    whole = monte_carlo.run_chunk(0, settings, range(4), 400)[1]
+    first = monte_carlo.run_chunk(0, settings, range(2), 400)[1]
+    first.merge(monte_carlo.run_chunk(0, settings, range(2, 4), 400)[1])
+    assert whole.games == 4
+    assert first.report() == whole.report()
+
+
+def test_the_pool_gives_the_same_report_as_one_process(monkeypatch):
+    keep_constants(monkeypatch)
+    grid = monte_carlo.parameter_grid({"MAX_AMMO": [5, 10]})
+    assert grid == [{"MAX_AMMO": 5}, {"MAX_AMMO": 10}]
+    summaries = monte_carlo.run_sweep(grid, 3, 2, 300, workers=2)
+    for settings, summary in zip(grid, summaries):
+        assert summary.report() == monte_carlo.run_chunk(0, settings, range(3), 300)[1].report()
@@ -0,0 +1,49 @@
+import pytest
+from pipeline import Pipeline
+
+
+def make_pipeline() -> tuple:
+    calls = []
+    pipeline = Pipeline()
+    pipeline.add("move", lambda world: calls.append("move"), lambda world: calls.append("collide"))
+    pipeline.add("aim", lambda world: calls.append("aim"))
+    pipeline.add("hud", lambda world: calls.append("hud"), every=2)
+    return pipeline, calls
+
+
+def test_systems_run_in_order_and_only_when_due():
+    pipeline, calls = make_pipeline()
+    pipeline.run(None)
+    pipeline.run(None)
+    pipeline.run(None)
+    assert calls == ["move", "collide", "aim", "hud", "move", "collide", "aim", "move", "collide", "aim", "hud"]
+
+
+def test_disabled_systems_are_skipped_until_enabled():
+    pipeline, calls = make_pipeline()
+    pipeline.disable("aim")
+    pipeline.run(None)
+    assert calls == ["move", "collide", "hud"]
+    calls.clear()
+    pipeline.enable("aim")
+    pipeline.run_every("hud", 1)
+    pipeline.run(None)
+    assert calls == ["move", "collide", "aim", "hud"]
+
+
+def test_moving_a_system_changes_when_it_runs():
+    pipeline, calls = make_pipeline()
+    pipeline.move("hud", 0)
+    pipeline.run(None)
+    assert calls == ["hud", "move", "collide", "aim"]
+    assert [system.name for system in pipeline.systems] == ["hud", "move", "aim"]
+
+
+def test_bad_names_and_rates_are_refused():
+    pipeline, calls = make_pipeline()
+    with pytest.raises(ValueError):
+        pipeline.add("aim", lambda world: None)
+    with pytest.raises(KeyError):
+        pipeline.get("sound")
+    with pytest.raises(ValueError):
+        pipeline.run_every("hud", 0)
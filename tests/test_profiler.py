@@ -0,0 +1,71 @@
+import profiler
+from pipeline import Pipeline
+from profiler import FrameProfiler, RingBuffer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def takes(clock: FakeClock, name: str, seconds: float):
+    def handler(world):
+        clock.now += seconds
+    handler.__name__ = name
+    return handler
+
+
+def test_ring_buffer_keeps_the_newest_values_in_order():
+    buffer = RingBuffer(3)
+    for value in [1, 2, 3, 4, 5]:
+        buffer.add(value)
+    assert len(buffer) == 3
+    assert buffer.recent() == [3.0, 4.0, 5.0]
+
+
+def test_time_goes_to_the_handler_that_spent_it(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(profiler.time, "perf_counter", clock)
+    pipeline = Pipeline()
+    pipeline.add("rules", takes(clock, "move", 0.004))
+    pipeline.add("hud", takes(clock, "update_hud", 0.001), every=2)
+    frame_profiler = FrameProfiler()
+    frame_profiler.instrument(pipeline)
+    for tick in range(4):
+        frame_profiler.start_tick()
+        pipeline.run(None)
+        frame_profiler.end_tick(1, 2, 3)
+    summary = frame_profiler.summary()
+    assert summary["move"]["calls"] == 4
+    assert summary["update_hud"]["calls"] == 2
+    assert round(summary["move"]["p50_ms"], 3) == 4.0
+    assert round(summary["update_hud"]["p50_ms"], 3) == 1.0
+    assert [round(value, 3) for value in frame_profiler.tick_times.recent()] == [0.005, 0.004, 0.005, 0.004]
+    assert frame_profiler.entity_counts["cannonballs"].recent() == [2.0] * 4
+
+
+def test_skipped_systems_and_wrapped_rules_are_timed_once(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(profiler.time, "perf_counter", clock)
+    frame_profiler = FrameProfiler()
+
+    def move(world):
+        clock.now += 0.002
+
+    def aim(world):
+        clock.now += 0.003
+
+    rules = [frame_profiler.wrap(move.__name__, move)]
+    pipeline = Pipeline()
+    pipeline.add("rules", lambda world: [rule(world) for rule in rules])
+    pipeline.add("aim", aim)
+    frame_profiler.instrument(pipeline, skip=["rules"])
+    pipeline.run(None)
+    summary = frame_profiler.summary()
+    assert set(summary) == {"move", "aim", "tick"}
+    assert round(summary["move"]["p50_ms"], 3) == 2.0
+    assert round(summary["aim"]["p50_ms"], 3) == 3.0
+    assert frame_profiler.overlay_text(1).startswith("p95 ms: tick 0.00, aim 3.00")
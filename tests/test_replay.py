@@ -0,0 +1,59 @@
+import pytest
+import replay
+import simulation
+import snapshot
+from bot import Bot
+
+
+def test_recording_round_trip():
+    recorder = replay.InputRecorder(2 ** 64 - 1)
+    recorder.record(0, replay.PRESSED, "a")
+    recorder.record(0, replay.RELEASED, "a")
+    # Far enough apart to need a varint of several bytes
+    recorder.record(300000, replay.PRESSED, "space")
+    recorder.record(300001, replay.PRESSED, "escape")
+    recorder.record(300002, replay.RELEASED, "right")
+    seed, events = replay.read_recording(recorder.to_bytes())
+    assert seed == 2 ** 64 - 1
+    assert events == [(0, replay.PRESSED, "a"), (0, replay.RELEASED, "a"),
+                      (300000, replay.PRESSED, "space"), (300002, replay.RELEASED, "right")]
+    assert recorder.count == 4
+
+
+def test_recording_rejects_bad_input():
+    recorder = replay.InputRecorder(1)
+    recorder.record(10, replay.PRESSED, "d")
+    with pytest.raises(ValueError):
+        recorder.record(9, replay.RELEASED, "d")
+    with pytest.raises(ValueError):
+        replay.read_recording(b"NOPE" + recorder.to_bytes()[4:])
+    old = bytearray(recorder.to_bytes())
+    old[4] = replay.VERSION - 1
+    with pytest.raises(ValueError):
+        replay.read_recording(bytes(old))
+
+
+def test_events_by_tick_keeps_the_order_within_a_tick():
+    events = [(3, replay.RELEASED, "a"), (3, replay.PRESSED, "a"), (3, replay.RELEASED, "a"),
+              (5, replay.PRESSED, "d")]
+    assert replay.events_by_tick(events) == {
+        3: [(replay.RELEASED, "a"), (replay.PRESSED, "a"), (replay.RELEASED, "a")],
+        5: [(replay.PRESSED, "d")],
+    }
+
+
+def test_play_back_repeats_the_recorded_game():
+    world = simulation.create_world(11)
+    recorder = replay.InputRecorder(world.seed)
+    bot = Bot()
+    while world.tick < 2000 and not simulation.game_over(world):
+        inputs = bot.inputs(world)
+        for key in inputs.pressed:
+            recorder.record(world.tick, replay.PRESSED, key)
+        for key in inputs.released:
+            recorder.record(world.tick, replay.RELEASED, key)
+        simulation.step(world, inputs)
+    replayed = replay.play_back(recorder.to_bytes(), world.tick - recorder.last_tick - 1)
+    assert replayed.tick == world.tick
+    assert replayed.player.points == world.player.points
+    assert snapshot.take_snapshot(replayed) == snapshot.take_snapshot(world)
@@ -0,0 +1,28 @@
+from random import Random
+from scheduler import Scheduler, ticks_until
+
+
+def test_items_come_out_by_tick_then_by_order_scheduled():
+    schedule = Scheduler()
+    schedule.schedule(5, "late")
+    first = schedule.schedule(2, "first")
+    second = schedule.schedule(2, "second")
+    assert schedule.pop_due(1) == []
+    assert schedule.pop_due(3) == [(first, "first"), (second, "second")]
+    assert len(schedule) == 1
+    assert [item for event, item in schedule.pop_due(10)] == ["late"]
+
+
+def test_ticks_until_edges():
+    rng = Random(1)
+    assert ticks_until(rng, 1) == 1
+    assert ticks_until(rng, 0) is None
+    assert all(ticks_until(rng, 0.5) >= 1 for _ in range(100))
+
+
+def test_ticks_until_has_the_same_odds_as_rolling_every_tick():
+    rng = Random(7)
+    chance = 1 / 20
+    samples = [ticks_until(rng, chance) for _ in range(20000)]
+    mean = sum(samples) / len(samples)
+    assert abs(mean - 1 / chance) < 0.5
@@ -0,0 +1,47 @@
+import pytest
+from score_store import GameRecord, ScoreStore
+
+
+def game(source, points):
+    return GameRecord(source, 1, points, 2, 100, [(1, 3, 0, 1, 60), (2, 1, 1, 2, 40)], 0.0)
+
+
+def test_best_score_is_kept_without_reading(tmp_path):
+    path = str(tmp_path / "scores.db")
+    store = ScoreStore(path)
+    assert store.best_score() is None
+    for source, points in [("game", 5), ("game", 12), ("monte carlo", 30), ("game", 7)]:
+        store.record(game(source, points))
+    store.flush()
+    assert store.best_score("game") == 12
+    assert store.best_score() == 30
+    assert store.top_scores(1, "game")[0][0] == 12
+    store.close()
+    # A new store starts from the scores already saved
+    store = ScoreStore(path)
+    store.flush()
+    assert store.best_score("game") == 12
+    store.close()
+
+
+def test_level_averages(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.db"))
+    store.record(game("game", 5))
+    store.record(game("game", 9))
+    store.flush()
+    averages = store.level_averages("game")
+    assert averages[1] == {"games": 2, "moles_hit": 3, "rabbits_shot": 0, "lives_lost": 1, "ticks": 60}
+    assert averages[2]["games"] == 2
+    store.close()
+
+
+def test_record_after_close_raises(tmp_path):
+    store = ScoreStore(str(tmp_path / "scores.db"))
+    store.record(game("game", 5))
+    store.close()
+    with pytest.raises(RuntimeError):
+        store.record(game("game", 6))
+    store = ScoreStore(str(tmp_path / "scores.db"))
+    # The game queued before closing was written, and the one after was not
+    assert store.top_scores(5) == [(5, 2, "game", 0.0)]
+    store.close()
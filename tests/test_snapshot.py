@@ -0,0 +1,46 @@
+import pytest
+import simulation
+import snapshot
+from bot import Bot
+
+
+def play(world, bot, ticks):
+    for _ in range(ticks):
+        if simulation.game_over(world):
+            break
+        simulation.step(world, bot.inputs(world))
+
+
+def test_restored_world_plays_out_the_same():
+    world = simulation.create_world(5)
+    play(world, Bot(), 600)
+    data = snapshot.take_snapshot(world)
+    restored = snapshot.restore_snapshot(data)
+    assert snapshot.take_snapshot(restored) == data
+    play(world, Bot(), 600)
+    play(restored, Bot(), 600)
+    assert restored.tick == world.tick
+    assert restored.player.points == world.player.points
+    assert snapshot.take_snapshot(restored) == snapshot.take_snapshot(world)
+
+
+def test_read_snapshot_rejects_bad_data():
+    data = snapshot.take_snapshot(simulation.create_world(1))
+    with pytest.raises(ValueError):
+        snapshot.read_snapshot(b"NOPE" + data[4:])
+    old = bytearray(data)
+    old[4] = snapshot.VERSION + 1
+    with pytest.raises(ValueError):
+        snapshot.read_snapshot(bytes(old))
+
+
+def test_history_keeps_the_latest_snapshots():
+    history = snapshot.SnapshotHistory(3)
+    assert history.rewind(1) is None
+    for data in [b"1", b"2", b"3", b"4"]:
+        history.add(data)
+    assert len(history) == 3
+    assert history.rewind(2) == b"3"
+    assert len(history) == 1
+    assert history.rewind(5) == b"2"
+    assert len(history) == 0
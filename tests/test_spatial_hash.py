@@ -0,0 +1,40 @@
+from spatial_hash import SpatialHash
+
+
+def test_query_finds_objects_in_touched_cells_once():
+    grid = SpatialHash(cell_size=10)
+    wide = "wide"
+    small = "small"
+    far = "far"
+    grid.insert(wide, (0, 0, 35, 5))
+    grid.insert(small, (12, 2, 14, 4))
+    grid.insert(far, (100, 100, 105, 105))
+    assert grid.query((0, 0, 35, 5)) == [wide, small]
+    assert grid.query((50, 50, 60, 60)) == []
+    assert grid.query((101, 101, 102, 102)) == [far]
+
+
+def test_negative_positions_use_their_own_cells():
+    grid = SpatialHash(cell_size=10)
+    grid.insert("left", (-15, 0, -11, 4))
+    assert grid.cell_keys((-15, 0, -11, 4)) == [(-2, 0)]
+    assert grid.query((-20, 0, -10.5, 1)) == ["left"]
+    assert grid.query((0, 0, 5, 5)) == []
+
+
+def test_remove_and_clear():
+    grid = SpatialHash(cell_size=10)
+    grid.insert("a", (0, 0, 25, 5))
+    grid.insert("b", (0, 0, 5, 5))
+    grid.remove("a")
+    grid.remove("never added")
+    assert grid.query((0, 0, 30, 10)) == ["b"]
+    grid.clear()
+    assert grid.query((0, 0, 30, 10)) == []
+
+
+def test_area_of_covers_every_touched_cell():
+    grid = SpatialHash(cell_size=10)
+    grid.insert("a", (12, -3, 25, 4))
+    assert grid.area_of("a") == (10, -10, 30, 10)
+    assert grid.area_of("never added") is None
@@ -0,0 +1,40 @@
+import pytest
+
+pygame = pytest.importorskip("pygame")
+pytest.importorskip("designer")
+from sprite_batch import SpriteBatch, draw_batches
+
+WHITE = (255, 255, 255, 255)
+RED = (255, 0, 0, 255)
+BLUE = (0, 0, 255, 255)
+
+
+def filled(size: tuple, color: tuple) -> pygame.Surface:
+    surface = pygame.Surface(size)
+    surface.fill(color)
+    return surface
+
+
+def test_update_clears_what_was_drawn_last_frame():
+    batch = SpriteBatch()
+    clear = []
+    batch.update([(filled((4, 4), RED), (1, 2), None)], clear)
+    assert clear == []
+    clear = []
+    batch.update([], clear)
+    assert clear == [pygame.Rect(1, 2, 4, 4)]
+
+
+def test_overlays_are_drawn_again_over_the_batches():
+    screen = filled((20, 20), WHITE)
+    batch = SpriteBatch()
+    batch.update([(filled((10, 10), RED), (0, 0), None)], [])
+    covered = (filled((6, 6), BLUE), (5, 5), None)
+    apart = (filled((3, 3), BLUE), (15, 15), None)
+    drawn = draw_batches(screen, [batch], [covered, apart])
+    # Only the corner of the overlay the batch went over is drawn again
+    assert screen.get_at((7, 7)) == BLUE
+    assert screen.get_at((11, 11)) == WHITE
+    assert screen.get_at((2, 2)) == RED
+    assert screen.get_at((16, 16)) == WHITE
+    assert drawn == [pygame.Rect(0, 0, 10, 10), pygame.Rect(5, 5, 5, 5)]
@@ -0,0 +1,36 @@
+import pytest
+from swept import line_hits_box, line_hits_circle, swept_box, time_of_impact
+
+
+def test_swept_box_covers_the_whole_move():
+    assert swept_box(10, 20, -5, 8, 2) == (3, 18, 12, 30)
+
+
+def test_line_hits_box_reports_when_it_enters():
+    assert line_hits_box(0, 5, 20, 0, (10, 0, 20, 10)) == pytest.approx(0.5)
+    assert line_hits_box(0, 15, 20, 0, (10, 0, 20, 10)) is None
+    # Starting inside counts as a hit straight away
+    assert line_hits_box(15, 5, 1, 0, (10, 0, 20, 10)) == 0.0
+    # Stopping short of the box is not a hit
+    assert line_hits_box(0, 5, 5, 0, (10, 0, 20, 10)) is None
+
+
+def test_line_hits_circle():
+    assert line_hits_circle(0, 0, 10, 0, 10, 0, 5) == pytest.approx(0.5)
+    assert line_hits_circle(0, 10, 10, 0, 5, 0, 5) is None
+    assert line_hits_circle(10, 0, 0, 0, 10, 0, 5) == 0.0
+
+
+def test_fast_cannonball_cannot_tunnel_through_a_small_box():
+    # Moves 100 pixels in one tick, past a 16 pixel mole in the middle of the move
+    box = (40, -8, 56, 8)
+    assert time_of_impact(0, 0, 100, 0, 10, box) == pytest.approx(0.3)
+
+
+def test_rounded_corners_miss_but_edges_hit():
+    box = (0, 0, 10, 10)
+    # Passes the corner diagonally, inside the grown box but outside the rounded corner
+    assert time_of_impact(-9, -9, 0, 0, 10, box) is None
+    # Touching the edge exactly does not count
+    assert time_of_impact(-10, 5, 0, 0, 10, box) is None
+    assert time_of_impact(-20, 5, 20, 0, 10, box) == pytest.approx(0.5)
@@ -0,0 +1,28 @@
+from timestep import FixedTimestep
+
+
+def test_runs_one_tick_for_every_tick_length_that_passed():
+    timestep = FixedTimestep(4)
+    assert timestep.advance(10.0) == 0
+    assert timestep.advance(10.125) == 0
+    assert timestep.alpha == 0.5
+    assert timestep.advance(10.25) == 1
+    assert timestep.alpha == 0.0
+    assert timestep.advance(11.5) == 5
+    assert timestep.dropped == 0
+
+
+def test_a_long_stall_drops_ticks_but_keeps_the_fraction():
+    timestep = FixedTimestep(4, max_catch_up=3)
+    timestep.advance(0.0)
+    assert timestep.advance(5.125) == 3
+    assert timestep.dropped == 17
+    assert timestep.alpha == 0.5
+    assert timestep.advance(5.25) == 1
+
+
+def test_the_ticks_add_up_however_the_frames_are_spread():
+    timestep = FixedTimestep(30)
+    total = sum(timestep.advance(frame / 144) for frame in range(144 * 3 + 1))
+    assert total in (89, 90)
+    assert timestep.dropped == 0
@@ -0,0 +1,96 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+import simulation
+from vector_env import VectorEnv, LEFT, RIGHT, ROTATE_LEFT, ROTATE_RIGHT, SHOOT
+
+KEYS = {LEFT: "a", RIGHT: "d", ROTATE_LEFT: "left", ROTATE_RIGHT: "right", SHOOT: "space"}
+
+
+def keys_changed(before: int, after: int) -> simulation.Inputs:
+    return simulation.Inputs([key for flag, key in KEYS.items() if after & flag and not before & flag],
+                             [key for flag, key in KEYS.items() if before & flag and not after & flag])
+
+
+def held_keys(tick: int) -> int:
+    # Shoots straight up, turns left and shoots twice, then drives right while shooting once more
+    script = [(0, SHOOT), (3, 0), (5, ROTATE_LEFT), (9, 0), (10, SHOOT), (11, 0), (12, SHOOT), (13, 0),
+              (20, RIGHT), (30, RIGHT | SHOOT), (31, RIGHT), (40, 0), (45, ROTATE_RIGHT), (60, 0)]
+    held = 0
+    for start, keys in script:
+        if tick >= start:
+            held = keys
+    return held
+
+
+def test_reset_and_step_give_one_value_per_game():
+    env = VectorEnv(6, seed=1)
+    rewards, done = env.step([LEFT | SHOOT] * 6)
+    assert rewards.shape == (6,)
+    assert done.shape == (6,)
+    assert env.mole_alive.shape == (6, 32)
+    assert (env.ammo_count == 0).all()
+    env.player_x[2] = 10
+    env.lives[4] = 0
+    env.reset(np.arange(6) >= 3)
+    assert env.player_x[2] == 10
+    assert env.lives[4] == simulation.STARTING_LIVES
+    assert (env.ticks[3:] == 0).all()
+
+
+def test_a_seed_always_plays_the_same_games():
+    first = VectorEnv(8, seed=3)
+    second = VectorEnv(8, seed=3)
+    actions = np.random.default_rng(0).integers(0, 32, (500, 8))
+    for tick_actions in actions:
+        assert [value.tolist() for value in first.step(tick_actions)] == \
+               [value.tolist() for value in second.step(tick_actions)]
+    for name in ["player_x", "points", "lives", "level", "mole_x", "mole_alive", "ball_x", "ball_alive"]:
+        assert (getattr(first, name) == getattr(second, name)).all()
+
+
+def test_plays_the_same_as_the_simulation(monkeypatch):
+    # The random numbers differ, so nothing spawns or fires and the same entities are put in both games
+    for name in ["MOLE_SPAWN_ODDS", "AMMO_SPAWN_ODDS", "MOLE_FIRE_ODDS"]:
+        monkeypatch.setattr(simulation, name, 10 ** 12)
+    world = simulation.create_world(0)
+    env = VectorEnv(1, seed=0)
+    moles = [(400, 200, 0), (400, 100, simulation.MINI), (300, 150, simulation.RABBIT), (250, 120, 0)]
+    for slot, (x, y, flags) in enumerate(moles):
+        simulation.add_mole(world, simulation.Mole(x, y, 0, flags))
+        env.mole_x[0, slot] = x
+        env.mole_y[0, slot] = y
+        env.mole_mini[0, slot] = bool(flags & simulation.MINI)
+        env.mole_rabbit[0, slot] = bool(flags & simulation.RABBIT)
+        env.mole_alive[0, slot] = True
+    simulation.add_cannonball(world, simulation.Cannonball(420, 300, 0, 0, 0, 5))
+    env.add_cannonballs(np.array([0]), np.array([0]), 420, 300, 0, 5, False)
+    world.player.ammo_count = env.ammo_count[0] = 5
+    held = 0
+    for tick in range(120):
+        simulation.step(world, keys_changed(held, held_keys(tick)))
+        held = held_keys(tick)
+        env.step([held])
+        assert (world.player.x, world.player.angle, world.player.ammo_count) == \
+               (env.player_x[0], env.angle[0], env.ammo_count[0])
+        assert (world.player.points, world.level, world.lives_count) == (env.points[0], env.level[0], env.lives[0])
+        assert sorted((mole.x, mole.y) for mole in world.moles) == \
+               sorted(zip(env.mole_x[0][env.mole_alive[0]], env.mole_y[0][env.mole_alive[0]]))
+        balls = sorted(zip(env.ball_x[0][env.ball_alive[0]], env.ball_y[0][env.ball_alive[0]]))
+        assert len(balls) == len(world.cannonballs)
+        for (x, y), cannonball in zip(balls, sorted(world.cannonballs, key=lambda ball: (ball.x, ball.y))):
+            assert (x, y) == (pytest.approx(cannonball.x), pytest.approx(cannonball.y))
+    assert world.player.points > 0
+    assert world.lives_count < simulation.STARTING_LIVES
+
+
+def test_a_mole_on_the_cannon_fires_without_dividing_by_zero(monkeypatch):
+    monkeypatch.setattr(simulation, "MOLE_FIRE_ODDS", 1)
+    env = VectorEnv(1, seed=0)
+    env.mole_x[0, 0] = env.player_x[0]
+    env.mole_y[0, 0] = env.player_y
+    env.mole_alive[0, 0] = True
+    with np.errstate(all="raise"):
+        env.moles_fire()
+    assert env.ball_alive[0].sum() == 1
+    assert np.isfinite(env.ball_dx[0, 0]) and np.isfinite(env.ball_dy[0, 0])
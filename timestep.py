@@ -0,0 +1,54 @@
+"""
+A fixed timestep for the game loop. Real time is added to an accumulator every frame,
+and the game rules run once for every whole tick that has built up, so the game plays
+at the same speed however fast or slow the screen is drawn. What is left over says how
+far the screen is between the last tick and the next one, for drawing things smoothly.
+"""
+
+
+class FixedTimestep:
+    def __init__(self, tick_rate: int, max_catch_up: int = 5):
+        """
+        Creates a timestep which has not started counting yet
+
+        Args:
+            tick_rate (int): How many ticks to run every second
+            max_catch_up (int): The most ticks to run in one frame. Any more time than that
+                is dropped, so a long stall slows the game down instead of freezing it
+        """
+        self.tick_length = 1 / tick_rate
+        self.max_catch_up = max_catch_up
+        self.accumulator = 0.0
+        self.last_time = None
+        # How many ticks were dropped because the game fell too far behind
+        self.dropped = 0
+
+    def advance(self, now: float) -> int:
+        """
+        Adds the time since the last frame and works out how many ticks to run this frame
+
+        Args:
+            now (float): The current time in seconds, like time.perf_counter()
+
+        Returns:
+            int: How many ticks to run
+        """
+        if self.last_time is not None:
+            self.accumulator += now - self.last_time
+        self.last_time = now
+        ticks = int(self.accumulator // self.tick_length)
+        if ticks > self.max_catch_up:
+            self.dropped += ticks - self.max_catch_up
+            ticks = self.max_catch_up
+            self.accumulator %= self.tick_length
+        else:
+            self.accumulator -= ticks * self.tick_length
+        return ticks
+
+    @property
+    def alpha(self) -> float:
+        """
+        Returns:
+            float: How far the current frame is between the last tick and the next one, from 0 to 1
+        """
+        return min(1.0, self.accumulator / self.tick_length)
@@ -0,0 +1,445 @@
+"""
+Many headless worlds stepped at once for training automated players. Instead of one
+World object per game, every game is a row in shared NumPy arrays: the player's
+position, cannon angle, ammo, lives and level, plus tables of moles, ammo and cannonballs
+padded out to a fixed capacity with an "alive" flag for each slot. One call to
+step() runs a whole tick of the rules for every game with vectorized operations.
+
+The rules are the same as simulation.py, but the random numbers come from one NumPy
+generator shared by all the games, so a seed does not replay the same game as the
+simulation with that seed would.
+
+Each action is a set of flags for the keys held down that tick. Like on a keyboard,
+a key only does something when it goes down, so holding SHOOT fires once.
+"""
+import numpy as np
+import simulation
+
+
+LEFT = 1
+RIGHT = 2
+ROTATE_LEFT = 4
+ROTATE_RIGHT = 8
+SHOOT = 16
+
+
+def take_free_slots(alive: np.ndarray, wanted: np.ndarray) -> tuple:
+    """
+    Finds a free slot in a table for each new row. Rows that don't fit are left out
+
+    Args:
+        alive (np.ndarray): Which slots of each game's table are in use, shaped (games, capacity)
+        wanted (np.ndarray): The new rows each game wants, shaped (games, sources), where
+            sources are whatever the new rows come from, like the moles that fired
+
+    Returns:
+        tuple: The game, the source and the slot of every new row that fits
+    """
+    games, sources = np.nonzero(wanted)
+    if len(games) == 0:
+        return games, sources, sources
+    # Which of its game's new rows each one is: 0 for the first, 1 for the second...
+    rank = (np.cumsum(wanted, axis=1) - 1)[games, sources]
+    free_count = alive.shape[1] - alive.sum(axis=1)
+    fits = rank < free_count[games]
+    games, sources, rank = games[fits], sources[fits], rank[fits]
+    # Sorting the alive flags puts each game's free slots first, in order
+    free_first = np.argsort(alive[games], axis=1, kind="stable")
+    slots = free_first[np.arange(len(games)), rank]
+    return games, sources, slots
+
+
+def line_hits_boxes(x, y, dx, dy, left, top, right, bottom) -> np.ndarray:
+    """
+    The same as swept.line_hits_box for whole arrays of points and boxes at once
+
+    Args:
+        x, y: The positions of the points before the move
+        dx, dy: How far each point moves
+        left, top, right, bottom: The edges of the boxes
+
+    Returns:
+        np.ndarray: How far through each move the point goes inside the box, or infinity if it never does
+    """
+    enter = 0.0
+    leave = 1.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for position, move, low, high in [(x, dx, left, right), (y, dy, top, bottom)]:
+            first = (low - position) / move
+            second = (high - position) / move
+            # A point that doesn't move along this axis is either always or never between the edges
+            between = (low < position) & (position < high)
+            still = move == 0
+            enter = np.maximum(enter, np.where(still, np.where(between, -np.inf, np.inf), np.minimum(first, second)))
+            leave = np.minimum(leave, np.where(still, np.where(between, np.inf, -np.inf), np.maximum(first, second)))
+    return np.where(enter < leave, enter, np.inf)
+
+
+def line_hits_circles(x, y, dx, dy, center_x, center_y, radius: float) -> np.ndarray:
+    """
+    The same as swept.line_hits_circle for whole arrays of points and circles at once
+
+    Args:
+        x, y: The positions of the points before the move
+        dx, dy: How far each point moves
+        center_x, center_y: The centers of the circles
+        radius (float): The radius of the circles
+
+    Returns:
+        np.ndarray: How far through each move the point goes inside the circle, or infinity if it never does
+    """
+    offset_x = x - center_x
+    offset_y = y - center_y
+    outside = offset_x * offset_x + offset_y * offset_y - radius * radius
+    length = dx * dx + dy * dy
+    half_b = offset_x * dx + offset_y * dy
+    discriminant = half_b * half_b - length * outside
+    with np.errstate(divide="ignore", invalid="ignore"):
+        when = (-half_b - np.sqrt(np.maximum(discriminant, 0))) / length
+    hits = (discriminant > 0) & (length > 0) & (when >= 0) & (when < 1)
+    return np.where(outside < 0, 0.0, np.where(hits, when, np.inf))
+
+
+def times_of_impact(x, y, dx, dy, radius: float, left, top, right, bottom) -> np.ndarray:
+    """
+    The same as swept.time_of_impact for whole arrays of moving circles and boxes at once
+
+    Args:
+        x, y: The positions of the circles before the move
+        dx, dy: How far each circle moves
+        radius (float): The radius of the circles
+        left, top, right, bottom: The edges of the boxes
+
+    Returns:
+        np.ndarray: How far through each move the circle first overlaps the box, or infinity if it never does
+    """
+    times = np.minimum(line_hits_boxes(x, y, dx, dy, left - radius, top, right + radius, bottom),
+                       line_hits_boxes(x, y, dx, dy, left, top - radius, right, bottom + radius))
+    for corner_x, corner_y in [(left, top), (right, top), (left, bottom), (right, bottom)]:
+        times = np.minimum(times, line_hits_circles(x, y, dx, dy, corner_x, corner_y, radius))
+    return times
+
+
+class VectorEnv:
+    def __init__(self, count: int, seed: int = None, mole_capacity: int = 32, ammo_capacity: int = 32,
+                 cannonball_capacity: int = 128):
+        """
+        Creates a batch of games, all at the start of their first level.
+        When a table is full, new moles, ammo or cannonballs for that game are dropped
+
+        Args:
+            count (int): How many games to run side by side
+            seed (int): The seed for the random numbers, or None to pick one
+            mole_capacity (int): The most moles each game can have at once
+            ammo_capacity (int): The most ammo pickups each game can have at once
+            cannonball_capacity (int): The most cannonballs each game can have at once
+        """
+        self.count = count
+        self.rng = np.random.default_rng(seed)
+        self.player_x = np.zeros(count)
+        self.angle = np.zeros(count, dtype=np.int64)
+        self.ammo_count = np.zeros(count, dtype=np.int64)
+        self.points = np.zeros(count, dtype=np.int64)
+        self.lives = np.zeros(count, dtype=np.int64)
+        self.level = np.zeros(count, dtype=np.int64)
+        self.moles_hit = np.zeros(count, dtype=np.int64)
+        self.ticks = np.zeros(count, dtype=np.int64)
+        # The same flags as simulation.Player, set and cleared by key presses
+        self.moving_left = np.zeros(count, dtype=bool)
+        self.moving_right = np.zeros(count, dtype=bool)
+        self.rotating_left = np.zeros(count, dtype=bool)
+        self.rotating_right = np.zeros(count, dtype=bool)
+        self.held = np.zeros(count, dtype=np.int64)
+        self.mole_x = np.zeros((count, mole_capacity))
+        self.mole_y = np.zeros((count, mole_capacity))
+        self.mole_alive = np.zeros((count, mole_capacity), dtype=bool)
+        self.mole_mini = np.zeros((count, mole_capacity), dtype=bool)
+        self.mole_rabbit = np.zeros((count, mole_capacity), dtype=bool)
+        self.ammo_x = np.zeros((count, ammo_capacity))
+        self.ammo_alive = np.zeros((count, ammo_capacity), dtype=bool)
+        self.ball_x = np.zeros((count, cannonball_capacity))
+        self.ball_y = np.zeros((count, cannonball_capacity))
+        self.ball_dx = np.zeros((count, cannonball_capacity))
+        self.ball_dy = np.zeros((count, cannonball_capacity))
+        self.ball_alive = np.zeros((count, cannonball_capacity), dtype=bool)
+        self.ball_from_player = np.zeros((count, cannonball_capacity), dtype=bool)
+        # The points, level and length of the last game that ended in each slot
+        self.episode_points = np.zeros(count, dtype=np.int64)
+        self.episode_level = np.zeros(count, dtype=np.int64)
+        self.episode_ticks = np.zeros(count, dtype=np.int64)
+        self.reset()
+
+    @property
+    def player_y(self) -> float:
+        """
+        Returns:
+            float: The y position of the top of every cannon, which never moves
+        """
+        return simulation.TOP_OF_GROUND_Y - simulation.CANNON_HEIGHT
+
+    def reset(self, games: np.ndarray = None):
+        """
+        Starts games over from the beginning
+
+        Args:
+            games (np.ndarray): A mask of the games to reset, or None to reset all of them
+        """
+        if games is None:
+            games = np.ones(self.count, dtype=bool)
+        self.player_x[games] = simulation.WINDOW_WIDTH / 2
+        self.lives[games] = simulation.STARTING_LIVES
+        self.level[games] = 1
+        for name in ["angle", "ammo_count", "points", "moles_hit", "ticks", "held", "moving_left", "moving_right",
+                     "rotating_left", "rotating_right", "mole_alive", "ammo_alive", "ball_alive"]:
+            getattr(self, name)[games] = 0
+
+    def step(self, actions) -> tuple:
+        """
+        Advances every game by one tick, then starts over the games that ended
+
+        Args:
+            actions: The flags of the keys held down in each game, like LEFT | SHOOT
+
+        Returns:
+            tuple: The points scored in each game this tick, and a mask of the games that ended
+        """
+        actions = np.array(actions, dtype=np.int64)
+        points_before = self.points.copy()
+        self.press_keys(actions)
+        self.spawn()
+        self.move_player()
+        self.move_cannonballs()
+        self.hit_moles()
+        self.lose_lives()
+        self.remove_cannonballs_outside()
+        self.pick_up_ammo()
+        self.moles_fire()
+        self.ticks += 1
+        rewards = self.points - points_before
+        done = self.lives <= 0
+        if done.any():
+            self.episode_points[done] = self.points[done]
+            self.episode_level[done] = self.level[done]
+            self.episode_ticks[done] = self.ticks[done]
+            self.reset(done)
+        return rewards, done
+
+    def press_keys(self, actions: np.ndarray):
+        """
+        Runs the rules of the typing handlers for the keys that went down or came up this tick
+
+        Args:
+            actions (np.ndarray): The flags of the keys held down in each game
+        """
+        pressed = actions & ~self.held
+        released = self.held & ~actions
+        self.held = actions
+        half_width = simulation.CANNON_WIDTH // 2
+        self.moving_left |= (pressed & LEFT > 0) & (self.player_x > half_width)
+        self.moving_right |= (pressed & RIGHT > 0) & (self.player_x < simulation.WINDOW_WIDTH - half_width)
+        self.rotating_left |= (pressed & ROTATE_LEFT > 0) & (self.angle < simulation.MAX_CANNON_ANGLE)
+        self.rotating_right |= (pressed & ROTATE_RIGHT > 0) & (self.angle > -simulation.MAX_CANNON_ANGLE)
+        shooting = (pressed & SHOOT > 0) & (self.ammo_count >= 1)
+        if shooting.any():
+            games, sources, slots = take_free_slots(self.ball_alive, shooting[:, None])
+            angle = np.radians(self.angle[games])
+            self.add_cannonballs(games, slots, self.player_x[games], self.player_y + simulation.CANNON_HEIGHT // 2,
+                                 -np.sin(angle) * simulation.CANNONBALL_SPEED,
+                                 -np.cos(angle) * simulation.CANNONBALL_SPEED, True)
+            self.ammo_count[games] -= 1
+        self.moving_left &= released & LEFT == 0
+        self.moving_right &= released & RIGHT == 0
+        self.rotating_left &= released & ROTATE_LEFT == 0
+        self.rotating_right &= released & ROTATE_RIGHT == 0
+
+    def add_cannonballs(self, games: np.ndarray, slots: np.ndarray, x, y, dx, dy, is_from_player: bool):
+        """
+        Fills in cannonball slots found by take_free_slots
+
+        Args:
+            games (np.ndarray): The game of each new cannonball
+            slots (np.ndarray): The slot of each new cannonball
+            x: The starting x positions
+            y: The starting y positions
+            dx: How far each moves along x every tick
+            dy: How far each moves along y every tick
+            is_from_player (bool): If the player shot them
+        """
+        self.ball_x[games, slots] = x
+        self.ball_y[games, slots] = y
+        self.ball_dx[games, slots] = dx
+        self.ball_dy[games, slots] = dy
+        self.ball_from_player[games, slots] = is_from_player
+        self.ball_alive[games, slots] = True
+
+    def spawn(self):
+        """
+        Randomly spawns a mole and an ammo pickup in each game, with more allowed as the level increases
+        """
+        count = self.count
+        rng = self.rng
+        spawning = (rng.random(count) < 1 / simulation.MOLE_SPAWN_ODDS) & (self.mole_alive.sum(axis=1) <= self.level)
+        if spawning.any():
+            games, sources, slots = take_free_slots(self.mole_alive, spawning[:, None])
+            mole_type = rng.integers(0, 11, len(games))
+            self.mole_x[games, slots] = rng.integers(1, simulation.WINDOW_WIDTH + 1, len(games))
+            self.mole_y[games, slots] = rng.integers(1, self.player_y + 1, len(games))
+            self.mole_mini[games, slots] = mole_type == 1
+            self.mole_rabbit[games, slots] = mole_type == 2
+            self.mole_alive[games, slots] = True
+        spawning = (rng.random(count) < 1 / simulation.AMMO_SPAWN_ODDS) & (self.ammo_alive.sum(axis=1) <= self.level)
+        if spawning.any():
+            games, sources, slots = take_free_slots(self.ammo_alive, spawning[:, None])
+            self.ammo_x[games, slots] = rng.integers(1, simulation.WINDOW_WIDTH + 1, len(games))
+            self.ammo_alive[games, slots] = True
+
+    def move_player(self):
+        """
+        Moves and rotates every player whose keys are held, stopping at the edges of the
+        screen and before the cannon faces the ground, like simulation.move_player
+        """
+        speed = simulation.PLAYER_SPEED
+        left = self.moving_left
+        self.player_x = np.where(left, self.player_x - speed, np.where(self.moving_right, self.player_x + speed,
+                                                                        self.player_x))
+        half_width = simulation.CANNON_WIDTH // 2
+        past_right = self.player_x > simulation.WINDOW_WIDTH - half_width
+        self.moving_right &= ~past_right
+        self.moving_left &= ~(~past_right & (self.player_x < half_width))
+        turning_left = self.rotating_left.copy()
+        turning_right = ~turning_left & self.rotating_right
+        self.rotating_left &= ~(turning_left & (self.angle >= simulation.MAX_CANNON_ANGLE))
+        self.rotating_right &= ~(turning_right & (self.angle <= -simulation.MAX_CANNON_ANGLE))
+        self.angle += (turning_left.astype(np.int64) - turning_right) * simulation.ROTATION_SPEED
+
+    def move_cannonballs(self):
+        """
+        Moves every cannonball
+        """
+        self.ball_x += self.ball_dx
+        self.ball_y += self.ball_dy
+
+    def remove_cannonballs_outside(self):
+        """
+        Frees the slots of the cannonballs that left the window, after the collisions
+        like simulation.remove_cannonballs_outside
+        """
+        inside = ((self.ball_x >= 0) & (self.ball_x <= simulation.WINDOW_WIDTH) &
+                  (self.ball_y >= 0) & (self.ball_y <= simulation.WINDOW_HEIGHT))
+        self.ball_alive &= inside
+
+    def hit_moles(self):
+        """
+        Removes the moles and player cannonballs that collide anywhere along the cannonball's
+        move this tick, scoring each hit and moving games to the next level once enough moles
+        were hit. Hits are taken in the order they happened, so each cannonball only hits
+        the first mole it reaches
+        """
+        games, balls = np.nonzero(self.ball_alive & self.ball_from_player)
+        if len(games) == 0:
+            return
+        radius = simulation.CANNONBALL_RADIUS
+        dx = self.ball_dx[games, balls][:, None]
+        dy = self.ball_dy[games, balls][:, None]
+        start_x = self.ball_x[games, balls][:, None] - dx
+        start_y = self.ball_y[games, balls][:, None] - dy
+        mole_x = self.mole_x[games]
+        mole_y = self.mole_y[games]
+        half_size = np.where(self.mole_mini[games], simulation.MINI_MOLE_SIZE / 2, simulation.MOLE_SIZE / 2)
+        # Shaped (cannonballs, moles): every live player cannonball's path against every mole slot in its game.
+        # Only the pairs whose boxes overlap get the exact test
+        rows, moles = np.nonzero((np.minimum(start_x, start_x + dx) - radius < mole_x + half_size) &
+                                 (mole_x - half_size < np.maximum(start_x, start_x + dx) + radius) &
+                                 (np.minimum(start_y, start_y + dy) - radius < mole_y + half_size) &
+                                 (mole_y - half_size < np.maximum(start_y, start_y + dy) + radius) &
+                                 self.mole_alive[games])
+        if len(rows) == 0:
+            return
+        times = times_of_impact(start_x[rows, 0], start_y[rows, 0], dx[rows, 0], dy[rows, 0], radius,
+                                mole_x[rows, moles] - half_size[rows, moles], mole_y[rows, moles] - half_size[rows, moles],
+                                mole_x[rows, moles] + half_size[rows, moles], mole_y[rows, moles] + half_size[rows, moles])
+        hitting = np.isfinite(times)
+        order = np.argsort(times[hitting], kind="stable")
+        rows, moles = rows[hitting][order], moles[hitting][order]
+        keys = games[rows] * self.mole_alive.shape[1] + moles
+        # With the hits sorted by time, a hit is certain once it is the first one left for both its
+        # cannonball and its mole, since nothing can take either of them before it. Taking those
+        # and repeating goes through the hits in the same order as simulation.hit_moles
+        hit_rows = []
+        hit_moles = []
+        while len(rows):
+            first_for_ball = np.zeros(len(rows), dtype=bool)
+            first_for_ball[np.unique(rows, return_index=True)[1]] = True
+            first_for_mole = np.zeros(len(rows), dtype=bool)
+            first_for_mole[np.unique(keys, return_index=True)[1]] = True
+            certain = first_for_ball & first_for_mole
+            hit_rows.append(rows[certain])
+            hit_moles.append(moles[certain])
+            left = ~np.isin(rows, rows[certain]) & ~np.isin(keys, keys[certain])
+            rows, moles, keys = rows[left], moles[left], keys[left]
+        if not hit_rows:
+            return
+        hit_rows = np.concatenate(hit_rows)
+        moles = np.concatenate(hit_moles)
+        games, balls = games[hit_rows], balls[hit_rows]
+        self.ball_alive[games, balls] = False
+        self.mole_alive[games, moles] = False
+        mini = self.mole_mini[games, moles]
+        rabbit = self.mole_rabbit[games, moles]
+        np.add.at(self.points, games, np.where(mini, 3, np.where(rabbit, -3, 1)))
+        hit_counts = np.bincount(games, minlength=self.count)
+        for hit in range(hit_counts.max()):
+            hitting = hit_counts > hit
+            self.moles_hit[hitting] += 1
+            passed = hitting & (self.moles_hit >= self.level)
+            self.level[passed] += 1
+            self.moles_hit[passed] = 0
+            self.mole_alive[passed] &= ~self.mole_rabbit[passed]
+
+    def lose_lives(self):
+        """
+        Takes away a life for every mole cannonball that hit the player at any point of its move this tick
+        """
+        games, balls = np.nonzero(self.ball_alive & ~self.ball_from_player)
+        if len(games) == 0:
+            return
+        half_width = simulation.CANNON_WIDTH / 2
+        x = self.player_x[games]
+        times = times_of_impact(self.ball_x[games, balls] - self.ball_dx[games, balls],
+                                self.ball_y[games, balls] - self.ball_dy[games, balls],
+                                self.ball_dx[games, balls], self.ball_dy[games, balls], simulation.CANNONBALL_RADIUS,
+                                x - half_width, self.player_y, x + half_width, self.player_y + simulation.CANNON_HEIGHT)
+        hitting = np.isfinite(times)
+        games, balls = games[hitting], balls[hitting]
+        self.ball_alive[games, balls] = False
+        np.subtract.at(self.lives, games, 1)
+
+    def pick_up_ammo(self):
+        """
+        Removes the ammo each cannon runs into, giving one ammo for each up to the limit
+        """
+        half_width = simulation.CANNON_WIDTH / 2 + simulation.AMMO_WIDTH / 2
+        # The ammo always sits on the ground next to the cannon, so only x needs checking
+        picked = self.ammo_alive & (np.abs(self.ammo_x - self.player_x[:, None]) < half_width)
+        self.ammo_alive &= ~picked
+        self.ammo_count = np.minimum(simulation.MAX_AMMO, self.ammo_count + picked.sum(axis=1))
+
+    def moles_fire(self):
+        """
+        Lets the bad moles randomly shoot straight at the player, more often the higher the level
+        """
+        chance = np.minimum(self.level, simulation.MOLE_FIRE_ODDS) / simulation.MOLE_FIRE_ODDS
+        firing = (self.mole_alive & ~self.mole_rabbit &
+                  (self.rng.random(self.mole_alive.shape) < chance[:, None]))
+        if not firing.any():
+            return
+        games, moles, slots = take_free_slots(self.ball_alive, firing)
+        x = self.mole_x[games, moles]
+        y = self.mole_y[games, moles]
+        run = self.player_x[games] - x
+        rise = self.player_y - y
+        # The same as cannonball_velocity(angle_towards(...) - 90), without the trigonometry.
+        # A mole sitting right on the cannon would divide by zero, so its shot just stays put
+        distance = np.maximum(np.hypot(run, rise), 1e-9)
+        speed = simulation.CANNONBALL_SPEED
+        self.add_cannonballs(games, slots, x, y, run / distance * speed, rise / distance * speed, False)